@@ -2,22 +2,35 @@
 # Combinaison de toutes les parties avec corrections
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, date, timedelta
-import json
-import io
-import xlsxwriter
-
-# Configuration de la page
-st.set_page_config(
-    page_title="Plan Financier Familial",
-    page_icon="💰",
-    layout="wide",
-    initial_sidebar_state="expanded"
+import functools
+import os
+
+# Moteur et utilitaires légers ; pandas, plotly et xlsxwriter sont importés
+# par les pages qui en ont besoin
+from plan_financier.cache import CacheLRU
+from plan_financier.fonds_urgence import BABY_STEPS
+from plan_financier.formatage import format_currency
+from plan_financier.instrumentation import Enregistreur, instrumenter, noter
+from plan_financier.modeles import configurer_nomenclatures, en_enregistrements
+from plan_financier.moteur import PlanFinancier
+from plan_financier.sante_projets import calculer_probabilite_reussite, calculer_velocite_projet, categorize_project
+from plan_financier.stockage import ConflitModification, StockagePlan
+
+# Base SQLite partagée par toutes les sessions
+CHEMIN_BASE = os.environ.get(
+    'PLAN_FINANCIER_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plan_financier.db')
 )
 
+# Graine de la projection Monte Carlo (résultats reproductibles entre reruns)
+GRAINE_SIMULATION = 2030
+
+# Planificateur des revenus réguliers dans le processus de l'application : activé
+# explicitement avec PLAN_FINANCIER_PLANIFICATEUR=1 (sinon, worker séparé ou aucun)
+PLANIFICATEUR_ACTIF = os.environ.get('PLAN_FINANCIER_PLANIFICATEUR', '0') == '1'
+
+
 # ============================================================================
 # CSS CUSTOM
 # ============================================================================
@@ -34,10 +47,81 @@ def load_css():
 # DONNÉES ET LOGIQUE METIER AMÉLIORÉE
 # ============================================================================
 
+def obtenir_stockage():
+    """Retourne la connexion de la session à la base du plan"""
+    if 'stockage' not in st.session_state:
+        st.session_state.stockage = StockagePlan(CHEMIN_BASE)
+    return st.session_state.stockage
+
+def charger_depuis_stockage(stockage):
+    """Charge le plan depuis la base (le moteur et ses index seront reconstruits)"""
+    projets, revenus, admin_config, grand_livre = stockage.charger_plan()
+    st.session_state.admin_config = admin_config
+    configurer_nomenclatures(admin_config['listes_config'])
+    st.session_state.projets = en_enregistrements(projets, 'projet')
+    st.session_state.revenus_variables = en_enregistrements(revenus, 'revenu')
+    st.session_state.grand_livre = grand_livre
+
+@instrumenter()
+def synchroniser_depuis_stockage(stockage):
+    """Applique les modifications des autres sessions (relecture des seuls enregistrements changés)"""
+    modifications = stockage.modifications_distantes()
+    if modifications is None:
+        charger_depuis_stockage(stockage)
+        return
+    changements, admin_config = modifications
+    obtenir_plan().appliquer_modifications(
+        {'projet': changements['projets'], 'revenu': changements['revenus_variables']}, admin_config,
+        changements['grand_livre']
+    )
+
+@st.cache_resource
+def demarrer_planificateur():
+    """Planificateur des revenus réguliers, un seul par processus (partagé par les sessions)"""
+    from plan_financier.planificateur import PlanificateurRevenus
+
+    planificateur = PlanificateurRevenus(CHEMIN_BASE)
+    planificateur.demarrer()
+    return planificateur
+
+def obtenir_utilisateur():
+    """Membre de la famille qui utilise la session (auteur des modifications)"""
+    return st.session_state.get('utilisateur')
+
+@instrumenter()
+def sauvegarder_modifications():
+    """Écrit en base uniquement les enregistrements modifiés.
+
+    Si une autre session a modifié les mêmes enregistrements entre-temps, rien
+    n'est écrit : le plan est rechargé depuis la base et le conflit retourné
+    (None sinon).
+    """
+    stockage = obtenir_stockage()
+    try:
+        stockage.sauvegarder_plan(
+            st.session_state.projets, st.session_state.revenus_variables, st.session_state.admin_config,
+            obtenir_utilisateur(), obtenir_plan().grand_livre
+        )
+    except ConflitModification as conflit:
+        charger_depuis_stockage(stockage)
+        reconstruire_plan()
+        return f"⚠️ Conflit : {conflit}. Les données ont été rechargées, veuillez recommencer."
+    return None
+
+@instrumenter()
 def initialize_session_state():
     """Initialise les données de session avec TOUS les champs requis et allocation dynamique"""
+    # Chargement depuis la base, ou rechargement si une autre session l'a modifiée
+    stockage = obtenir_stockage()
     if 'projets' not in st.session_state:
-        st.session_state.projets = [
+        if stockage.est_initialise():
+            charger_depuis_stockage(stockage)
+    elif stockage.modifie_par_autre_session():
+        synchroniser_depuis_stockage(stockage)
+
+    # Données de démonstration pour une base vide
+    if 'projets' not in st.session_state:
+        st.session_state.projets = en_enregistrements([
             {
                 'id': 1,
                 'nom': 'Titre foncier Mejeuh',
@@ -59,8 +143,7 @@ def initialize_session_state():
                 'updated_by': 'Alix',
                 'suivi_mensuel': [
                     {'mois': '2025-01', 'prevu': 200000, 'reel': 50000}
-                ],
-                'allocations_recues': []
+                ]
             },
             {
                 'id': 2,
@@ -81,8 +164,7 @@ def initialize_session_state():
                 'date_modification': datetime(2025, 1, 20),
                 'created_by': 'William',
                 'updated_by': 'William',
-                'suivi_mensuel': [],
-                'allocations_recues': []
+                'suivi_mensuel': []
             },
             {
                 'id': 3,
@@ -106,8 +188,7 @@ def initialize_session_state():
                 'suivi_mensuel': [
                     {'mois': '2025-01', 'prevu': 542000, 'reel': 542000},
                     {'mois': '2025-02', 'prevu': 542000, 'reel': 542000}
-                ],
-                'allocations_recues': []
+                ]
             },
             {
                 'id': 4,
@@ -131,13 +212,12 @@ def initialize_session_state():
                 'suivi_mensuel': [
                     {'mois': '2025-01', 'prevu': 100000, 'reel': 75000},
                     {'mois': '2025-02', 'prevu': 100000, 'reel': 75000}
-                ],
-                'allocations_recues': []
+                ]
             }
-        ]
+        ], 'projet')
     
     if 'revenus_variables' not in st.session_state:
-        st.session_state.revenus_variables = [
+        st.session_state.revenus_variables = en_enregistrements([
             {
                 'id': 1,
                 'nom': 'Salaire William',
@@ -180,7 +260,7 @@ def initialize_session_state():
                 'updated_by': 'Alix',
                 'allocations': []
             }
-        ]
+        ], 'revenu')
     
     # Configuration Admin
     if 'admin_config' not in st.session_state:
@@ -195,7 +275,7 @@ def initialize_session_state():
                 'types_projet': ['Actif générateur', 'Passif', 'Investissement formation'],
                 'statuts_projet': ['Planifié', 'En cours', 'Développement', 'Réalisé', 'Suspendu'],
                 'priorites': ['Critique', 'Haute', 'Moyenne', 'Faible'],
-                'types_revenu': ['Salaire', 'Business', 'Loyer', 'Investissement', 'Autre'],
+                'types_revenu': ['Salaire', 'Business', 'Loyer', 'Investissement', 'Épargne', 'Autre'],
                 'responsables': ['Alix', 'William', 'Famille']
             },
             'mentors_conseils': {
@@ -217,241 +297,193 @@ def initialize_session_state():
             },
             'education_module_active': False
         }
+        configurer_nomenclatures(st.session_state.admin_config['listes_config'])
     
     # Initialiser les filtres de date
     if 'filters_date' not in st.session_state:
         st.session_state.filters_date = {'year': 'Tous', 'month': 'Tous'}
 
+    reconstruire_plan()
+
+    # Première exécution : enregistrer les données de démonstration
+    if not stockage.est_initialise():
+        sauvegarder_modifications()
+
+def reconstruire_plan():
+    """Moteur du plan sur les listes de la session, recréé après un rechargement
+    (version suivante et même cache : les anciens résultats ne sont plus demandés)"""
+    plan = st.session_state.get('plan')
+    if plan is None or plan.projets is not st.session_state.projets:
+        st.session_state.plan = PlanFinancier(
+            st.session_state.projets, st.session_state.revenus_variables, st.session_state.admin_config,
+            version=plan.version + 1 if plan else 0,
+            cache=plan.cache if plan else CacheLRU(capacite=32),
+            grand_livre=st.session_state.get('grand_livre')
+        )
+        # Données de démonstration : grand livre repris des projets
+        st.session_state.grand_livre = st.session_state.plan.grand_livre
+
+def obtenir_plan():
+    """Retourne le moteur du plan de la session"""
+    return st.session_state.plan
+
+def restaurer_plan(projets, revenus, admin_config, grand_livre):
+    """Remplace le plan de la session et de la base par une sauvegarde restaurée"""
+    obtenir_stockage().remplacer_plan(projets, revenus, admin_config, obtenir_utilisateur(), grand_livre)
+    plan = obtenir_plan()
+    st.session_state.admin_config = admin_config
+    st.session_state.projets = projets
+    st.session_state.revenus_variables = revenus
+    st.session_state.grand_livre = grand_livre
+    st.session_state.plan = PlanFinancier(projets, revenus, admin_config, version=plan.version + 1, cache=plan.cache,
+                                          grand_livre=grand_livre)
+
 def safe_get(dict_obj, key, default='N/A'):
     """Récupère une valeur de dictionnaire de manière sécurisée"""
     return dict_obj.get(key, default)
 
+@instrumenter()
+def obtenir_table_projets():
+    """Retourne la table colonnaire des projets, reconstruite si elle est désynchronisée"""
+    return obtenir_plan().obtenir_table_projets()
+
+@instrumenter()
 def calculer_kpis(projets_filtered=None):
     """Calcule les KPIs en temps réel avec projets filtrés optionnels"""
-    if projets_filtered is None:
-        projets = st.session_state.projets
-    else:
-        projets = projets_filtered
-    
-    revenus = st.session_state.revenus_variables
-
-    # Revenus totaux
-    revenus_mensuels = sum(r['montant_mensuel'] for r in revenus)
-
-    # Cash flow mensuel total
-    cash_flow_mensuel = sum(p['cash_flow_mensuel'] for p in projets)
-
-    # Totaux par type
-    total_actifs = sum(p['montant_total'] for p in projets if p['type'] == 'Actif générateur')
-    total_passifs = sum(p['montant_total'] for p in projets if p['type'] == 'Passif')
-    total_formation = sum(p['montant_total'] for p in projets if p['type'] == 'Investissement formation')
-    total_global = total_actifs + total_passifs + total_formation
-
-    # Ratios
-    ratio_actifs_passifs = (total_actifs / total_global * 100) if total_global > 0 else 0
+    return obtenir_plan().calculer_kpis(projets_filtered)
 
-    # Revenus passifs
-    revenus_passifs = sum(p['cash_flow_mensuel'] for p in projets if p['type'] == 'Actif générateur' and p['cash_flow_mensuel'] > 0)
-    revenus_passifs_pct = (revenus_passifs / revenus_mensuels * 100) if revenus_mensuels > 0 else 0
-
-    # Nombre d'actifs générateurs
-    nombre_actifs = len([p for p in projets if p['type'] == 'Actif générateur'])
-
-    # Phase financière
-    if cash_flow_mensuel < 0 or revenus_passifs_pct < 10:
-        phase_actuelle = 'Stabilisation'
-    elif cash_flow_mensuel >= 0 and 10 <= revenus_passifs_pct < 30:
-        phase_actuelle = 'Transition'
-    else:
-        phase_actuelle = 'Expansion'
-
-    return {
-        'revenus_mensuels': revenus_mensuels,
-        'cash_flow_mensuel': cash_flow_mensuel,
-        'ratio_actifs_passifs': ratio_actifs_passifs,
-        'revenus_passifs_pct': revenus_passifs_pct,
-        'nombre_actifs': nombre_actifs,
-        'phase_actuelle': phase_actuelle,
-        'fonds_urgence_mois': 0,
-        'baby_step_actuel': 1,
-        'depenses_mensuelles': abs(sum(p['cash_flow_mensuel'] for p in projets if p['cash_flow_mensuel'] < 0)),
-        'total_actifs': total_actifs,
-        'total_passifs': total_passifs,
-        'total_formation': total_formation
-    }
-
-def format_currency(amount):
-    """Formate un montant en FCFA"""
-    return f"{amount:,.0f} FCFA".replace(",", " ")
-
-def categorize_project(projet):
-    """Catégorise un projet selon son état"""
-    aujourd_hui = date.today()
-    echeance = projet['echeance']
-
-    # Calcul progression
-    progression = (projet['montant_utilise_reel'] / projet['montant_total']) * 100 if projet['montant_total'] > 0 else 0
-
-    # Jours jusqu'à échéance
-    jours_restants = (echeance - aujourd_hui).days
-
-    # Logique de catégorisation
-    if echeance < aujourd_hui:
-        return 'en-retard', 'En Retard', '#ff4444'
-    elif jours_restants <= 30 and progression < 70:
-        return 'a-risque', 'À Risque', '#ff8800'
-    elif progression > 90:
-        return 'en-avance', 'En Avance', '#00aa00'
-    elif projet['montant_utilise_reel'] >= projet['montant_total']:
-        return 'bloque', 'Budget Épuisé', '#666666'
-    else:
-        return 'en-cours', 'En Cours', '#007bff'
+@instrumenter()
+def projets_filtres_et_kpis():
+    """Projets filtrés et KPIs mémorisés par (version des données, filtres de date)"""
+    filtres = st.session_state.filters_date
+    return obtenir_plan().projets_filtres_et_kpis(filtres['year'], filtres['month'])
 
+@instrumenter(items=len)
 def filter_by_date(items, item_type='projet'):
     """Filtre les projets ou revenus par date selon les filtres globaux"""
     if 'filters_date' not in st.session_state:
         return items
-    
-    year = st.session_state.filters_date['year']
-    month = st.session_state.filters_date['month']
-    
-    if year == "Tous" and month == "Tous":
-        return items
-    
-    def is_visible(item):
-        if item_type == 'projet':
-            start_date = item['date_creation']
-            end_date = item.get('echeance', datetime.now().date())
-        else:  # revenu
-            start_date = item.get('date_disponibilite', item['date_creation'])
-            # Pour les revenus, considérer qu'ils sont actifs jusqu'à allocation complète
-            end_date = datetime.now().date()
-        
-        # Convertir en date si nécessaire
-        if isinstance(start_date, datetime):
-            start_date = start_date.date()
-        if isinstance(end_date, datetime):
-            end_date = end_date.date()
-        
-        # Filtrage par année
-        if year != "Tous" and start_date.year != int(year):
-            return False
-        
-        # Filtrage par mois
-        if month != "Tous":
-            filter_month = int(month)
-            # Vérifier si l'item est actif pendant ce mois
-            if start_date.year == end_date.year:
-                return start_date.month <= filter_month <= end_date.month
-            else:
-                # Si l'item s'étend sur plusieurs années
-                return True
-        
-        return True
-    
-    return [item for item in items if is_visible(item)]
+    filtres = st.session_state.filters_date
+    return obtenir_plan().filtrer_par_date(items, item_type, filtres['year'], filtres['month'])
 
 # ============================================================================
 # FONCTIONS D'ALLOCATION DYNAMIQUE
 # ============================================================================
 
+def obtenir_index_ids(item_type):
+    """Retourne l'index id -> enregistrement des projets ou revenus, reconstruit si désynchronisé"""
+    return obtenir_plan().obtenir_index_ids(item_type)
+
+@instrumenter()
+def obtenir_agregats():
+    """Retourne les agrégats mensuels des projets, reconstruits s'ils sont désynchronisés"""
+    return obtenir_plan().obtenir_agregats()
+
+def ajouter_item(item_type, item):
+    """Ajoute un projet ou un revenu à la session en maintenant les index ; retourne un conflit éventuel"""
+    obtenir_plan().ajouter_item(item_type, item)
+    return sauvegarder_modifications()
+
+def supprimer_item(item_type, item_id):
+    """Supprime un projet ou un revenu de la session en maintenant les index ; retourne un conflit éventuel"""
+    obtenir_plan().supprimer_item(item_type, item_id)
+    return sauvegarder_modifications()
+
+def reassigner_id_item(item_type, ancien_id, nouvel_id):
+    """Change l'id d'un projet ou d'un revenu en maintenant les index"""
+    succes = obtenir_plan().reassigner_id_item(item_type, ancien_id, nouvel_id)
+    if succes:
+        succes = sauvegarder_modifications() is None
+    return succes
+
+def _enregistrer_resultat(succes, message):
+    """Sauvegarde après une mutation réussie ; un conflit d'écriture la transforme en échec"""
+    if succes:
+        conflit = sauvegarder_modifications()
+        if conflit:
+            return False, conflit
+    return succes, message
+
 def allouer_revenu_aux_projets(revenu_id, allocations_list):
-    """Alloue un revenu à plusieurs projets avec validation"""
-    # Trouver le revenu
-    revenu = next((r for r in st.session_state.revenus_variables if r['id'] == revenu_id), None)
-    if not revenu:
-        return False, "Revenu introuvable"
-
-    # Validation du total
-    total_alloue = sum(alloc['montant'] for alloc in allocations_list)
-    if total_alloue > revenu['montant_mensuel']:
-        return False, f"Total alloué ({format_currency(total_alloue)}) dépasse le revenu disponible ({format_currency(revenu['montant_mensuel'])})"
-
-    # Mettre à jour le revenu
-    revenu['allocations'] = allocations_list
-    revenu['date_modification'] = datetime.now()
-    revenu['updated_by'] = 'William'  # À remplacer par utilisateur courant
-
-    # Mettre à jour les projets concernés
-    for allocation in allocations_list:
-        projet = next((p for p in st.session_state.projets if p['id'] == allocation['projet_id']), None)
-        if projet:
-            if 'allocations_recues' not in projet:
-                projet['allocations_recues'] = []
-
-            # Ajouter l'allocation reçue
-            projet['allocations_recues'].append({
-                'revenu_id': revenu_id,
-                'revenu_nom': revenu['nom'],
-                'montant': allocation['montant'],
-                'mois': allocation['mois'],
-                'date_allocation': datetime.now()
-            })
-            projet['date_modification'] = datetime.now()
-            projet['updated_by'] = 'William'
-
-    return True, "Allocation réalisée avec succès"
-
-def calculer_velocite_projet(projet):
-    """Calcule la vélocité mensuelle d'un projet"""
-    if not projet.get('suivi_mensuel'):
-        return 0
-
-    suivis = projet['suivi_mensuel']
-    if len(suivis) < 2:
-        return 0
-
-    # Prendre les 3 derniers mois pour la vélocité
-    recent_suivis = sorted(suivis, key=lambda x: x['mois'])[-3:]
-    velocites = []
-
-    for suivi in recent_suivis:
-        velocites.append(suivi['reel'])
-
-    return sum(velocites) / len(velocites) if velocites else 0
-
-def calculer_probabilite_reussite(projet):
-    """Calcule la probabilité de réussite d'un projet"""
-    # Facteurs de calcul
-    progression = (projet['montant_utilise_reel'] / projet['montant_total']) * 100 if projet['montant_total'] > 0 else 0
-    jours_restants = (projet['echeance'] - date.today()).days
-    velocite = calculer_velocite_projet(projet)
-
-    # Score basé sur différents critères
-    score = 50  # Score de base
-
-    # Bonus progression
-    if progression > 75:
-        score += 20
-    elif progression > 50:
-        score += 10
-    elif progression < 10:
-        score -= 20
-
-    # Bonus temps
-    if jours_restants > 90:
-        score += 15
-    elif jours_restants < 30:
-        score -= 25
-
-    # Bonus vélocité
-    if velocite > projet['budget_alloue_mensuel'] * 0.8:
-        score += 15
-    elif velocite < projet['budget_alloue_mensuel'] * 0.3:
-        score -= 15
-
-    return max(0, min(100, score))
+    """Alloue un revenu à plusieurs projets avec validation (refusé si une autre session les a modifiés)"""
+    return _enregistrer_resultat(*obtenir_plan().allouer_revenu(revenu_id, allocations_list, obtenir_utilisateur()))
+
+def allouer_revenus_aux_projets_en_lot(lots):
+    """Alloue plusieurs revenus en une seule transaction (une seule invalidation du cache)"""
+    return _enregistrer_resultat(*obtenir_plan().allouer_revenus_en_lot(lots, obtenir_utilisateur()))
+
+def allouer_revenus_automatiquement(mois):
+    """Répartit les revenus du mois selon priorité, échéance et probabilité de réussite ; retourne (succes, message, bilan)"""
+    lots, bilan = obtenir_plan().proposer_allocations(mois)
+    if not lots:
+        return False, "Aucun revenu disponible ou aucun projet à financer ce mois", bilan
+    return (*allouer_revenus_aux_projets_en_lot(lots), bilan)
+
+def enregistrer_suivi_mensuel(projet_id, mois, prevu, reel):
+    """Ajoute ou corrige le suivi d'un mois d'un projet (vélocité mise à jour en O(1))"""
+    return _enregistrer_resultat(
+        *obtenir_plan().enregistrer_suivi_mensuel(projet_id, mois, prevu, reel, obtenir_utilisateur())
+    )
+
+# ============================================================================
+# FRAGMENTS - RERUNS PARTIELS
+# ============================================================================
+
+# Sections réexécutées seules (fragments nommés) et données dont elles dépendent :
+# 'filtres' (filtres de date globaux) et 'donnees' (projets, revenus, allocations)
+DEPENDANCES_FRAGMENTS = {}
+
+def fragment(cle, dependances=()):
+    """Section réexécutée seule (st.fragment nommé `cle`) quand une de ses dépendances change"""
+    DEPENDANCES_FRAGMENTS[cle] = frozenset(dependances)
+
+    def decorateur(fonction):
+        mesuree = instrumenter(cle)(fonction)
+
+        @st.fragment(key=cle)
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            st.session_state.fragments_affiches[cle] = True
+            # Mesuré comme un rerun à part entière quand le fragment s'exécute seul
+            with st.session_state.instrumentation.rerun(fragment=cle):
+                return mesuree(*args, **kwargs)
+        return enveloppe
+    return decorateur
+
+def relancer_fragments(*dependances):
+    """Callback de widget : réexécute seulement les fragments affichés qui dépendent des données modifiées.
+
+    Sans fragment concerné, Streamlit réexécute le fragment du widget (ou toute
+    l'application pour un widget hors fragment).
+    """
+    st.session_state.instrumentation.nouvelle_interaction()
+    cles = [cle for cle in st.session_state.fragments_affiches if DEPENDANCES_FRAGMENTS[cle].intersection(dependances)]
+    if cles:
+        st.rerun(cles)
+
+def appliquer_filtres_date():
+    """Callback des filtres de date : seules les sections filtrées sont recalculées"""
+    st.session_state.filters_date = {'year': st.session_state.filter_year, 'month': st.session_state.filter_month}
+    relancer_fragments('filtres')
+
+def naviguer(page):
+    """Callback de navigation : la page est choisie avant le rerun complet (un seul rerun)"""
+    st.session_state.nav_radio = page
+    st.rerun()
 
 # ============================================================================
 # NOUVELLE SIDEBAR NAVIGATION (5 ONGLETS)
 # ============================================================================
 
+@instrumenter()
 def render_sidebar():
     """Affiche la sidebar avec navigation optimisée UX 2025"""
     with st.sidebar:
         st.markdown("### 💰 Plan Financier Familial")
         st.markdown("*Alix & William - Vers l'Indépendance 2030*")
 
+        choisir_utilisateur()
+
         # Navigation avec 5 onglets optimisés UX
         st.markdown("---")
         pages = [
@@ -469,76 +501,116 @@ def render_sidebar():
             label_visibility="collapsed"
         )
 
-        # Ajout des filtres globaux par date
-        st.markdown("### 📅 Filtre Global par Date")
-        
-        # Récupérer les années disponibles des projets
-        available_years = sorted(set([p['date_creation'].year for p in st.session_state.projets]))
-        
-        filter_year = st.selectbox(
-            "Année", 
-            ["Tous"] + available_years, 
-            index=0,
-            key="filter_year"
-        )
-        
-        filter_month = st.selectbox(
-            "Mois", 
-            ["Tous"] + [f"{i:02d}" for i in range(1, 13)], 
-            index=0,
-            key="filter_month"
-        )
-
-        st.session_state.filters_date = {'year': filter_year, 'month': filter_month}
-
-        # Calcul des KPIs avec filtrage
-        filtered_projets = filter_by_date(st.session_state.projets, 'projet')
-        kpis = calculer_kpis(filtered_projets)
-        phase = kpis['phase_actuelle']
-
-        # Calcul du total budget projet filtré
-        total_budget_filtre = sum(p['montant_total'] for p in filtered_projets)
-
-        st.markdown("---")
-        st.markdown(f"**🎯 Phase:** {phase}")
-        st.markdown(f"**💰 Revenus:** {format_currency(kpis['revenus_mensuels'])}")
-        st.markdown(f"**💼 Budget Total Filtré:** {format_currency(total_budget_filtre)}")
-        st.markdown(f"**📊 Cash Flow:** {format_currency(kpis['cash_flow_mensuel'])}")
+        afficher_filtres_date()
+        afficher_resume_sidebar()
 
         return selected_page
 
+@fragment('utilisateur')
+def choisir_utilisateur():
+    """Auteur des modifications de la session (created_by / updated_by), affiché nulle part ailleurs"""
+    st.selectbox(
+        "👤 Utilisateur",
+        st.session_state.admin_config['listes_config']['responsables'],
+        key="utilisateur",
+        on_change=relancer_fragments,
+        args=('utilisateur',)
+    )
+
+@fragment('filtres_date', dependances=('donnees',))
+def afficher_filtres_date():
+    """Filtres globaux par date : un changement ne relance que les sections filtrées"""
+    st.markdown("### 📅 Filtre Global par Date")
+    
+    # Récupérer les années disponibles des projets
+    available_years = sorted(set([p['date_creation'].year for p in st.session_state.projets]))
+    
+    filter_year = st.selectbox(
+        "Année", 
+        ["Tous"] + available_years, 
+        index=0,
+        key="filter_year",
+        on_change=appliquer_filtres_date
+    )
+    
+    filter_month = st.selectbox(
+        "Mois", 
+        ["Tous"] + [f"{i:02d}" for i in range(1, 13)], 
+        index=0,
+        key="filter_month",
+        on_change=appliquer_filtres_date
+    )
+
+    st.session_state.filters_date = {'year': filter_year, 'month': filter_month}
+
+@fragment('resume_sidebar', dependances=('filtres', 'donnees'))
+def afficher_resume_sidebar():
+    """Résumé de la sidebar : phase, revenus, budget filtré, fonds d'urgence et Baby Step"""
+    # Calcul des KPIs avec filtrage (partagé avec le tableau de bord)
+    filtered_projets, kpis = projets_filtres_et_kpis()
+    phase = kpis['phase_actuelle']
+
+    # Calcul du total budget projet filtré
+    total_budget_filtre = sum(p['montant_total'] for p in filtered_projets)
+
+    st.markdown("---")
+    st.markdown(f"**🎯 Phase:** {phase}")
+    st.markdown(f"**💰 Revenus:** {format_currency(kpis['revenus_mensuels'])}")
+    st.markdown(f"**💼 Budget Total Filtré:** {format_currency(total_budget_filtre)}")
+    st.markdown(f"**📊 Cash Flow:** {format_currency(kpis['cash_flow_mensuel'])}")
+    # Fonds d'urgence tenu à jour par le plan (aucun rejeu des allocations)
+    couverture = kpis['fonds_urgence_mois']
+    objectif = st.session_state.admin_config['kpis_config']['objectif_fonds_urgence']
+    st.markdown(f"**🛟 Fonds d'urgence:** {'∞' if couverture == float('inf') else f'{couverture:.1f}'} / {objectif} mois")
+    st.markdown(f"**👣 Baby Step {kpis['baby_step_actuel']}/7:** {BABY_STEPS[kpis['baby_step_actuel'] - 1]}")
+
 # ============================================================================
 # 1. TABLEAU DE BORD - HUB CENTRAL UNIFIÉ (Fonction complète simplifiée pour l'espace)
 # ============================================================================
 
+@instrumenter()
 def show_tableau_de_bord():
     """Hub central unifié - Dashboard + KPIs + Actions rapides"""
     st.title("🏠 Tableau de Bord Central")
 
     # Actions rapides en haut
+    afficher_actions_rapides()
+
+    # KPIs principaux avec filtrage (déjà calculés par la sidebar)
+    afficher_kpis_essentiels()
+
+    afficher_suivi_du_mois()
+
+def ouvrir_ajout_rapide(drapeau):
+    """Callback des actions rapides d'ajout : lève seulement le drapeau du formulaire.
+
+    Aucune donnée n'est modifiée (ni version, ni sauvegarde) : c'est l'ajout
+    lui-même (ajouter_item) qui les met à jour. Seul le fragment du bouton est
+    réexécuté.
+    """
+    st.session_state[drapeau] = True
+
+@fragment('actions_rapides')
+def afficher_actions_rapides():
+    """Actions rapides : callbacks exécutés avant le rerun (plus de second st.rerun())"""
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        if st.button("➕ Nouveau Projet", type="primary"):
-            st.session_state.show_quick_add_project = True
+        st.button("➕ Nouveau Projet", type="primary", on_click=ouvrir_ajout_rapide, args=('show_quick_add_project',))
 
     with col2:
-        if st.button("💰 Ajouter Revenu"):
-            st.session_state.show_quick_add_revenue = True
+        st.button("💰 Ajouter Revenu", on_click=ouvrir_ajout_rapide, args=('show_quick_add_revenue',))
 
     with col3:
-        if st.button("📊 Voir Analytics"):
-            st.session_state.nav_radio = "📊 Analytics"
-            st.rerun()
+        st.button("📊 Voir Analytics", on_click=naviguer, args=("📊 Analytics",))
 
     with col4:
-        if st.button("🎯 Voir Objectifs"):
-            st.session_state.nav_radio = "🎯 Vision & Objectifs"
-            st.rerun()
+        st.button("🎯 Voir Objectifs", on_click=naviguer, args=("🎯 Vision & Objectifs",))
 
-    # KPIs principaux avec filtrage
-    filtered_projets = filter_by_date(st.session_state.projets, 'projet')
-    kpis = calculer_kpis(filtered_projets)
+@fragment('kpis', dependances=('filtres', 'donnees'))
+def afficher_kpis_essentiels():
+    """Ligne des KPIs essentiels sur les projets filtrés"""
+    filtered_projets, kpis = projets_filtres_et_kpis()
     
     st.markdown("### 📈 KPIs Essentiels")
 
@@ -574,12 +646,326 @@ def show_tableau_de_bord():
             delta=f"Baby Step {kpis['baby_step_actuel']}/7"
         )
 
+def repartir_revenus_du_mois(mois):
+    """Callback du bouton de répartition : le résultat s'affiche dans les sections relancées"""
+    succes, message, bilan = allouer_revenus_automatiquement(mois)
+    if succes:
+        message = (f"{message} : {format_currency(bilan['montant_reparti'])} sur "
+                   f"{bilan['projets_finances']} projet(s), +{bilan['gain_probabilite']} points de probabilité")
+    st.session_state.resultat_repartition = (succes, message)
+    relancer_fragments('donnees')
+
+@fragment('suivi_mois', dependances=('filtres', 'donnees'))
+def afficher_suivi_du_mois():
+    """Suivi du mois filtré (mois courant par défaut), lu dans les agrégats mensuels"""
+    import pandas as pd
+
+    filtres = st.session_state.filters_date
+    if filtres['year'] != "Tous" and filtres['month'] != "Tous":
+        mois = f"{filtres['year']}-{filtres['month']}"
+    else:
+        mois = date.today().strftime('%Y-%m')
+    st.markdown(f"### 📅 Suivi du mois {mois}")
+    st.button("🤖 Répartir les revenus du mois", help="Selon la priorité, l'échéance et la probabilité de réussite des projets",
+              on_click=repartir_revenus_du_mois, args=(mois,))
+    resultat = st.session_state.pop('resultat_repartition', None)
+    if resultat:
+        succes, message = resultat
+        if succes:
+            st.success(message)
+        else:
+            st.warning(message)
+
+    agregats = obtenir_agregats()
+    totaux = agregats.totaux(mois)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("📋 Prévu", format_currency(totaux['prevu']))
+    col2.metric("✅ Réel", format_currency(totaux['reel']), delta=format_currency(totaux['reel'] - totaux['prevu']))
+    col3.metric("💰 Alloué", format_currency(totaux['alloue']), delta=f"{totaux['nb_allocations']} allocation(s)", delta_color="off")
+
+    par_type = agregats.totaux(mois, 'type')
+    if par_type:
+        st.dataframe(pd.DataFrame.from_dict(par_type, orient='index').rename(columns={
+            'prevu': "Prévu", 'reel': "Réel", 'alloue': "Alloué", 'nb_allocations': "Allocations"
+        }))
+    par_revenu = agregats.allocations_par_revenu(mois)
+    if par_revenu:
+        index_revenus = obtenir_index_ids('revenu')
+        st.caption(" · ".join(
+            f"{(index_revenus.obtenir(revenu_id) or {}).get('nom', revenu_id)} : {format_currency(montant)}"
+            for revenu_id, montant in par_revenu.items()
+        ))
+
+# ============================================================================
+# 3. ANALYTICS - GRAPHIQUES AGRÉGÉS
+# ============================================================================
+
+@instrumenter()
+def show_analytics():
+    """Analytics : suivi prévu/réel, flux et répartition des allocations"""
+    st.title("📊 Analytics")
+    afficher_figures_analytics()
+
+@fragment('analytics', dependances=('filtres', 'donnees'))
+def afficher_figures_analytics():
+    """Figures des projets filtrés, mémorisées par (version des données, filtres de date)"""
+    from plan_financier.analytics import construire_figures
+
+    filtres = st.session_state.filters_date
+    cle = ('analytics', obtenir_plan().version, (filtres['year'], filtres['month']))
+    filtered_projets, _ = projets_filtres_et_kpis()
+    figures = obtenir_plan().cache.obtenir(cle, lambda: construire_figures(
+        filtered_projets, obtenir_plan().grand_livre, st.session_state.revenus_variables
+    ))
+
+    st.plotly_chart(figures['prevu_reel'])
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(figures['allocations_cumulees'])
+    with col2:
+        st.plotly_chart(figures['repartition_types'])
+    st.plotly_chart(figures['flux_allocations'])
+
+# ============================================================================
+# 4. VISION & OBJECTIFS - PROJECTION 2030
+# ============================================================================
+
+LIBELLES_OBJECTIFS = {
+    'objectif_cash_flow': ("💸 Cash flow mensuel", lambda v: f"≥ {format_currency(v)}"),
+    'objectif_ratio_actifs': ("⚖️ Ratio actifs", lambda v: f"≥ {v}%"),
+    'objectif_revenus_passifs': ("💰 Revenus passifs", lambda v: f"≥ {v}%"),
+    'objectif_fonds_urgence': ("🛟 Fonds d'urgence", lambda v: f"≥ {v} mois")
+}
+
+@instrumenter()
+def show_vision_objectifs():
+    """Vision 2030 : projection Monte Carlo des phases financières et des objectifs"""
+    import pandas as pd
+    import plotly.graph_objects as go
+    from plan_financier.scenarios import executer_scenarios, grille_scenarios
+    from plan_financier.simulation import PHASES, simuler_trajectoires
+
+    st.title("🎯 Vision & Objectifs")
+
+    kpis_config = st.session_state.admin_config['kpis_config']
+    cle = ('simulation', obtenir_plan().version, tuple(sorted(kpis_config.items())))
+    resultat = obtenir_plan().cache.obtenir(cle, lambda: simuler_trajectoires(
+        st.session_state.projets, st.session_state.revenus_variables, kpis_config, seed=GRAINE_SIMULATION
+    ))
+    mois = resultat['mois']
+
+    st.markdown(f"### 🔮 Projection {mois[0]} → {mois[-1]}")
+    st.caption(f"{resultat['n_chemins']:,} scénarios : revenus irréguliers et rendement des actifs aléatoires".replace(",", " "))
+
+    cols = st.columns(len(PHASES))
+    for col, phase in zip(cols, PHASES):
+        stats = resultat['phases'][phase]
+        col.metric(
+            f"Phase {phase}",
+            f"{stats['proba_atteinte']:.0%}",
+            delta=f"Médiane : {stats['mois_median'] or 'au-delà de ' + mois[-1]}",
+            delta_color="off"
+        )
+
+    st.markdown(f"### 🎯 Objectifs atteints en {mois[-1]}")
+    cols = st.columns(len(LIBELLES_OBJECTIFS))
+    for col, (cle_objectif, (libelle, cible)) in zip(cols, LIBELLES_OBJECTIFS.items()):
+        col.metric(libelle, f"{resultat['objectifs'][cle_objectif]:.0%}", delta=cible(kpis_config[cle_objectif]), delta_color="off")
+
+    # Éventail du cash flow mensuel (P10 - P90 et médiane)
+    p10, p50, p90 = resultat['percentiles']['cash_flow']
+    fig = go.Figure([
+        go.Scatter(x=mois, y=p90, line=dict(width=0), showlegend=False, hoverinfo='skip'),
+        go.Scatter(x=mois, y=p10, line=dict(width=0), fill='tonexty', fillcolor='rgba(0,123,255,0.2)', name='P10 - P90'),
+        go.Scatter(x=mois, y=p50, line=dict(color='#007bff'), name='Médiane')
+    ])
+    fig.add_hline(y=kpis_config['objectif_cash_flow'], line_dash='dash', line_color='#00aa00', annotation_text='Objectif')
+    fig.update_layout(title="Cash flow mensuel projeté (FCFA)", height=400, margin=dict(t=40, b=20))
+    st.plotly_chart(fig)
+
+    # Scénarios what-if : variations de budget et d'échéance, classées par objectifs atteints
+    st.markdown("### 🧪 Scénarios what-if")
+    col1, col2 = st.columns(2)
+    with col1:
+        facteurs = st.multiselect("Budgets mensuels (x)", [0.5, 0.8, 0.9, 1.0, 1.1, 1.2, 1.5], default=[0.8, 1.0, 1.2])
+    with col2:
+        reports = st.multiselect("Report des échéances (mois)", [-3, 0, 3, 6, 12], default=[0, 3, 6])
+    if facteurs and reports:
+        cle = ('scenarios', obtenir_plan().version, tuple(sorted(kpis_config.items())),
+               tuple(facteurs), tuple(reports))
+        resultats = obtenir_plan().cache.obtenir(cle, lambda: executer_scenarios(
+            obtenir_table_projets(), st.session_state.revenus_variables, kpis_config,
+            grille_scenarios(facteurs_budget=facteurs, reports_mois=reports)
+        ))
+        st.dataframe(
+            pd.DataFrame(resultats).set_index('rang')[[
+                'scenario', 'objectifs_atteints', 'score', 'cash_flow_mensuel',
+                'revenus_passifs_pct', 'probabilite_moyenne', 'projets_a_risque', 'phase_actuelle'
+            ]],
+            column_config={
+                'scenario': "Scénario", 'objectifs_atteints': "Objectifs atteints", 'score': "Score",
+                'cash_flow_mensuel': "Cash flow", 'revenus_passifs_pct': "Revenus passifs (%)",
+                'probabilite_moyenne': "Réussite moyenne (%)", 'projets_a_risque': "Projets à risque",
+                'phase_actuelle': "Phase"
+            }
+        )
+
+# ============================================================================
+# 5. PARAMÈTRES - CONFIGURATION ET EXPORT
+# ============================================================================
+
+@instrumenter()
+def show_parametres():
+    """Configuration, administration et export des données"""
+    from plan_financier.export_excel import exporter_plan_excel
+
+    st.title("⚙️ Paramètres")
+    st.info("Cette section contiendra toute la configuration et administration.")
+
+    # Export Excel : le classeur n'est construit qu'au clic (téléchargement différé)
+    st.markdown("### 📥 Export Excel")
+    projets = st.session_state.projets
+    revenus = st.session_state.revenus_variables
+    grand_livre = obtenir_plan().grand_livre
+    st.download_button(
+        "⬇️ Télécharger le plan (Excel)",
+        data=lambda: exporter_plan_excel(projets, revenus, grand_livre)[0],
+        file_name=f"plan_financier_{date.today():%Y%m%d}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    st.caption("Feuilles : Projets, Revenus, Suivi mensuel, Allocations reçues")
+
+    afficher_sauvegarde_json(projets, revenus, grand_livre)
+
+    if PLANIFICATEUR_ACTIF:
+        st.markdown("### 🗓️ Revenus réguliers")
+        passages = list(demarrer_planificateur().passages)
+        if passages:
+            dernier = passages[-1]
+            st.caption(f"Dernier passage du planificateur : {dernier['date']:%d/%m/%Y %H:%M}, "
+                       f"{dernier['allocations']} allocation(s) postée(s)")
+            if dernier['erreur']:
+                st.warning(dernier['erreur'])
+
+    # Panneau caché : ajouter ?debug=1 à l'URL
+    if st.query_params.get('debug') == '1':
+        afficher_instrumentation()
+
+def afficher_sauvegarde_json(projets, revenus, grand_livre):
+    """Sauvegarde JSON Lines du plan et restauration en flux depuis un fichier JSON ou JSONL"""
+    import io
+
+    from plan_financier.sauvegarde import charger_sauvegarde, ecrire_jsonl
+
+    st.markdown("### 💾 Sauvegarde et restauration")
+    admin_config = st.session_state.admin_config
+
+    def generer_sauvegarde():
+        sortie = io.StringIO()
+        ecrire_jsonl(sortie, projets, revenus, admin_config, grand_livre)
+        return sortie.getvalue().encode('utf-8')
+
+    st.download_button(
+        "⬇️ Télécharger la sauvegarde (JSON Lines)",
+        data=generer_sauvegarde,
+        file_name=f"plan_financier_{date.today():%Y%m%d}.jsonl",
+        mime="application/x-ndjson"
+    )
+
+    fichier = st.file_uploader("Restaurer une sauvegarde", type=['jsonl', 'json'])
+    if fichier is not None and st.button("♻️ Restaurer (remplace le plan actuel)"):
+        format_fichier = 'json' if fichier.name.endswith('.json') else 'jsonl'
+        try:
+            projets_restaures, revenus_restaures, config_restauree, grand_livre_restaure = charger_sauvegarde(
+                io.TextIOWrapper(fichier, encoding='utf-8'), format_fichier
+            )
+        except (ValueError, UnicodeDecodeError) as erreur:
+            st.error(f"❌ Restauration impossible : {erreur}")
+        else:
+            restaurer_plan(projets_restaures, revenus_restaures, config_restauree, grand_livre_restaure)
+            st.success(f"✅ {len(projets_restaures)} projets et {len(revenus_restaures)} revenus restaurés")
+
+def afficher_instrumentation():
+    """Mesures des derniers reruns et profil cProfile à la demande"""
+    import pandas as pd
+
+    enregistreur = st.session_state.instrumentation
+    with st.expander("🔬 Instrumentation des reruns"):
+        enregistreur.actif = st.checkbox("Mesurer les reruns", value=enregistreur.actif)
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🧭 Profiler le prochain rerun"):
+                enregistreur.profiler_prochain_rerun()
+        with col2:
+            if st.button("🧹 Vider les mesures"):
+                enregistreur.vider()
+
+        reruns = list(enregistreur.reruns)
+        if reruns:
+            st.markdown(f"**{len(reruns)} derniers reruns**")
+            st.dataframe(pd.DataFrame([
+                {'Date': rerun['date'], 'Durée (ms)': rerun['duree'] * 1e3,
+                 'Rerun': rerun['fragment'] or "complet", 'Page': rerun['infos'].get('page')}
+                for rerun in reversed(reruns)
+            ]))
+            dernier = reruns[-1]
+            st.markdown(f"**Dernier rerun : {dernier['duree'] * 1e3:.1f} ms**")
+            st.dataframe(pd.DataFrame([
+                {'Fonction': nom, 'Temps (ms)': mesure['temps'] * 1e3, 'Appels': mesure['appels'], 'Éléments': mesure['items']}
+                for nom, mesure in sorted(dernier['mesures'].items(), key=lambda item: -item[1]['temps'])
+            ]))
+
+        # Interactions servies par des fragments : temps économisé sur un rerun complet
+        interactions = [interaction for interaction in enregistreur.interactions() if interaction['economie'] is not None]
+        if interactions:
+            economie = sum(interaction['economie'] for interaction in interactions)
+            st.markdown(f"**{len(interactions)} interactions partielles : {economie * 1e3:.1f} ms économisés**")
+            st.dataframe(pd.DataFrame([
+                {'Date': interaction['date'], 'Fragments': ", ".join(interaction['fragments']),
+                 'Durée (ms)': interaction['duree'] * 1e3, 'Rerun complet (ms)': interaction['duree_complete'] * 1e3,
+                 'Économie (ms)': interaction['economie'] * 1e3}
+                for interaction in reversed(interactions)
+            ]))
+
+        profil = enregistreur.dernier_profil
+        if profil:
+            st.markdown(f"**Profil du {profil['date']:%d/%m/%Y %H:%M:%S}**")
+            st.code(profil['texte'])
+            st.download_button(
+                "⬇️ Télécharger le profil (.pstats)",
+                data=profil['pstats'],
+                file_name=f"rerun_{profil['date']:%Y%m%d_%H%M%S}.pstats",
+                mime="application/octet-stream"
+            )
+
 # ============================================================================
 # MAIN - FONCTION PRINCIPALE
 # ============================================================================
 
 def main():
     """Fonction principale avec navigation optimisée"""
+    # Configuration de la page (première commande Streamlit du rerun)
+    st.set_page_config(
+        page_title="Plan Financier Familial",
+        page_icon="💰",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # Instrumentation des reruns (inactive par défaut, panneau caché dans Paramètres)
+    if 'instrumentation' not in st.session_state:
+        st.session_state.instrumentation = Enregistreur()
+    with st.session_state.instrumentation.rerun():
+        afficher_application()
+
+    if PLANIFICATEUR_ACTIF:
+        demarrer_planificateur()
+
+def afficher_application():
+    """Exécute un rerun complet : initialisation, sidebar et page sélectionnée"""
+    # Fragments de ce rerun dans l'ordre d'affichage, seuls à pouvoir être relancés par relancer_fragments
+    st.session_state.fragments_affiches = {}
+
     # Chargement CSS
     load_css()
 
@@ -588,6 +974,7 @@ def main():
 
     # Sidebar navigation optimisée
     selected_page = render_sidebar()
+    noter('page', selected_page)
 
     # Routing optimisé vers 5 pages principales
     if selected_page == "🏠 Tableau de Bord":
@@ -596,14 +983,11 @@ def main():
         st.title("💼 Projets & Revenus - En construction")
         st.info("Cette section sera implémentée avec toutes les fonctionnalités de gestion de projets et revenus.")
     elif selected_page == "📊 Analytics":
-        st.title("📊 Analytics - En construction")
-        st.info("Cette section contiendra tous les analytics et graphiques avancés.")
+        show_analytics()
     elif selected_page == "🎯 Vision & Objectifs":
-        st.title("🎯 Vision & Objectifs - En construction")
-        st.info("Cette section contiendra la vision 2030 et les Baby Steps.")
+        show_vision_objectifs()
     elif selected_page == "⚙️ Paramètres":
-        st.title("⚙️ Paramètres - En construction")
-        st.info("Cette section contiendra toute la configuration et administration.")
+        show_parametres()
 
 if __name__ == "__main__":
     main()
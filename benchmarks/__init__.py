@@ -0,0 +1 @@
+"""Benchmarks du Plan Financier Familial (exécution : python -m benchmarks.<module>)"""
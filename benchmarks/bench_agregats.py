@@ -0,0 +1,84 @@
+"""Benchmark : requêtes mensuelles sur agrégats matérialisés vs parcours des listes imbriquées"""
+
+import random
+
+from benchmarks.donnees import generer_historique, generer_projets
+from benchmarks.outils import chronometrer
+from plan_financier.agregats import AgregatsMensuels
+from plan_financier.allocations import allouer_revenu
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.index_ids import IndexIds
+from plan_financier.suivi import SuiviMensuel
+
+TAILLES = (1_000, 10_000, 50_000)
+MOIS = '2024-06'
+
+
+def totaux_par_parcours(projets, grand_livre, mois):
+    """Référence : prévu, réel et alloué d'un mois par types, en relisant tout l'historique"""
+    totaux = {}
+    types = {}
+    for projet in projets:
+        types[projet['id']] = projet['type']
+        cumul = totaux.setdefault(projet['type'], {'prevu': 0, 'reel': 0, 'alloue': 0, 'nb_allocations': 0})
+        for suivi in projet['suivi_mensuel']:
+            if suivi['mois'] == mois:
+                cumul['prevu'] += suivi['prevu']
+                cumul['reel'] += suivi['reel']
+    for projet_id, _, montant, mois_allocation in grand_livre.allocations():
+        if mois_allocation == mois:
+            cumul = totaux[types[projet_id]]
+            cumul['alloue'] += montant
+            cumul['nb_allocations'] += 1
+    return totaux
+
+
+def _mutations(projets, grand_livre, agregats, seed=0):
+    """Saisies de suivi et allocations appliquées avec mise à jour incrémentale"""
+    rng = random.Random(seed)
+    index_projets = IndexIds.depuis_items(projets)
+    revenu = {'id': 99, 'nom': 'Revenu test', 'montant_mensuel': 10 ** 12, 'allocations': []}
+    index_revenus = IndexIds.depuis_items([revenu])
+    for _ in range(2_000):
+        projet = rng.choice(projets)
+        mois = f"2024-{rng.randrange(1, 13):02d}"
+        if rng.random() < 0.5:
+            suivis = projet['suivi_mensuel']
+            ancien = suivis.obtenir(mois)
+            ancien = (ancien['prevu'], ancien['reel']) if ancien else None
+            prevu, reel = rng.randrange(0, 500_000, 1000), rng.randrange(0, 500_000, 1000)
+            suivis.enregistrer(mois, prevu, reel)
+            agregats.enregistrer_suivi(projet, mois, ancien, prevu, reel)
+        else:
+            lot = [{'projet_id': projet['id'], 'montant': rng.randrange(1000, 100_000, 1000), 'mois': mois}]
+            succes, _ = allouer_revenu(index_revenus, index_projets, 99, lot, grand_livre, agregats=agregats)
+            assert succes
+
+
+def main():
+    print(f"{'projets':>8} {'construction (ms)':>18} {'parcours (ms)':>14} {'agrégats (ms)':>14} {'gain':>8}")
+    for n in TAILLES:
+        projets = generer_historique(generer_projets(n, seed=1), n_mois=24, seed=1)
+        for projet in projets:
+            projet['suivi_mensuel'] = SuiviMensuel(projet['suivi_mensuel'])
+        grand_livre = GrandLivre.depuis_projets(projets)
+        duree_construction, agregats = chronometrer(AgregatsMensuels.depuis_projets, projets, grand_livre,
+                                                    repetitions=1)
+
+        # Après des mutations incrémentales, les agrégats égalent une reconstruction et le parcours
+        _mutations(projets, grand_livre, agregats)
+        reconstruits = AgregatsMensuels.depuis_projets(projets, grand_livre)
+        for mois in reconstruits.mois():
+            assert agregats.totaux(mois, 'type') == reconstruits.totaux(mois, 'type')
+            assert agregats.allocations_par_revenu(mois) == reconstruits.allocations_par_revenu(mois)
+        reference = totaux_par_parcours(projets, grand_livre, MOIS)
+        assert {t: v for t, v in reference.items() if any(v.values())} == agregats.totaux(MOIS, 'type')
+
+        duree_parcours, _ = chronometrer(totaux_par_parcours, projets, grand_livre, MOIS, repetitions=3)
+        duree_agregats, _ = chronometrer(agregats.totaux, MOIS, 'type', repetitions=50)
+        print(f"{n:>8} {duree_construction * 1e3:>18.1f} {duree_parcours * 1e3:>14.2f} "
+              f"{duree_agregats * 1e3:>14.4f} {duree_parcours / duree_agregats:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
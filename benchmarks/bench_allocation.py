@@ -0,0 +1,82 @@
+"""Benchmark : allocation avec index id -> grand livre contre les recherches linéaires et listes imbriquées"""
+
+from datetime import datetime
+
+from benchmarks.donnees import generer_projets, generer_revenus
+from benchmarks.outils import chronometrer
+from plan_financier.allocations import allouer_revenu, allouer_revenus_en_lot
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.index_ids import IndexIds
+
+N_PROJETS = 10_000
+LIGNES = (10, 100, 500)
+N_REVENUS_LOT = 50
+LIGNES_PAR_REVENU = 200
+
+
+def allouer_boucle(revenus, projets, revenu_id, allocations_list):
+    """Version historique : une recherche linéaire du revenu puis une par ligne d'allocation"""
+    revenu = next((r for r in revenus if r['id'] == revenu_id), None)
+    if not revenu:
+        return False, "Revenu introuvable"
+    total_alloue = sum(alloc['montant'] for alloc in allocations_list)
+    if total_alloue > revenu['montant_mensuel']:
+        return False, "Total alloué dépasse le revenu disponible"
+    revenu['allocations'] = allocations_list
+    revenu['date_modification'] = datetime.now()
+    revenu['updated_by'] = 'William'
+    for allocation in allocations_list:
+        projet = next((p for p in projets if p['id'] == allocation['projet_id']), None)
+        if projet:
+            projet['allocations_recues'].append({
+                'revenu_id': revenu_id,
+                'revenu_nom': revenu['nom'],
+                'montant': allocation['montant'],
+                'mois': allocation['mois'],
+                'date_allocation': datetime.now()
+            })
+            projet['date_modification'] = datetime.now()
+            projet['updated_by'] = 'William'
+    return True, "Allocation réalisée avec succès"
+
+
+def main():
+    projets = generer_projets(N_PROJETS)
+    revenus = generer_revenus(50)
+    revenu = revenus[-1]
+    revenu['montant_mensuel'] = 10 ** 12
+    index_projets = IndexIds.depuis_items(projets)
+    index_revenus = IndexIds.depuis_items(revenus)
+
+    print(f"{'lignes':>8} {'boucle (ms)':>12} {'index (ms)':>11} {'gain':>7}")
+    for k in LIGNES:
+        pas = N_PROJETS // k
+        allocations = [{'projet_id': projets[i * pas + pas - 1]['id'], 'montant': 1000, 'mois': '2025-03'}
+                       for i in range(k)]
+        t_boucle, _ = chronometrer(allouer_boucle, revenus, projets, revenu['id'], allocations, repetitions=3)
+        # Grand livre neuf à chaque mesure : une allocation relancée n'écrirait plus rien
+        t_index, resultat = chronometrer(lambda: allouer_revenu(index_revenus, index_projets, revenu['id'],
+                                                                allocations, GrandLivre()), repetitions=3)
+        assert resultat[0]
+        print(f"{k:>8} {t_boucle * 1e3:>12.2f} {t_index * 1e3:>11.3f} {t_boucle / t_index:>6.0f}x")
+
+    # Répartition de fin de mois : un appel par revenu contre un lot unique
+    lots = [(r['id'], [{'projet_id': projets[(i * LIGNES_PAR_REVENU + j) % N_PROJETS]['id'],
+                        'montant': 1, 'mois': '2025-03'} for j in range(LIGNES_PAR_REVENU)])
+            for i, r in enumerate(revenus[:N_REVENUS_LOT])]
+
+    def appels_unitaires():
+        grand_livre = GrandLivre()
+        for revenu_id, allocations in lots:
+            allouer_revenu(index_revenus, index_projets, revenu_id, allocations, grand_livre)
+
+    t_unitaires, _ = chronometrer(appels_unitaires, repetitions=3)
+    t_lot, resultat = chronometrer(lambda: allouer_revenus_en_lot(index_revenus, index_projets, lots, GrandLivre()),
+                                   repetitions=3)
+    assert resultat[0]
+    print(f"\n{N_REVENUS_LOT} revenus x {LIGNES_PAR_REVENU} lignes : "
+          f"appels unitaires {t_unitaires * 1e3:.2f} ms, lot {t_lot * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
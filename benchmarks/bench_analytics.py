@@ -0,0 +1,56 @@
+"""Benchmark : construction des figures Analytics, taille du JSON et réduction LTTB"""
+
+import random
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from benchmarks.donnees import generer_historique, generer_projets
+from benchmarks.outils import chronometrer
+from plan_financier.analytics import construire_cadres, construire_figures, lttb
+from plan_financier.grand_livre import GrandLivre
+
+TAILLES = (1_000, 10_000, 50_000)
+SANS_REDUCTION = 10 ** 9
+
+
+def _dater_allocations(projets, seed=0):
+    """Horodatages distincts, comme des allocations saisies au fil de l'eau"""
+    rng = random.Random(seed)
+    for projet in projets:
+        for allocation in projet['allocations_recues']:
+            allocation['date_allocation'] = projet['date_creation'] + timedelta(seconds=rng.randrange(86_400 * 365))
+
+
+def _taille_json(figures):
+    return sum(len(figure.to_json()) for figure in figures.values())
+
+
+def main():
+    # LTTB : extrémités conservées, indices croissants, pic conservé
+    x = np.arange(100_000, dtype=np.float64)
+    y = np.sin(x / 500)
+    y[54_321] = 10
+    indices = lttb(x, y, 500)
+    assert indices[0] == 0 and indices[-1] == len(x) - 1 and np.all(np.diff(indices) > 0)
+    assert 54_321 in indices
+
+    print(f"{'projets':>8} {'cadres (ms)':>12} {'figures (ms)':>13} {'JSON brut (ko)':>15} "
+          f"{'JSON réduit (ko)':>17} {'sérialisation (ms)':>19}")
+    for n in TAILLES:
+        projets = generer_historique(generer_projets(n, seed=1), n_mois=36, seed=1)
+        _dater_allocations(projets)
+        grand_livre = GrandLivre.depuis_projets(projets)
+        duree_cadres, _ = chronometrer(construire_cadres, projets, grand_livre, repetitions=3)
+        duree_figures, figures = chronometrer(construire_figures, projets, grand_livre, repetitions=3)
+        brutes = construire_figures(projets, grand_livre, n_points=SANS_REDUCTION)
+        debut = time.perf_counter()
+        taille_reduite = _taille_json(figures)
+        duree_json = time.perf_counter() - debut
+        print(f"{n:>8} {duree_cadres * 1e3:>12.1f} {duree_figures * 1e3:>13.1f} "
+              f"{_taille_json(brutes) / 1024:>15.1f} {taille_reduite / 1024:>17.1f} {duree_json * 1e3:>19.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark : synchronisation entre sessions (journal des modifications) comparée au rechargement complet"""
+
+import os
+import tempfile
+from datetime import datetime
+
+from benchmarks.donnees import LISTES_CONFIG, generer_plan
+from benchmarks.outils import chronometrer
+from plan_financier.modeles import en_enregistrements
+from plan_financier.moteur import PlanFinancier
+from plan_financier.stockage import ConflitModification, StockagePlan
+
+N_PROJETS = 100_000
+N_ALLOCATIONS = 20
+# Mois sans allocation dans l'historique généré : la répartition postée n'en contrepasse aucune
+MOIS = '2030-01'
+
+
+def ouvrir_session(chemin):
+    """Nouvelle session : chargement de la base et moteur avec ses index construits"""
+    stockage = StockagePlan(chemin)
+    projets, revenus, admin_config, grand_livre = stockage.charger_plan()
+    plan = PlanFinancier(en_enregistrements(projets, 'projet'), en_enregistrements(revenus, 'revenu'), admin_config,
+                         grand_livre=grand_livre)
+    plan.calculer_kpis()
+    plan.obtenir_agregats()
+    plan.obtenir_index_dates('projet')
+    return stockage, plan
+
+
+def allouer(stockage, plan, revenu_id, projet_ids, utilisateur):
+    allocations = [{'projet_id': projet_id, 'montant': 1000, 'mois': MOIS} for projet_id in projet_ids]
+    succes, message = plan.allouer_revenu(revenu_id, allocations, utilisateur)
+    assert succes, message
+    return stockage.sauvegarder_plan(plan.projets, plan.revenus_variables, plan.admin_config, utilisateur,
+                                     plan.grand_livre)
+
+
+def synchroniser(stockage, plan):
+    assert stockage.modifie_par_autre_session()
+    changements, admin_config = stockage.modifications_distantes()
+    plan.appliquer_modifications(
+        {'projet': changements['projets'], 'revenu': changements['revenus_variables']}, admin_config,
+        changements['grand_livre']
+    )
+    return plan.calculer_kpis()
+
+
+def main():
+    projets, revenus = generer_plan(N_PROJETS, n_revenus=20, n_mois=6, allocations_par_projet=2, compact=True)
+    for revenu in revenus:
+        revenu['montant_mensuel'] = 10 ** 12
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'plan.db')
+        initial = StockagePlan(chemin)
+        plan = PlanFinancier(projets, revenus, {'listes_config': LISTES_CONFIG})
+        initial.sauvegarder_plan(projets, revenus, plan.admin_config, 'Alix', plan.grand_livre)
+        initial.fermer()
+        stockage_a, plan_a = ouvrir_session(chemin)
+        stockage_b, plan_b = ouvrir_session(chemin)
+
+        pas = N_PROJETS // N_ALLOCATIONS
+        cibles = [projet['id'] for projet in plan_a.projets[::pas]]
+        t_ecriture, ecrits = chronometrer(allouer, stockage_a, plan_a, 1, cibles, 'Alix', repetitions=1)
+        t_sync, kpis = chronometrer(synchroniser, stockage_b, plan_b, repetitions=1)
+        t_recharge, (_, reference) = chronometrer(ouvrir_session, chemin, repetitions=1)
+        assert kpis == reference.calculer_kpis() == plan_a.calculer_kpis()
+        assert plan_b.grand_livre.soldes() == reference.grand_livre.soldes() == plan_a.grand_livre.soldes()
+
+        # Allocations concurrentes d'un même revenu : B n'a pas relu la règle écrite par A
+        allouer(stockage_a, plan_a, 2, cibles[:1], 'Alix')
+        try:
+            allouer(stockage_b, plan_b, 2, cibles[1:2], 'William')
+            conflit = None
+        except ConflitModification as erreur:
+            conflit = erreur
+        assert conflit is not None and conflit.conflits[0][2] == 'Alix'
+
+        print(f"{N_PROJETS} projets, allocation de {N_ALLOCATIONS} projets par une autre session")
+        print(f"  écriture conditionnelle ({ecrits} lignes) : {t_ecriture * 1e3:8.1f} ms")
+        print(f"  synchronisation + KPIs (journal)  : {t_sync * 1e3:8.1f} ms")
+        print(f"  rechargement complet + KPIs       : {t_recharge * 1e3:8.1f} ms")
+        print(f"  conflit détecté : {conflit}")
+        for stockage in (stockage_a, stockage_b):
+            stockage.fermer()
+
+
+if __name__ == '__main__':
+    main()
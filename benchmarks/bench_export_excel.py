@@ -0,0 +1,47 @@
+"""Benchmark : export Excel en flux (lignes/s et pic de mémoire résidente)
+
+Usage : python -m benchmarks.bench_export_excel [--standard]
+(--standard désactive constant_memory pour comparer le pic de mémoire)
+"""
+
+import resource
+import sys
+import time
+
+from benchmarks.donnees import generer_historique, generer_projets, generer_revenus
+from plan_financier.export_excel import exporter_plan_excel
+from plan_financier.grand_livre import GrandLivre
+
+N_PROJETS = 50_000
+ALLOCATIONS_PAR_PROJET = 10  # 500k allocations, exportées nettes par (projet, revenu, mois)
+
+
+def pic_rss_mo():
+    """Pic de mémoire résidente du processus (Linux : ru_maxrss en Ko)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    constant_memory = '--standard' not in sys.argv
+    projets = generer_historique(generer_projets(N_PROJETS), n_mois=6,
+                                 allocations_par_projet=ALLOCATIONS_PAR_PROJET)
+    revenus = generer_revenus(5)
+    grand_livre = GrandLivre.depuis_projets(projets)
+    rss_avant = pic_rss_mo()
+
+    debut = time.perf_counter()
+    sortie, comptes = exporter_plan_excel(projets, revenus, grand_livre, constant_memory=constant_memory)
+    duree = time.perf_counter() - debut
+
+    lignes = sum(comptes.values())
+    print(f"constant_memory={constant_memory}")
+    for nom, n in comptes.items():
+        print(f"  {nom:<20} {n:>9} lignes")
+    print(f"  {lignes} lignes en {duree:.1f} s : {lignes / duree:,.0f} lignes/s".replace(",", " "))
+    print(f"  fichier {len(sortie.getbuffer()) / 1e6:.1f} Mo, "
+          f"pic RSS {pic_rss_mo():.0f} Mo (données seules : {rss_avant:.0f} Mo, "
+          f"surcoût export : {pic_rss_mo() - rss_avant:.0f} Mo)")
+
+
+if __name__ == '__main__':
+    main()
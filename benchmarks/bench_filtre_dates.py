@@ -0,0 +1,70 @@
+"""Benchmark : filtrage par date via IndexDates contre le parcours historique"""
+
+from datetime import datetime
+
+from benchmarks.donnees import generer_projets, generer_revenus
+from benchmarks.outils import chronometrer
+from plan_financier.index_dates import IndexDates
+
+TAILLES = (1_000, 10_000, 100_000)
+
+
+def filtrer_boucle(items, item_type, year, month):
+    """Version historique de filter_by_date (fermeture évaluée sur chaque item)"""
+    if year == "Tous" and month == "Tous":
+        return items
+
+    def is_visible(item):
+        if item_type == 'projet':
+            start_date = item['date_creation']
+            end_date = item.get('echeance', datetime.now().date())
+        else:
+            start_date = item.get('date_disponibilite', item['date_creation'])
+            end_date = datetime.now().date()
+        if isinstance(start_date, datetime):
+            start_date = start_date.date()
+        if isinstance(end_date, datetime):
+            end_date = end_date.date()
+        if year != "Tous" and start_date.year != int(year):
+            return False
+        if month != "Tous":
+            filter_month = int(month)
+            if start_date.year == end_date.year:
+                return start_date.month <= filter_month <= end_date.month
+            else:
+                return True
+        return True
+
+    return [item for item in items if is_visible(item)]
+
+
+def verifier_parite(items, item_type):
+    """Vérifie que l'index donne exactement les résultats historiques"""
+    index = IndexDates.depuis_items(items, item_type)
+    annees = sorted({item['date_creation'].year for item in items})
+    for year in ["Tous"] + annees:
+        for month in ["Tous"] + [f"{i:02d}" for i in range(1, 13)]:
+            attendu = filtrer_boucle(items, item_type, year, month)
+            assert index.rechercher(year, month) == attendu, (item_type, year, month)
+
+
+def main():
+    petits_projets = generer_projets(2_000, seed=1)
+    for projet in petits_projets[::50]:
+        del projet['echeance']
+    verifier_parite(petits_projets, 'projet')
+    verifier_parite(generer_revenus(500, seed=1), 'revenu')
+
+    print(f"{'projets':>10} {'construction (ms)':>18} {'boucle (ms)':>12} {'index (ms)':>11} {'gain':>7}")
+    for n in TAILLES:
+        projets = generer_projets(n)
+        t_construction, index = chronometrer(IndexDates.depuis_items, projets, 'projet', repetitions=1)
+        t_boucle, attendu = chronometrer(filtrer_boucle, projets, 'projet', 2024, '06')
+        t_index, obtenu = chronometrer(index.rechercher, 2024, '06')
+        assert obtenu == attendu
+        print(f"{n:>10} {t_construction * 1e3:>18.1f} {t_boucle * 1e3:>12.2f} "
+              f"{t_index * 1e3:>11.3f} {t_boucle / t_index:>6.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark : fonds d'urgence tenu à jour contre le rejeu de l'historique des allocations"""
+
+from datetime import date
+
+import numpy as np
+
+from benchmarks.donnees import LISTES_CONFIG, generer_plan
+from benchmarks.outils import chronometrer
+from plan_financier.fonds_urgence import TYPE_EPARGNE, mois_verses
+from plan_financier.grand_livre import ALLOCATION
+from plan_financier.moteur import PlanFinancier
+
+N_PROJETS = 50_000
+N_REVENUS = 20
+N_EPARGNE = 4
+ALLOCATIONS_PAR_PROJET = 10
+N_ALLOCATIONS = 200
+KPIS_CONFIG = {'objectif_cash_flow': 500_000, 'objectif_fonds_urgence': 6}
+
+
+def solde_par_rejeu(plan, aujourd_hui):
+    """Référence : versements des revenus d'épargne moins toutes leurs allocations, relues dans le journal"""
+    epargne = {revenu['id']: revenu for revenu in plan.revenus_variables if revenu['type'] == TYPE_EPARGNE}
+    verse = sum(revenu['montant_mensuel'] * mois_verses(revenu, aujourd_hui) for revenu in epargne.values())
+    alloue = sum(montant for _, revenu_id, montant, _ in plan.grand_livre.allocations() if revenu_id in epargne)
+    return max(0, verse - alloue)
+
+
+def solde_par_masque(plan, aujourd_hui):
+    """Rejeu vectorisé : un masque sur toutes les allocations du journal"""
+    epargne = [revenu for revenu in plan.revenus_variables if revenu['type'] == TYPE_EPARGNE]
+    verse = sum(revenu['montant_mensuel'] * mois_verses(revenu, aujourd_hui) for revenu in epargne)
+    grand_livre = plan.grand_livre
+    taille = grand_livre.taille
+    masque = (grand_livre.natures[:taille] == ALLOCATION) & np.isin(grand_livre.revenu_ids[:taille],
+                                                                    [revenu['id'] for revenu in epargne])
+    return max(0, verse - grand_livre.montants[:taille][masque].sum().item())
+
+
+def main():
+    projets, revenus = generer_plan(N_PROJETS, n_revenus=N_REVENUS, n_mois=12,
+                                    allocations_par_projet=ALLOCATIONS_PAR_PROJET)
+    for revenu in revenus[:N_EPARGNE]:
+        revenu.update(type=TYPE_EPARGNE, regulier=True, montant_mensuel=500_000_000)
+    plan = PlanFinancier(projets, revenus, {'listes_config': LISTES_CONFIG, 'kpis_config': KPIS_CONFIG})
+    aujourd_hui = date.today()
+
+    t_construction, fonds = chronometrer(plan.obtenir_fonds_urgence, repetitions=1)
+    t_rejeu, reference = chronometrer(solde_par_rejeu, plan, aujourd_hui, repetitions=1)
+    t_masque, masque = chronometrer(solde_par_masque, plan, aujourd_hui, repetitions=3)
+    t_solde, solde = chronometrer(fonds.solde, aujourd_hui, repetitions=100)
+    assert solde == reference == masque > 0
+
+    # Allocations postées depuis l'épargne : le solde suit sans rejeu
+    cibles = [projet['id'] for projet in projets[:N_ALLOCATIONS]]
+    for i, projet_id in enumerate(cibles):
+        revenu_id = revenus[i % N_EPARGNE]['id']
+        succes, message = plan.allouer_revenu(revenu_id, [{'projet_id': projet_id, 'montant': 1000 * (i + 1),
+                                                           'mois': '2030-01'}])
+        assert succes, message
+    assert fonds.solde(aujourd_hui) == solde_par_masque(plan, aujourd_hui) < solde
+
+    # Revenu d'épargne renuméroté puis requalifié : le fonds suit ses index
+    plan.reassigner_id_item('revenu', revenus[0]['id'], 10_000)
+    assert plan.obtenir_fonds_urgence().solde(aujourd_hui) == solde_par_masque(plan, aujourd_hui)
+    plan.appliquer_modifications({'revenu': {10_000: dict(revenus[0], type='Salaire')}})
+    assert plan.obtenir_fonds_urgence().solde(aujourd_hui) == solde_par_masque(plan, aujourd_hui)
+
+    t_kpis, kpis = chronometrer(plan.calculer_kpis, repetitions=5)
+    print(f"{N_PROJETS} projets, {len(plan.grand_livre)} événements, {N_EPARGNE} revenus d'épargne")
+    print(f"  construction du fonds             : {t_construction * 1e3:8.2f} ms")
+    print(f"  rejeu des allocations (Python)    : {t_rejeu * 1e3:8.2f} ms")
+    print(f"  rejeu vectorisé (masque)          : {t_masque * 1e3:8.2f} ms")
+    print(f"  solde tenu à jour                 : {t_solde * 1e6:8.2f} µs")
+    print(f"  KPIs complets                     : {t_kpis * 1e3:8.2f} ms "
+          f"(fonds {kpis['fonds_urgence_mois']:.1f} mois, Baby Step {kpis['baby_step_actuel']}/7)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark : reruns partiels (fragments) contre le rerun complet de l'application, à 50 000 projets.
+
+L'application tourne sous streamlit.testing (AppTest) sur une base temporaire ;
+les durées sont celles de l'instrumentation des reruns de la session. AppTest
+ne relance que les fragments nommés par st.rerun : un widget qui ne relance que
+son propre fragment (utilisateur) y provoque un rerun complet, il n'est pas mesuré.
+"""
+
+import os
+import tempfile
+
+from benchmarks.donnees import generer_plan
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.stockage import StockagePlan
+
+N_PROJETS = 50_000
+CHEMIN_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+# Filtres successifs (jamais calculés avant : les fragments font le vrai travail)
+FILTRES = ((2023, '03'), (2024, '06'), (2024, '11'), (2025, '02'), (2025, 'Tous'))
+SECTIONS_FILTREES = {'resume_sidebar', 'kpis', 'suivi_mois'}
+
+
+def preparer_base(chemin):
+    """Configuration de l'application (créée à son premier lancement) et plan de N_PROJETS projets"""
+    from streamlit.testing.v1 import AppTest
+
+    AppTest.from_file(CHEMIN_APP, default_timeout=120).run()
+    stockage = StockagePlan(chemin)
+    admin_config = stockage.charger_admin_config()
+    projets, revenus = generer_plan(N_PROJETS, n_mois=6, allocations_par_projet=2,
+                                    listes_config=admin_config['listes_config'])
+    stockage.remplacer_plan(projets, revenus, admin_config, 'Alix', GrandLivre.depuis_projets(projets))
+    stockage.fermer()
+
+
+def valeurs(at):
+    return [metrique.value for metrique in at.metric], [texte.value for texte in at.sidebar.markdown][-6:]
+
+
+def interaction(at, enregistreur, action):
+    """Exécute une interaction après un rerun complet de référence ; retourne (partiel, valeurs affichées)"""
+    at.run()
+    action(at)
+    assert not at.exception, at.exception
+    return enregistreur.interactions()[-1], valeurs(at)
+
+
+def main():
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'plan.db')
+        os.environ['PLAN_FINANCIER_DB'] = chemin
+        preparer_base(chemin)
+
+        at = AppTest.from_file(CHEMIN_APP, default_timeout=300).run()
+        assert not at.exception, at.exception
+        enregistreur = at.session_state.instrumentation
+        enregistreur.actif = True
+
+        lignes = []
+        for annee, mois in FILTRES:
+            def filtrer(at):
+                at.sidebar.selectbox(key='filter_year').set_value(annee)
+                at.sidebar.selectbox(key='filter_month').set_value(mois).run()
+            partiel, affiche = interaction(at, enregistreur, filtrer)
+            assert set(partiel['fragments']) == SECTIONS_FILTREES, partiel['fragments']
+
+            # Mêmes filtres par un rerun complet : mêmes valeurs affichées
+            at.session_state['filter_year'] = annee
+            at.session_state['filter_month'] = mois
+            at.run()
+            assert valeurs(at) == affiche, (valeurs(at), affiche)
+            lignes.append((f"filtre {annee}-{mois}", partiel))
+
+    print(f"{N_PROJETS} projets : une interaction ne réexécute que les fragments qui en dépendent")
+    print(f"{'interaction':<26} {'fragments':>9} {'partiel (ms)':>13} {'complet (ms)':>13} {'économie (ms)':>14}")
+    for libelle, partiel in lignes:
+        # Sans fragments : les mêmes sections plus tout le reste du rerun complet
+        complet = partiel['duree'] + partiel['economie']
+        print(f"{libelle:<26} {len(partiel['fragments']):>9} {partiel['duree'] * 1e3:>13.1f} "
+              f"{complet * 1e3:>13.1f} {partiel['economie'] * 1e3:>14.1f}")
+    economie = sum(partiel['economie'] for _, partiel in lignes) / len(lignes)
+    print(f"économie moyenne : {economie * 1e3:.1f} ms par interaction")
+
+
+if __name__ == '__main__':
+    main()
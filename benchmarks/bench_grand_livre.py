@@ -0,0 +1,121 @@
+"""Benchmark : grand livre en colonnes avec instantanés contre les listes allocations_recues imbriquées"""
+
+import copy
+import random
+import tracemalloc
+
+from benchmarks.donnees import generer_historique, generer_projets
+from benchmarks.outils import chronometrer
+from plan_financier.grand_livre import ALLOCATION, GrandLivre
+
+N_PROJETS = 100_000
+ALLOCATIONS_PAR_PROJET = 10
+N_MOIS = 24
+N_REQUETES = 1_000
+MOIS_REJOUE = '2024-06'
+# Mois absent de l'historique généré
+MOIS_NOUVEAU = '2030-01'
+
+
+def soldes_par_listes(projets, mois=None):
+    """Référence : alloué par projet en relisant les listes imbriquées (jusqu'à un mois inclus)"""
+    soldes = {}
+    for projet in projets:
+        total = sum(a['montant'] for a in projet['allocations_recues'] if mois is None or a['mois'] <= mois)
+        if total:
+            soldes[projet['id']] = total
+    return soldes
+
+
+def alloue_sans_instantane(grand_livre, projet_id):
+    """Référence : masque sur tout le journal, sans instantané"""
+    taille = grand_livre.taille
+    masque = (grand_livre.projet_ids[:taille] == projet_id) & (grand_livre.natures[:taille] == ALLOCATION)
+    return grand_livre.montants[:taille][masque].sum().item()
+
+
+def taille_listes(projets):
+    """Mémoire Python (Mo) des listes allocations_recues, mesurée en les recopiant"""
+    tracemalloc.start()
+    try:
+        copie = [copy.deepcopy(projet['allocations_recues']) for projet in projets]
+        return tracemalloc.get_traced_memory()[0] / 1e6, copie
+    finally:
+        tracemalloc.stop()
+
+
+def relancer_allocations(grand_livre, lot):
+    """Relance une allocation déjà inscrite : aucun événement ne doit être ajouté"""
+    return sum(grand_livre.allouer(revenu_id, projet_id, montant, mois) != 0
+               for revenu_id, projet_id, montant, mois in lot)
+
+
+def main():
+    projets = generer_historique(generer_projets(N_PROJETS, seed=1), n_mois=N_MOIS,
+                                 allocations_par_projet=ALLOCATIONS_PAR_PROJET, seed=1)
+    for projet in projets:
+        projet['montant_utilise_reel'] = 0
+    memoire_listes, _ = taille_listes(projets)
+    reference = soldes_par_listes(projets)
+    reference_mois = soldes_par_listes(projets, MOIS_REJOUE)
+    listes = {projet['id']: projet['allocations_recues'] for projet in projets}
+
+    t_migration, grand_livre = chronometrer(GrandLivre.depuis_projets, copy.deepcopy(projets), repetitions=1)
+    memoire_colonnes = sum(grand_livre.__dict__[nom][:grand_livre.taille].nbytes
+                           for nom in ('natures', 'projet_ids', 'revenu_ids', 'montants', 'mois', 'horodatages',
+                                       'auteurs', 'slots_projet', 'slots_revenu')) / 1e6
+
+    # Soldes courants et rejeu d'un mois : mêmes montants que les listes
+    alloues, depenses, _ = grand_livre.soldes()
+    assert alloues == reference and not depenses
+    assert grand_livre.soldes_au_mois(MOIS_REJOUE)[0] == reference_mois
+
+    rng = random.Random(0)
+    ids = [projet['id'] for projet in rng.sample(projets, N_REQUETES)]
+
+    def par_listes():
+        return [sum(a['montant'] for a in listes[projet_id]) for projet_id in ids]
+
+    def par_instantane():
+        return [grand_livre.alloue_projet(projet_id) for projet_id in ids]
+
+    def sans_instantane():
+        return [alloue_sans_instantane(grand_livre, projet_id) for projet_id in ids]
+
+    t_listes, attendus = chronometrer(par_listes, repetitions=3)
+    t_instantane, obtenus = chronometrer(par_instantane, repetitions=3)
+    t_scan, scannes = chronometrer(sans_instantane, repetitions=1)
+    assert obtenus == attendus == scannes
+
+    # Queue après l'instantané : nouvelles allocations et dépenses lues sans recalcul complet
+    for projet_id in ids[:500]:
+        grand_livre.allouer(1, projet_id, 7000, MOIS_NOUVEAU)
+        grand_livre.depenser(projet_id, 2000, MOIS_NOUVEAU)
+    assert all(grand_livre.solde_projet(projet_id) == reference.get(projet_id, 0) + 5000 for projet_id in ids[:500])
+    queue = grand_livre.taille - grand_livre.instantane[0]
+
+    t_soldes, _ = chronometrer(grand_livre.soldes, repetitions=3)
+    t_rejeu, _ = chronometrer(grand_livre.soldes_au_mois, MOIS_REJOUE, repetitions=3)
+    t_rejeu_listes, _ = chronometrer(soldes_par_listes, projets, MOIS_REJOUE, repetitions=1)
+
+    # Allocation relancée : les listes dupliquaient chaque ligne, le grand livre n'écrit rien
+    lot = [(1, projet_id, 7000, MOIS_NOUVEAU) for projet_id in ids[:500]]
+    taille_avant = grand_livre.taille
+    t_relance, ajoutes = chronometrer(relancer_allocations, grand_livre, lot, repetitions=3)
+    assert ajoutes == 0 and grand_livre.taille == taille_avant
+
+    print(f"{N_PROJETS} projets x {ALLOCATIONS_PAR_PROJET} allocations ({grand_livre.taille} événements)")
+    print(f"  mémoire : listes imbriquées {memoire_listes:7.1f} Mo, colonnes {memoire_colonnes:6.1f} Mo")
+    print(f"  migration des listes vers le grand livre : {t_migration * 1e3:8.1f} ms")
+    print(f"  {N_REQUETES} soldes de projets :")
+    print(f"    listes imbriquées               : {t_listes * 1e3:8.2f} ms")
+    print(f"    instantané + queue ({queue} évts) : {t_instantane * 1e3:8.2f} ms")
+    print(f"    masque sur tout le journal      : {t_scan * 1e3:8.2f} ms")
+    print(f"  tous les soldes (instantané)      : {t_soldes * 1e3:8.2f} ms")
+    print(f"  rejeu jusqu'à {MOIS_REJOUE}             : {t_rejeu * 1e3:8.2f} ms "
+          f"(listes : {t_rejeu_listes * 1e3:.1f} ms)")
+    print(f"  relance de 500 allocations        : {t_relance * 1e3:8.2f} ms, {ajoutes} événement ajouté")
+
+
+if __name__ == '__main__':
+    main()
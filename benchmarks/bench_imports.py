@@ -0,0 +1,51 @@
+"""Benchmark : temps d'import du moteur (budget) comparé aux dépendances de l'interface"""
+
+import json
+import subprocess
+import sys
+
+# Budget d'import du moteur, NumPy compris (meilleur de REPETITIONS processus neufs)
+BUDGET_MOTEUR_MS = 300
+REPETITIONS = 5
+MODULES_MOTEUR = ('plan_financier.moteur', 'plan_financier.simulation', 'plan_financier.scenarios')
+MODULES_LOURDS = ('streamlit', 'pandas', 'plotly', 'xlsxwriter')
+REFERENCES = ('numpy', 'pandas', 'plotly.graph_objects', 'xlsxwriter', 'streamlit')
+
+_SONDE = """
+import json, sys, time
+debut = time.perf_counter()
+for module in sys.argv[1:]:
+    __import__(module)
+duree = time.perf_counter() - debut
+charges = sorted({nom.split('.')[0] for nom in sys.modules})
+print(json.dumps({'duree': duree, 'modules': charges}))
+"""
+
+
+def mesurer_import(*modules):
+    """Meilleur temps d'import (secondes) dans un interpréteur neuf, et paquets chargés"""
+    meilleur = float('inf')
+    charges = []
+    for _ in range(REPETITIONS):
+        sortie = subprocess.run([sys.executable, '-c', _SONDE, *modules], capture_output=True, text=True, check=True)
+        resultat = json.loads(sortie.stdout)
+        meilleur = min(meilleur, resultat['duree'])
+        charges = resultat['modules']
+    return meilleur, charges
+
+
+def main():
+    duree, charges = mesurer_import(*MODULES_MOTEUR)
+    lourds = sorted(set(MODULES_LOURDS) & set(charges))
+    print(f"moteur ({', '.join(MODULES_MOTEUR)}) : {duree * 1e3:.0f} ms (budget {BUDGET_MOTEUR_MS} ms)")
+    assert not lourds, f"le moteur charge des dépendances de l'interface : {lourds}"
+    assert duree * 1e3 <= BUDGET_MOTEUR_MS, f"budget d'import dépassé : {duree * 1e3:.0f} ms"
+
+    print("\nRéférences :")
+    for module in REFERENCES:
+        duree, _ = mesurer_import(module)
+        print(f"  {module:<22} {duree * 1e3:>7.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
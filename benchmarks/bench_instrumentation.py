@@ -0,0 +1,53 @@
+"""Benchmark : surcoût de l'instrumentation, inactive puis active"""
+
+import time
+
+from plan_financier.instrumentation import Enregistreur, instrumenter, mesurer
+
+N_APPELS = 1_000_000
+
+
+def fonction(x):
+    return x
+
+
+fonction_instrumentee = instrumenter('fonction')(fonction)
+
+
+def _boucle(appel):
+    debut = time.perf_counter()
+    for i in range(N_APPELS):
+        appel(i)
+    return (time.perf_counter() - debut) / N_APPELS * 1e9
+
+
+def _boucle_bloc():
+    debut = time.perf_counter()
+    for i in range(N_APPELS):
+        with mesurer('bloc'):
+            pass
+    return (time.perf_counter() - debut) / N_APPELS * 1e9
+
+
+def main():
+    reference = _boucle(fonction)
+    inactive = _boucle(fonction_instrumentee)
+    bloc_inactif = _boucle_bloc()
+
+    enregistreur = Enregistreur()
+    enregistreur.actif = True
+    with enregistreur.rerun():
+        active = _boucle(fonction_instrumentee)
+        bloc_actif = _boucle_bloc()
+    mesures = enregistreur.reruns[-1]['mesures']
+    assert mesures['fonction']['appels'] == N_APPELS and mesures['bloc']['appels'] == N_APPELS
+
+    print(f"appel direct          : {reference:6.1f} ns")
+    print(f"décorateur inactif    : {inactive:6.1f} ns (+{inactive - reference:.1f} ns)")
+    print(f"décorateur actif      : {active:6.1f} ns (+{active - reference:.1f} ns)")
+    print(f"bloc mesurer inactif  : {bloc_inactif:6.1f} ns")
+    print(f"bloc mesurer actif    : {bloc_actif:6.1f} ns")
+
+
+if __name__ == '__main__':
+    main()
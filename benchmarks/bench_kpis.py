@@ -0,0 +1,77 @@
+"""Benchmark : KPIs vectorisés (TableProjets) contre la version boucle historique"""
+
+from benchmarks.donnees import generer_projets, generer_revenus
+from benchmarks.outils import chronometrer
+from plan_financier.fonds_urgence import etape_baby_step
+from plan_financier.table_projets import TableProjets, calculer_kpis_table
+
+TAILLES = (1_000, 10_000, 100_000)
+KPIS_CONFIG = {'objectif_cash_flow': 500_000, 'objectif_fonds_urgence': 6}
+SOLDE_FONDS_URGENCE = 25_000_000
+
+
+def calculer_kpis_boucle(projets, revenus, solde_fonds_urgence=0, kpis_config=None):
+    """Version historique de calculer_kpis (parcours Python de la liste), avec fonds d'urgence et Baby Step"""
+    revenus_mensuels = sum(r['montant_mensuel'] for r in revenus)
+    cash_flow_mensuel = sum(p['cash_flow_mensuel'] for p in projets)
+    total_actifs = sum(p['montant_total'] for p in projets if p['type'] == 'Actif générateur')
+    total_passifs = sum(p['montant_total'] for p in projets if p['type'] == 'Passif')
+    total_formation = sum(p['montant_total'] for p in projets if p['type'] == 'Investissement formation')
+    total_global = total_actifs + total_passifs + total_formation
+    ratio_actifs_passifs = (total_actifs / total_global * 100) if total_global > 0 else 0
+    revenus_passifs = sum(p['cash_flow_mensuel'] for p in projets if p['type'] == 'Actif générateur' and p['cash_flow_mensuel'] > 0)
+    revenus_passifs_pct = (revenus_passifs / revenus_mensuels * 100) if revenus_mensuels > 0 else 0
+    nombre_actifs = len([p for p in projets if p['type'] == 'Actif générateur'])
+    if cash_flow_mensuel < 0 or revenus_passifs_pct < 10:
+        phase_actuelle = 'Stabilisation'
+    elif cash_flow_mensuel >= 0 and 10 <= revenus_passifs_pct < 30:
+        phase_actuelle = 'Transition'
+    else:
+        phase_actuelle = 'Expansion'
+    depenses_mensuelles = abs(sum(p['cash_flow_mensuel'] for p in projets if p['cash_flow_mensuel'] < 0))
+    if depenses_mensuelles > 0:
+        fonds_urgence_mois = solde_fonds_urgence / depenses_mensuelles
+    else:
+        fonds_urgence_mois = float('inf') if solde_fonds_urgence > 0 else 0.0
+    kpis_config = kpis_config or {}
+    baby_step_actuel = etape_baby_step((
+        solde_fonds_urgence > 0 and fonds_urgence_mois >= 1,
+        all(p['montant_utilise_reel'] >= p['montant_total'] for p in projets if p['type'] == 'Passif'),
+        fonds_urgence_mois >= kpis_config.get('objectif_fonds_urgence', 6),
+        sum(p['budget_alloue_mensuel'] for p in projets if p['type'] == 'Actif générateur') >= 0.15 * revenus_mensuels,
+        all(p['montant_utilise_reel'] >= p['montant_total'] for p in projets if p['type'] == 'Investissement formation'),
+        cash_flow_mensuel >= kpis_config.get('objectif_cash_flow', 0),
+        phase_actuelle == 'Expansion'
+    ))
+    return {
+        'revenus_mensuels': revenus_mensuels,
+        'cash_flow_mensuel': cash_flow_mensuel,
+        'ratio_actifs_passifs': ratio_actifs_passifs,
+        'revenus_passifs_pct': revenus_passifs_pct,
+        'nombre_actifs': nombre_actifs,
+        'phase_actuelle': phase_actuelle,
+        'fonds_urgence_mois': fonds_urgence_mois,
+        'baby_step_actuel': baby_step_actuel,
+        'depenses_mensuelles': depenses_mensuelles,
+        'total_actifs': total_actifs,
+        'total_passifs': total_passifs,
+        'total_formation': total_formation
+    }
+
+
+def main():
+    revenus = generer_revenus(5)
+    print(f"{'projets':>10} {'boucle (ms)':>12} {'vectorisé (ms)':>15} {'gain':>7}")
+    for n in TAILLES:
+        projets = generer_projets(n)
+        table = TableProjets.depuis_projets(projets)
+        t_boucle, attendu = chronometrer(calculer_kpis_boucle, projets, revenus, SOLDE_FONDS_URGENCE, KPIS_CONFIG)
+        t_table, obtenu = chronometrer(calculer_kpis_table, table, revenus, None, SOLDE_FONDS_URGENCE, KPIS_CONFIG)
+        assert obtenu == attendu, (obtenu, attendu)
+        for solde in (0, 10 ** 12):
+            assert calculer_kpis_table(table, revenus, None, solde) == calculer_kpis_boucle(projets, revenus, solde)
+        print(f"{n:>10} {t_boucle * 1e3:>12.2f} {t_table * 1e3:>15.3f} {t_boucle / t_table:>6.0f}x")
+
+
+if __name__ == '__main__':
+    main()
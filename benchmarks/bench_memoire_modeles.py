@@ -0,0 +1,44 @@
+"""Benchmark : mémoire par projet, dicts contre enregistrements Projet à __slots__
+
+Les projets sont décodés depuis le JSON du stockage, comme au démarrage d'une
+session : chaque chaîne y est un objet distinct, contrairement aux littéraux.
+"""
+
+import gc
+import pickle
+import tracemalloc
+
+from benchmarks.donnees import generer_projets
+from plan_financier import codec_json
+from plan_financier.modeles import en_enregistrements
+
+N_PROJETS = 100_000
+
+
+def memoire_retenue(construire):
+    """Octets retenus par l'objet construit (tracemalloc)"""
+    gc.collect()
+    tracemalloc.start()
+    objet = construire()
+    gc.collect()
+    courant, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return courant, objet
+
+
+def main():
+    texte = codec_json.dumps(generer_projets(N_PROJETS))
+    octets_dicts, dicts = memoire_retenue(lambda: codec_json.loads(texte))
+    octets_records, records = memoire_retenue(lambda: en_enregistrements(codec_json.loads(texte)))
+    assert records == dicts
+
+    pickle_dicts = len(pickle.dumps(dicts))
+    pickle_records = len(pickle.dumps(records))
+    print(f"{N_PROJETS} projets")
+    print(f"  dicts            : {octets_dicts / N_PROJETS:7.0f} octets/projet, pickle {pickle_dicts / N_PROJETS:5.0f} octets/projet")
+    print(f"  Projet (slots)   : {octets_records / N_PROJETS:7.0f} octets/projet, pickle {pickle_records / N_PROJETS:5.0f} octets/projet")
+    print(f"  gain mémoire     : {1 - octets_records / octets_dicts:.0%}")
+
+
+if __name__ == '__main__':
+    main()
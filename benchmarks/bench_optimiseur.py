@@ -0,0 +1,175 @@
+"""Benchmark : répartition automatique des revenus du mois (priorité, échéance, probabilité de réussite)
+
+Compare d'abord l'optimiseur glouton vectorisé à une recherche exhaustive sur de
+petits portefeuilles : la référence fixe la même règle de priorité (un niveau
+n'est servi que si les niveaux supérieurs sont remplis) puis énumère, dans le
+niveau où l'argent manque, tous les montants qui changent une probabilité de
+calculer_probabilite_reussite. Chronomètre ensuite 10 000 projets x 50 revenus.
+"""
+
+import copy
+import itertools
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks.donnees import LISTES_CONFIG, PRIORITES, generer_plan, generer_projets
+from benchmarks.outils import chronometrer
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.moteur import PlanFinancier
+from plan_financier.sante_projets import calculer_probabilite_reussite
+
+N_PROJETS = 10_000
+N_REVENUS = 50
+MOIS = '2026-03'
+N_PETITS_CAS = 200
+PROJETS_PETIT_CAS = 6
+
+
+def capacite(projet):
+    """Capacité d'un projet sans allocation ce mois : reste à financer plafonné au budget mensuel"""
+    return max(0, min(projet['montant_total'] - projet['montant_utilise_reel'], projet['budget_alloue_mensuel']))
+
+
+def probabilite_financee(projet, montant):
+    """Probabilité de réussite du projet si `montant` vient s'ajouter à son montant utilisé"""
+    finance = copy.copy(projet)
+    finance['montant_utilise_reel'] = projet['montant_utilise_reel'] + montant
+    return calculer_probabilite_reussite(finance)
+
+
+def options(projet):
+    """Plus petits montants (<= capacité) atteignant chaque probabilité, par dichotomie : {probabilité: montant}"""
+    maximum = capacite(projet)
+    atteints = {probabilite_financee(projet, 0): 0}
+    for cible in sorted({probabilite_financee(projet, maximum)} | set(range(0, 101, 5))):
+        if cible in atteints or probabilite_financee(projet, maximum) < cible:
+            continue
+        bas, haut = 0, maximum
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            if probabilite_financee(projet, milieu) >= cible:
+                haut = milieu
+            else:
+                bas = milieu + 1
+        atteints.setdefault(probabilite_financee(projet, bas), bas)
+    return sorted((montant, probabilite) for probabilite, montant in atteints.items())
+
+
+def optimum_exact(projets, disponible):
+    """Somme maximale des probabilités sous la règle de priorité, par énumération exhaustive"""
+    rangs = {priorite: rang for rang, priorite in enumerate(PRIORITES)}
+    total = 0
+    for _, niveau in itertools.groupby(sorted(projets, key=lambda p: rangs[p['priorite']]),
+                                       key=lambda p: rangs[p['priorite']]):
+        niveau = list(niveau)
+        capacites = sum(capacite(projet) for projet in niveau)
+        if capacites <= disponible:
+            disponible -= capacites
+            total += sum(probabilite_financee(projet, capacite(projet)) for projet in niveau)
+            continue
+        meilleur = 0
+        for choix in itertools.product(*(options(projet) for projet in niveau)):
+            if sum(montant for montant, _ in choix) <= disponible:
+                meilleur = max(meilleur, sum(probabilite for _, probabilite in choix))
+        total += meilleur
+        disponible = 0
+    return total
+
+
+def petit_cas(seed):
+    """Petit portefeuille concentré autour des seuils de progression, avec deux revenus"""
+    rng = random.Random(seed)
+    aujourd_hui = date.today()
+    projets = generer_projets(PROJETS_PETIT_CAS, seed=seed)
+    for projet in projets:
+        total = rng.randrange(10, 200) * 1000
+        projet['priorite'] = rng.choice(PRIORITES[:2])
+        projet['montant_total'] = total
+        projet['montant_utilise_reel'] = rng.choice([0, total // 20, total // 2, total * 7 // 10])
+        projet['budget_alloue_mensuel'] = rng.choice([total // 5, total // 2, total])
+        projet['echeance'] = aujourd_hui + timedelta(days=rng.choice([10, 60, 200]))
+        projet['suivi_mensuel'] = []
+    revenus = [{'id': i, 'nom': f'Revenu {i}', 'montant_mensuel': rng.randrange(5, 60) * 1000, 'regulier': True,
+                'date_disponibilite': date(2026, 1, 1), 'allocations': []}
+               for i in (1, 2)]
+    return projets, revenus
+
+
+def appliquer(projets, lots):
+    """Montant proposé par projet"""
+    montants = {}
+    for _, allocations_list in lots:
+        for allocation in allocations_list:
+            montants[allocation['projet_id']] = montants.get(allocation['projet_id'], 0) + allocation['montant']
+    return montants
+
+
+def verifier_contraintes(projets, revenus, lots):
+    """Plafonds des revenus et des projets, règle de priorité"""
+    for revenu_id, allocations_list in lots:
+        revenu = next(r for r in revenus if r['id'] == revenu_id)
+        assert sum(a['montant'] for a in allocations_list) <= revenu['montant_mensuel']
+    montants = appliquer(projets, lots)
+    rangs = {priorite: rang for rang, priorite in enumerate(PRIORITES)}
+    rang_non_rempli = min((rangs.get(p['priorite'], len(rangs)) for p in projets
+                           if montants.get(p['id'], 0) < capacite(p)), default=len(rangs) + 1)
+    for projet in projets:
+        montant = montants.get(projet['id'], 0)
+        assert 0 <= montant <= capacite(projet)
+        assert not montant or rangs.get(projet['priorite'], len(rangs)) <= rang_non_rempli, projet['id']
+    return montants
+
+
+def comparer_petits_cas():
+    """Écart entre l'optimiseur et l'optimum exact : (cas optimaux, écart moyen, écart max)"""
+    optimaux = 0
+    ecarts = []
+    for seed in range(N_PETITS_CAS):
+        projets, revenus = petit_cas(seed)
+        plan = PlanFinancier(projets, revenus, {'listes_config': LISTES_CONFIG}, grand_livre=GrandLivre())
+        lots, bilan = plan.proposer_allocations(MOIS)
+        montants = verifier_contraintes(projets, revenus, lots)
+        obtenu = sum(probabilite_financee(p, montants.get(p['id'], 0)) for p in projets)
+        assert obtenu == round(bilan['probabilite_moyenne'] * len(projets))
+        optimum = optimum_exact(projets, sum(r['montant_mensuel'] for r in revenus))
+        assert obtenu <= optimum
+        optimaux += obtenu == optimum
+        ecarts.append(optimum - obtenu)
+    return optimaux, sum(ecarts) / len(ecarts), max(ecarts)
+
+
+def main():
+    optimaux, ecart_moyen, ecart_max = comparer_petits_cas()
+    print(f"{N_PETITS_CAS} petits cas ({PROJETS_PETIT_CAS} projets, 2 revenus) : optimum atteint {optimaux} fois, "
+          f"écart moyen {ecart_moyen:.2f} point(s), max {ecart_max}")
+
+    projets, revenus = generer_plan(N_PROJETS, n_revenus=N_REVENUS, n_mois=3, allocations_par_projet=0)
+    plan = PlanFinancier(projets, revenus, {'listes_config': LISTES_CONFIG})
+    t_premiere, _ = chronometrer(plan.proposer_allocations, MOIS, repetitions=1)
+    t_proposition, (lots, bilan) = chronometrer(plan.proposer_allocations, MOIS, repetitions=5)
+    assert t_proposition < 1.0, t_proposition
+    montants = verifier_contraintes(projets, revenus, lots)
+    assert sum(montants.values()) == bilan['montant_reparti'] == bilan['montant_disponible']
+
+    # Appliquée puis reproposée : rien de plus à répartir, aucun événement ajouté
+    t_application, (succes, message) = chronometrer(plan.allouer_revenus_en_lot, lots, repetitions=1)
+    assert succes, message
+    taille = len(plan.grand_livre)
+    lots, _ = plan.proposer_allocations(MOIS)
+    assert not lots and len(plan.grand_livre) == taille
+
+    niveaux = np.bincount([PRIORITES.index(p['priorite']) for p in projets if montants.get(p['id'])],
+                          minlength=len(PRIORITES))
+    print(f"{N_PROJETS} projets x {N_REVENUS} revenus, mois {MOIS}")
+    print(f"  proposition (table construite)    : {t_premiere * 1e3:8.1f} ms")
+    print(f"  proposition                       : {t_proposition * 1e3:8.1f} ms")
+    print(f"  application au grand livre        : {t_application * 1e3:8.1f} ms")
+    print(f"  {bilan['montant_reparti']:,} FCFA sur {bilan['projets_finances']} projets "
+          f"(par priorité : {dict(zip(PRIORITES, niveaux.tolist()))}), "
+          f"+{bilan['gain_probabilite']} points, probabilité moyenne {bilan['probabilite_moyenne']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
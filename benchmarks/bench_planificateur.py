@@ -0,0 +1,80 @@
+"""Benchmark : passages du planificateur des revenus réguliers sur une horloge simulée"""
+
+import asyncio
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+from benchmarks.donnees import LISTES_CONFIG, generer_plan
+from benchmarks.outils import chronometrer
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.planificateur import PlanificateurRevenus
+from plan_financier.stockage import StockagePlan
+
+N_PROJETS = 100_000
+N_REVENUS = 20
+REGLES_PAR_REVENU = 50
+MOIS_RATTRAPES = 12
+
+
+def preparer_base(chemin):
+    """Plan dont chaque revenu régulier répartit son montant entre REGLES_PAR_REVENU projets"""
+    projets, revenus = generer_plan(N_PROJETS, n_revenus=N_REVENUS, n_mois=0, allocations_par_projet=0, compact=True)
+    pas = N_PROJETS // (N_REVENUS * REGLES_PAR_REVENU)
+    for i, revenu in enumerate(revenus):
+        cibles = projets[i * REGLES_PAR_REVENU * pas:(i + 1) * REGLES_PAR_REVENU * pas:pas]
+        revenu.update(regulier=True, montant_mensuel=REGLES_PAR_REVENU * 10_000, date_disponibilite=date(2024, 2, 5),
+                      regles_allocation=[{'projet_id': p['id'], 'montant': 10_000} for p in cibles])
+    stockage = StockagePlan(chemin)
+    stockage.sauvegarder_plan(projets, revenus, {'listes_config': LISTES_CONFIG}, 'Alix',
+                              GrandLivre.depuis_projets(projets))
+    stockage.fermer()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'plan.db')
+        preparer_base(chemin)
+        horloge = [datetime(2024, 1, 1) + timedelta(days=31 * MOIS_RATTRAPES)]
+        planificateur = PlanificateurRevenus(chemin, horloge=lambda: horloge[0])
+        t_chargement, _ = chronometrer(planificateur._synchroniser, repetitions=1)
+
+        # Rattrapage de MOIS_RATTRAPES mois en une seule écriture
+        t_rattrapage, bilan = chronometrer(planificateur.passer, repetitions=1)
+        attendu = MOIS_RATTRAPES * N_REVENUS * REGLES_PAR_REVENU
+        assert bilan['allocations'] == attendu and bilan['erreur'] is None, bilan
+
+        # Passage sans échéance : rien n'est réécrit (idempotence)
+        t_vide, bilan = chronometrer(planificateur.passer, repetitions=5)
+        assert bilan['allocations'] == 0
+
+        # Boucle asyncio sur l'horloge simulée : un mois par pause
+        async def avancer(delai):
+            horloge[0] += timedelta(days=31)
+            if len(planificateur.passages) >= 8:
+                planificateur.arreter()
+        planificateur.attendre = avancer
+        t_boucle, _ = chronometrer(asyncio.run, planificateur.executer(), repetitions=1)
+        mensuels = [b['allocations'] for b in planificateur.passages][-2:]
+        assert all(n in (0, N_REVENUS * REGLES_PAR_REVENU) for n in mensuels)
+
+        # Une session relit toutes les allocations postées, sans doublon
+        session = StockagePlan(chemin)
+        _, revenus, _, grand_livre = session.charger_plan()
+        allocations = list(grand_livre.allocations())
+        recues = len(allocations)
+        derniers = {revenu['dernier_mois_poste'] for revenu in revenus}
+        mois_postes = len({mois for _, _, _, mois in allocations})
+        assert recues == mois_postes * N_REVENUS * REGLES_PAR_REVENU and len(derniers) == 1
+
+        print(f"{N_PROJETS} projets, {N_REVENUS} revenus réguliers x {REGLES_PAR_REVENU} règles")
+        print(f"  chargement du plan (worker)       : {t_chargement * 1e3:8.1f} ms")
+        print(f"  rattrapage de {MOIS_RATTRAPES} mois ({attendu} allocations) : {t_rattrapage * 1e3:8.1f} ms")
+        print(f"  passage sans échéance             : {t_vide * 1e3:8.1f} ms")
+        print(f"  boucle simulée ({len(planificateur.passages) - 6} passages)       : {t_boucle * 1e3:8.1f} ms")
+        print(f"  {mois_postes} mois postés, {recues} allocations en base, dernier mois {derniers.pop()}")
+        session.fermer()
+
+
+if __name__ == '__main__':
+    main()
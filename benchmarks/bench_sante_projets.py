@@ -0,0 +1,70 @@
+"""Benchmark : santé des projets vectorisée contre les fonctions unitaires
+
+Vérifie d'abord l'égalité exacte sur des portefeuilles aléatoires couvrant les
+cas limites (montant nul, budget épuisé, échéance autour d'aujourd'hui,
+historiques de 0 à 5 mois), puis chronomètre les deux versions.
+"""
+
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks.donnees import generer_historique, generer_projets
+from benchmarks.outils import chronometrer
+from plan_financier.sante_projets import calculer_probabilite_reussite, categorize_project, evaluer_sante_projets
+from plan_financier.table_projets import TableProjets
+
+N_PROJETS = 100_000
+N_PORTEFEUILLES = 50
+
+
+def portefeuille_aleatoire(seed, n=500):
+    """Projets aléatoires concentrés sur les seuils des deux fonctions"""
+    rng = random.Random(seed)
+    aujourd_hui = date.today()
+    projets = generer_projets(n, seed=seed)
+    for projet in projets:
+        total = rng.choice([0, 1000, 100_000, rng.randrange(1, 10_000_000)])
+        projet['montant_total'] = total
+        projet['montant_utilise_reel'] = rng.choice([0, total, total + 1, rng.randrange(0, total + 2)])
+        projet['budget_alloue_mensuel'] = rng.choice([0, 1000, rng.randrange(0, 800_000)])
+        projet['echeance'] = aujourd_hui + timedelta(days=rng.choice([-1, 0, 29, 30, 31, 90, 91, rng.randrange(-400, 400)]))
+        budget = projet['budget_alloue_mensuel']
+        projet['suivi_mensuel'] = [
+            {'mois': f'2025-{mois:02d}', 'prevu': budget, 'reel': rng.choice([0, budget * 3 // 10, budget * 8 // 10, rng.randrange(0, budget + 2)])}
+            for mois in rng.sample(range(1, 13), rng.randrange(0, 6))
+        ]
+    return projets
+
+
+def verifier_parite(projets):
+    """Compare l'API vectorisée aux fonctions unitaires, projet par projet"""
+    sante = evaluer_sante_projets(TableProjets.depuis_projets(projets))
+    for i, projet in enumerate(projets):
+        statut, libelle, couleur = categorize_project(projet)
+        assert (sante['statuts'][i], sante['libelles'][i], sante['couleurs'][i]) == (statut, libelle, couleur), projet
+        assert sante['probabilites'][i] == calculer_probabilite_reussite(projet), projet
+
+
+def evaluer_unitaire(projets):
+    return ([categorize_project(p) for p in projets], [calculer_probabilite_reussite(p) for p in projets])
+
+
+def main():
+    for seed in range(N_PORTEFEUILLES):
+        verifier_parite(portefeuille_aleatoire(seed))
+    print(f"parité vérifiée sur {N_PORTEFEUILLES} portefeuilles aléatoires")
+
+    projets = generer_historique(generer_projets(N_PROJETS), n_mois=12, allocations_par_projet=0)
+    table = TableProjets.depuis_projets(projets)
+    t_unitaire, (categories, probabilites) = chronometrer(evaluer_unitaire, projets, repetitions=1)
+    t_vectorise, sante = chronometrer(evaluer_sante_projets, table, repetitions=5)
+    assert list(sante['statuts']) == [c[0] for c in categories]
+    assert np.array_equal(sante['probabilites'], probabilites)
+    print(f"{N_PROJETS} projets : unitaire {t_unitaire * 1e3:.0f} ms, "
+          f"vectorisé {t_vectorise * 1e3:.1f} ms ({t_unitaire / t_vectorise:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
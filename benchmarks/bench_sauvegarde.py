@@ -0,0 +1,91 @@
+"""Benchmark : aller-retour et débit de la sauvegarde JSON / JSON Lines, mémoire de la lecture en flux"""
+
+import json
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks.donnees import LISTES_CONFIG, generer_plan
+from benchmarks.outils import chronometrer
+from plan_financier import codec_json
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.sauvegarde import charger_sauvegarde, ecrire_json, ecrire_jsonl, lire_sauvegarde
+
+N_PROJETS = 100_000
+N_REVENUS = 50
+N_MOIS = 12
+ECRITURES = {'jsonl': ecrire_jsonl, 'json': ecrire_json}
+
+
+def ecrire(chemin, format_fichier, projets, revenus, admin_config, grand_livre):
+    with open(chemin, 'w', encoding='utf-8') as sortie:
+        return ECRITURES[format_fichier](sortie, projets, revenus, admin_config, grand_livre)
+
+
+def charger(chemin, format_fichier):
+    with open(chemin, encoding='utf-8') as entree:
+        return charger_sauvegarde(entree, format_fichier)
+
+
+def parcourir(chemin, format_fichier):
+    """Lit la sauvegarde en flux sans rien conserver ; retourne le nombre d'enregistrements"""
+    with open(chemin, encoding='utf-8') as entree:
+        return sum(1 for _ in lire_sauvegarde(entree, format_fichier))
+
+
+def charger_d_un_bloc(chemin):
+    """Référence : json.load du document entier"""
+    with open(chemin, encoding='utf-8') as entree:
+        return json.load(entree, object_hook=codec_json.decoder_objet)
+
+
+def pic_memoire(fonction, *args):
+    """Pic d'allocations Python (Mo) pendant l'appel"""
+    tracemalloc.start()
+    try:
+        fonction(*args)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    projets, revenus = generer_plan(N_PROJETS, n_revenus=N_REVENUS, n_mois=N_MOIS, compact=True)
+    grand_livre = GrandLivre.depuis_projets(projets)
+    admin_config = {'listes_config': LISTES_CONFIG, 'kpis_config': {'objectif_patrimoine': 50_000_000}}
+    attendu = codec_json.dumps([projets, revenus, admin_config])
+    evenements = list(grand_livre.evenements())
+    print(f"{N_PROJETS} projets ({N_MOIS} mois de suivi), {N_REVENUS} revenus, {len(evenements)} événements")
+
+    with tempfile.TemporaryDirectory() as dossier:
+        for format_fichier in ECRITURES:
+            chemin = os.path.join(dossier, f'plan.{format_fichier}')
+            # Fichiers de plus de 150 Mo : une seule mesure par opération
+            t_ecriture, comptes = chronometrer(ecrire, chemin, format_fichier, projets, revenus, admin_config,
+                                               grand_livre, repetitions=1)
+            assert comptes == {'admin_config': 1, 'projet': N_PROJETS, 'revenu': N_REVENUS,
+                               'evenement': len(evenements)}
+            taille = os.path.getsize(chemin) / 1e6
+
+            t_lecture, restaure = chronometrer(charger, chemin, format_fichier, repetitions=1)
+            # Aller-retour exact : mêmes enregistrements, dates comprises
+            assert codec_json.dumps(list(restaure[:2]) + [restaure[2]]) == attendu
+            assert list(restaure[3].evenements()) == evenements
+
+            t_flux, total = chronometrer(parcourir, chemin, format_fichier, repetitions=1)
+            assert total == 1 + N_PROJETS + N_REVENUS + len(evenements)
+            memoire_flux = pic_memoire(parcourir, chemin, format_fichier)
+
+            print(f"\n{format_fichier} : {taille:.1f} Mo")
+            print(f"  écriture                  : {t_ecriture * 1e3:8.1f} ms ({taille / t_ecriture:6.1f} Mo/s)")
+            print(f"  restauration (Projet)     : {t_lecture * 1e3:8.1f} ms ({taille / t_lecture:6.1f} Mo/s)")
+            print(f"  lecture en flux seule     : {t_flux * 1e3:8.1f} ms ({taille / t_flux:6.1f} Mo/s)")
+            print(f"  pic mémoire du flux       : {memoire_flux:8.1f} Mo")
+            if format_fichier == 'json':
+                t_bloc, _ = chronometrer(charger_d_un_bloc, chemin, repetitions=1)
+                memoire_bloc = pic_memoire(charger_d_un_bloc, chemin)
+                print(f"  json.load d'un bloc       : {t_bloc * 1e3:8.1f} ms, pic {memoire_bloc:.1f} Mo")
+
+
+if __name__ == '__main__':
+    main()
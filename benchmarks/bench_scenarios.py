@@ -0,0 +1,49 @@
+"""Benchmark : balayage de scénarios what-if, en série puis sur 2, 4... processus"""
+
+import os
+from datetime import date
+
+from benchmarks.donnees import generer_projets, generer_revenus
+from benchmarks.outils import chronometrer
+from plan_financier.scenarios import executer_scenarios, grille_scenarios
+from plan_financier.table_projets import TableProjets
+
+AUJOURD_HUI = date(2026, 1, 1)
+KPIS_CONFIG = {
+    'objectif_cash_flow': 500000,
+    'objectif_ratio_actifs': 40,
+    'objectif_revenus_passifs': 30,
+    'objectif_fonds_urgence': 6
+}
+N_PROJETS = 100_000
+
+
+def main():
+    table = TableProjets.depuis_projets(generer_projets(N_PROJETS, seed=1))
+    revenus = generer_revenus(20, seed=1)
+    scenarios = grille_scenarios(
+        facteurs_budget=(0.7, 0.8, 0.9, 1, 1.1, 1.2, 1.3, 1.5),
+        reports_mois=(-3, 0, 3, 6, 12),
+        montants_revenus=({}, {1: 0}, {1: 3_000_000}, {2: 0, 3: 0}, {4: 5_000_000})
+    )
+
+    duree_serie, reference = chronometrer(executer_scenarios, table, revenus, KPIS_CONFIG, scenarios,
+                                          n_processus=1, aujourd_hui=AUJOURD_HUI, repetitions=1)
+    print(f"{len(scenarios)} scénarios x {N_PROJETS} projets, {os.cpu_count()} cœur(s)")
+    print(f"{'processus':>9} {'durée (s)':>10} {'accélération':>13}")
+    print(f"{1:>9} {duree_serie:>10.2f} {1:>13.2f}")
+
+    n_processus = 2
+    while n_processus <= max(os.cpu_count() or 1, 2):
+        duree, resultats = chronometrer(executer_scenarios, table, revenus, KPIS_CONFIG, scenarios,
+                                        n_processus=n_processus, aujourd_hui=AUJOURD_HUI, repetitions=1)
+        # Même classement qu'en série
+        assert resultats == reference
+        print(f"{n_processus:>9} {duree:>10.2f} {duree_serie / duree:>13.2f}")
+        n_processus *= 2
+
+    print("Meilleur scénario :", reference[0]['scenario'], f"(score {reference[0]['score']})")
+
+
+if __name__ == '__main__':
+    main()
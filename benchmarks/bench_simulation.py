@@ -0,0 +1,42 @@
+"""Benchmark : simulation Monte Carlo (chemins x mois), graine fixe et reproductible"""
+
+from datetime import date
+
+import numpy as np
+
+from benchmarks.donnees import generer_projets, generer_revenus
+from benchmarks.outils import chronometrer
+from plan_financier.simulation import simuler_trajectoires
+
+GRAINE = 2030
+DATE_DEBUT = date(2026, 1, 1)
+KPIS_CONFIG = {
+    'objectif_cash_flow': 500000,
+    'objectif_ratio_actifs': 40,
+    'objectif_revenus_passifs': 30,
+    'objectif_fonds_urgence': 6
+}
+CAS = ((10_000, 60, 100), (10_000, 60, 10_000), (100_000, 60, 1_000))
+
+
+def main():
+    revenus = generer_revenus(20, seed=GRAINE)
+
+    # Reproductibilité : deux exécutions avec la même graine donnent le même résultat
+    projets = generer_projets(100, seed=GRAINE)
+    a = simuler_trajectoires(projets, revenus, KPIS_CONFIG, seed=GRAINE, date_debut=DATE_DEBUT)
+    b = simuler_trajectoires(projets, revenus, KPIS_CONFIG, seed=GRAINE, date_debut=DATE_DEBUT)
+    assert a['phases'] == b['phases'] and a['objectifs'] == b['objectifs']
+    assert all(np.array_equal(a['percentiles'][k], b['percentiles'][k]) for k in a['percentiles'])
+
+    print(f"{'chemins':>8} {'mois':>5} {'projets':>8} {'durée (ms)':>11}  P(Expansion)")
+    for n_chemins, horizon, n_projets in CAS:
+        projets = generer_projets(n_projets, seed=GRAINE)
+        duree, resultat = chronometrer(simuler_trajectoires, projets, revenus, KPIS_CONFIG, horizon=horizon,
+                                       n_chemins=n_chemins, seed=GRAINE, date_debut=DATE_DEBUT, repetitions=3)
+        print(f"{n_chemins:>8} {horizon:>5} {n_projets:>8} {duree * 1e3:>11.1f}  "
+              f"{resultat['phases']['Expansion']['proba_atteinte']:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark : démarrage à froid et sauvegarde incrémentale du stockage SQLite"""
+
+import os
+import tempfile
+from datetime import datetime
+
+from benchmarks.donnees import generer_projets, generer_revenus
+from benchmarks.outils import chronometrer
+from plan_financier.stockage import StockagePlan
+
+N_PROJETS = 100_000
+N_MODIFIES = 100
+
+
+def demarrage_a_froid(chemin):
+    """Ouvre la base et charge le plan comme une nouvelle session"""
+    stockage = StockagePlan(chemin)
+    projets = stockage.charger_items('projets')
+    revenus = stockage.charger_items('revenus_variables')
+    stockage.charger_admin_config()
+    return stockage, projets, revenus
+
+
+def main():
+    projets = generer_projets(N_PROJETS)
+    revenus = generer_revenus(50)
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'plan.db')
+        stockage = StockagePlan(chemin)
+        t_initial, _ = chronometrer(stockage.sauvegarder_items, 'projets', projets, repetitions=1)
+        stockage.sauvegarder_items('revenus_variables', revenus)
+        stockage.sauvegarder_admin_config({'kpis_config': {}})
+
+        t_froid, (session, projets_charges, _) = chronometrer(demarrage_a_froid, chemin, repetitions=3)
+        t_paresseux, ecrits = chronometrer(session.sauvegarder_items, 'projets', projets_charges, repetitions=3)
+        assert ecrits == 0
+        t_decodage, _ = chronometrer(lambda: [projet['nom'] for projet in projets_charges], repetitions=1)
+        assert projets_charges == projets
+
+        t_inchange, ecrits = chronometrer(session.sauvegarder_items, 'projets', projets_charges, repetitions=3)
+        assert ecrits == 0
+        maintenant = datetime.now()
+        for projet in projets_charges[::N_PROJETS // N_MODIFIES]:
+            projet['date_modification'] = maintenant
+        t_incremental, ecrits = chronometrer(session.sauvegarder_items, 'projets', projets_charges, repetitions=1)
+        assert ecrits == N_MODIFIES
+
+        taille = os.path.getsize(chemin) / 1e6
+        print(f"{N_PROJETS} projets, base de {taille:.1f} Mo")
+        print(f"  sauvegarde complète        : {t_initial * 1e3:8.1f} ms")
+        print(f"  démarrage à froid          : {t_froid * 1e3:8.1f} ms")
+        print(f"  sauvegarde, rien décodé    : {t_paresseux * 1e3:8.1f} ms")
+        print(f"  décodage de toutes pages   : {t_decodage * 1e3:8.1f} ms")
+        print(f"  sauvegarde sans changement : {t_inchange * 1e3:8.1f} ms")
+        print(f"  sauvegarde de {N_MODIFIES} lignes    : {t_incremental * 1e3:8.1f} ms")
+        session.fermer()
+        stockage.fermer()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Benchmark : vélocité par fenêtre glissante (SuiviMensuel) contre tri de l'historique"""
+
+import copy
+
+from benchmarks.donnees import generer_historique, generer_projets
+from benchmarks.outils import chronometrer
+from plan_financier.sante_projets import calculer_velocite_projet
+from plan_financier.suivi import SuiviMensuel
+
+N_PROJETS = 10_000
+HISTORIQUES = (12, 60, 240)
+
+
+def main():
+    print(f"{'mois':>6} {'tri (ms)':>10} {'fenêtre (ms)':>13} {'gain':>6}   (vélocité de {N_PROJETS} projets)")
+    for n_mois in HISTORIQUES:
+        projets_listes = generer_historique(generer_projets(N_PROJETS), n_mois=n_mois, allocations_par_projet=0)
+        # Historique saisi dans le désordre, comme après des corrections
+        for projet in projets_listes:
+            projet['suivi_mensuel'].reverse()
+        projets_suivis = copy.deepcopy(projets_listes)
+        for projet in projets_suivis:
+            projet['suivi_mensuel'] = SuiviMensuel(projet['suivi_mensuel'])
+
+        t_tri, attendu = chronometrer(lambda: [calculer_velocite_projet(p) for p in projets_listes])
+        t_fenetre, obtenu = chronometrer(lambda: [calculer_velocite_projet(p) for p in projets_suivis])
+        assert obtenu == attendu
+        print(f"{n_mois:>6} {t_tri * 1e3:>10.1f} {t_fenetre * 1e3:>13.2f} {t_tri / t_fenetre:>5.0f}x")
+
+    # Ajout d'un mois puis relecture de la vélocité, projet par projet
+    def ajouter_mois(projets):
+        for projet in projets:
+            projet['suivi_mensuel'].enregistrer('2099-01', 1000, 1000)
+            calculer_velocite_projet(projet)
+
+    t_ajout, _ = chronometrer(ajouter_mois, projets_suivis, repetitions=1)
+    print(f"\najout d'un mois + vélocité ({HISTORIQUES[-1]} mois d'historique) : "
+          f"{t_ajout / N_PROJETS * 1e6:.2f} µs par projet")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""Génération de données synthétiques pour les benchmarks (de 1 000 à 1 000 000 de projets)"""
+
+from datetime import datetime, date, timedelta
+
+import numpy as np
+
+from plan_financier.modeles import Projet, Revenu, configurer_nomenclatures
+
+# Valeurs par défaut de admin_config['listes_config']
+LISTES_CONFIG = {
+    'types_projet': ['Actif générateur', 'Passif', 'Investissement formation'],
+    'statuts_projet': ['Planifié', 'En cours', 'Développement', 'Réalisé', 'Suspendu'],
+    'priorites': ['Critique', 'Haute', 'Moyenne', 'Faible'],
+    'types_revenu': ['Salaire', 'Business', 'Loyer', 'Investissement', 'Épargne', 'Autre'],
+    'responsables': ['Alix', 'William', 'Famille']
+}
+TYPES_PROJET = LISTES_CONFIG['types_projet']
+STATUTS_PROJET = LISTES_CONFIG['statuts_projet']
+PRIORITES = LISTES_CONFIG['priorites']
+TYPES_REVENU = LISTES_CONFIG['types_revenu']
+RESPONSABLES = LISTES_CONFIG['responsables']
+
+DEBUT = datetime(2023, 1, 1)
+JOURS_CREATION = 900
+ROI_POSSIBLES = (0, 5, 10, 12, 18, 25)
+SECONDES_PAR_JOUR = 86_400
+
+
+def sources_financement(listes_config):
+    """Sources de financement plausibles : type de revenu et responsable, plus l'épargne"""
+    return [f"{type_revenu} {responsable}" for type_revenu in listes_config['types_revenu']
+            for responsable in listes_config['responsables']] + ['Épargne']
+
+
+def _multiples(rng, bas, haut, pas, n):
+    """n tirages uniformes parmi range(bas, haut, pas)"""
+    return bas + rng.integers(0, max((haut - bas) // pas, 1), n) * pas
+
+
+def _dates_creation(rng, n):
+    jours = rng.integers(0, JOURS_CREATION, n)
+    calendrier = [DEBUT + timedelta(days=jour) for jour in range(JOURS_CREATION)]
+    return jours, [calendrier[jour] for jour in jours.tolist()]
+
+
+def generer_projets(n, seed=0, listes_config=None, compact=False):
+    """Génère n projets au format de st.session_state.projets.
+
+    Les valeurs codées (type, statut, priorité, responsable) sont tirées des listes
+    de `listes_config` ; les tirages sont vectorisés puis assemblés en une boucle.
+    Avec `compact`, les projets sont des enregistrements Projet (__slots__).
+    """
+    listes = listes_config or LISTES_CONFIG
+    rng = np.random.default_rng(seed)
+    types = listes['types_projet']
+    statuts = listes['statuts_projet']
+    sources = sources_financement(listes)
+
+    codes_type = rng.integers(0, len(types), n)
+    montant_total = _multiples(rng, 100_000, 10_000_000, 1000, n)
+    budget = _multiples(rng, 10_000, 800_000, 1000, n)
+    utilise = (rng.random(n) * montant_total / 1000).astype(np.int64) * 1000
+    # Actifs : cash flow de -200 000 à 400 000 ; autres : -budget dans 70 % des cas
+    actif = np.array([types[code] == TYPES_PROJET[0] for code in range(len(types))])[codes_type]
+    cash_flow = np.where(
+        actif,
+        _multiples(rng, -200_000, 400_000, 1000, n),
+        np.where(rng.random(n) < 0.7, -budget, 0)
+    )
+    # Projets presque terminés : statut Réalisé, les autres au hasard
+    codes_statut = np.where(
+        utilise >= montant_total * 0.95,
+        statuts.index('Réalisé') if 'Réalisé' in statuts else 0,
+        rng.integers(0, len(statuts), n)
+    )
+    jours, creations = _dates_creation(rng, n)
+    echeances = DEBUT.toordinal() + jours + rng.integers(30, 1200, n)
+    roi = np.asarray(ROI_POSSIBLES)[rng.integers(0, len(ROI_POSSIBLES), n)]
+    priorites = rng.integers(0, len(listes['priorites']), n)
+    responsables = rng.integers(0, len(listes['responsables']), n)
+    codes_source = rng.integers(0, len(sources), n)
+
+    if compact:
+        configurer_nomenclatures(listes)
+    projets = []
+    for i, (code_type, total, montant_budget, montant_utilise, flux, code_statut, creation, echeance, rendement,
+            priorite, responsable, source) in enumerate(zip(
+                codes_type.tolist(), montant_total.tolist(), budget.tolist(), utilise.tolist(), cash_flow.tolist(),
+                codes_statut.tolist(), creations, echeances.tolist(), roi.tolist(), priorites.tolist(),
+                responsables.tolist(), codes_source.tolist()), start=1):
+        responsable = listes['responsables'][responsable]
+        projet = {
+            'id': i,
+            'nom': f'Projet {i}',
+            'type': types[code_type],
+            'montant_total': total,
+            'budget_alloue_mensuel': montant_budget,
+            'montant_utilise_reel': montant_utilise,
+            'cash_flow_mensuel': flux,
+            'statut': statuts[code_statut],
+            'echeance': date.fromordinal(echeance),
+            'roi_attendu': rendement,
+            'priorite': listes['priorites'][priorite],
+            'description': '',
+            'source_financement': sources[source],
+            'responsable': responsable,
+            'date_creation': creation,
+            'date_modification': creation,
+            'created_by': responsable,
+            'updated_by': responsable,
+            'suivi_mensuel': [],
+            'allocations_recues': []
+        }
+        projets.append(Projet(projet) if compact else projet)
+    return projets
+
+
+def generer_revenus(n, seed=0, listes_config=None, compact=False):
+    """Génère n revenus au format de st.session_state.revenus_variables"""
+    listes = listes_config or LISTES_CONFIG
+    rng = np.random.default_rng(seed)
+    montants = _multiples(rng, 50_000, 2_000_000, 1000, n)
+    types = rng.integers(0, len(listes['types_revenu']), n)
+    reguliers = rng.random(n) < 0.7
+    responsables = rng.integers(0, len(listes['responsables']), n)
+    _, creations = _dates_creation(rng, n)
+
+    if compact:
+        configurer_nomenclatures(listes)
+    revenus = []
+    for i, (montant, code_type, regulier, responsable, creation) in enumerate(zip(
+            montants.tolist(), types.tolist(), reguliers.tolist(), responsables.tolist(), creations), start=1):
+        responsable = listes['responsables'][responsable]
+        revenu = {
+            'id': i,
+            'nom': f'Revenu {i}',
+            'montant_mensuel': montant,
+            'type': listes['types_revenu'][code_type],
+            'regulier': regulier,
+            'responsable': responsable,
+            'date_creation': creation,
+            'date_modification': creation,
+            'date_disponibilite': creation.date(),
+            'created_by': responsable,
+            'updated_by': responsable,
+            'allocations': []
+        }
+        revenus.append(Revenu(revenu) if compact else revenu)
+    return revenus
+
+
+def generer_historique(projets, n_mois=12, allocations_par_projet=4, n_revenus=5, seed=0, revenus=None):
+    """Ajoute suivi_mensuel et allocations_recues aux projets générés.
+
+    Le suivi couvre n_mois mois à partir de la création (réel autour du budget) ;
+    les allocations viennent de `revenus` s'ils sont fournis, sinon de revenus
+    fictifs numérotés de 1 à n_revenus, et sont horodatées dans leur mois. Elles
+    sont au format à listes imbriquées, repris dans le grand livre par
+    GrandLivre.depuis_projets (ou par PlanFinancier créé sans grand livre).
+    """
+    rng = np.random.default_rng(seed)
+    n = len(projets)
+    if revenus is None:
+        sources = [(i, f'Revenu {i}') for i in range(1, n_revenus + 1)]
+    else:
+        sources = [(revenu['id'], revenu['nom']) for revenu in revenus]
+    reel = (rng.random((n, n_mois)) * 1.2).tolist()
+    choix_revenus = rng.integers(0, len(sources), (n, allocations_par_projet)).tolist()
+    choix_mois = rng.integers(0, max(n_mois, 1), (n, allocations_par_projet)).tolist()
+    parts = rng.random((n, allocations_par_projet)).tolist()
+    secondes = rng.integers(0, 28 * SECONDES_PAR_JOUR, (n, allocations_par_projet)).tolist()
+
+    for i, projet in enumerate(projets):
+        budget = projet['budget_alloue_mensuel']
+        creation = projet['date_creation']
+        annee, mois = creation.year, creation.month
+        debuts_mois = []
+        suivis = []
+        for facteur in reel[i]:
+            debuts_mois.append(datetime(annee, mois, 1))
+            suivis.append({'mois': f'{annee}-{mois:02d}', 'prevu': budget, 'reel': int(budget * facteur) // 1000 * 1000})
+            annee, mois = (annee + 1, 1) if mois == 12 else (annee, mois + 1)
+        projet['suivi_mensuel'] = suivis
+        allocations = []
+        for revenu, position, part, seconde in zip(choix_revenus[i], choix_mois[i], parts[i], secondes[i]):
+            revenu_id, revenu_nom = sources[revenu]
+            debut_mois = debuts_mois[position] if suivis else datetime(2025, 1, 1)
+            allocations.append({
+                'revenu_id': revenu_id,
+                'revenu_nom': revenu_nom,
+                'montant': 1000 + int(part * budget) // 1000 * 1000,
+                'mois': f'{debut_mois.year}-{debut_mois.month:02d}',
+                'date_allocation': debut_mois + timedelta(seconds=seconde)
+            })
+        projet['allocations_recues'] = allocations
+    return projets
+
+
+def generer_plan(n_projets, n_revenus=20, n_mois=12, allocations_par_projet=4, seed=0, listes_config=None,
+                 compact=False):
+    """Plan complet cohérent : projets avec historique alloué depuis les revenus générés"""
+    revenus = generer_revenus(n_revenus, seed=seed, listes_config=listes_config, compact=compact)
+    projets = generer_projets(n_projets, seed=seed, listes_config=listes_config, compact=compact)
+    generer_historique(projets, n_mois=n_mois, allocations_par_projet=allocations_par_projet, seed=seed,
+                       revenus=revenus)
+    return projets, revenus
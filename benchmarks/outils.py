@@ -0,0 +1,14 @@
+"""Outils de mesure communs aux benchmarks"""
+
+import time
+
+
+def chronometrer(fonction, *args, repetitions=5, **kwargs):
+    """Retourne le meilleur temps (secondes) sur plusieurs exécutions et le dernier résultat"""
+    meilleur = float('inf')
+    resultat = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction(*args, **kwargs)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur, resultat
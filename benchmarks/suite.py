@@ -0,0 +1,227 @@
+"""Suite de benchmarks sans Streamlit, résultats en JSON comparables d'une exécution à l'autre.
+
+Exemples :
+    python -m benchmarks.suite --tailles 1000 10000 100000
+    python -m benchmarks.suite --tailles 1000000 --n-mois 0 --cas calculer_kpis filter_by_date
+    python -m benchmarks.suite --comparer benchmarks/resultats/suite_precedente.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.donnees import generer_plan
+from plan_financier.index_dates import IndexDates
+from plan_financier.moteur import PlanFinancier
+from plan_financier.sante_projets import calculer_probabilite_reussite, categorize_project, evaluer_sante_projets
+from plan_financier.table_projets import TableProjets
+
+DOSSIER_RESULTATS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultats')
+TEMPS_MIN = 0.5
+TOURS_MIN = 3
+TOURS_MAX = 50
+SEUIL_REGRESSION = 1.25
+
+CAS = {}
+
+
+def cas(nom):
+    """Enregistre un cas : fonction(contexte) qui retourne l'appel à chronométrer"""
+    def decorateur(preparer):
+        CAS[nom] = preparer
+        return preparer
+    return decorateur
+
+
+@cas('calculer_kpis')
+def _calculer_kpis(ctx):
+    return lambda: ctx['plan'].calculer_kpis()
+
+
+@cas('calculer_kpis_filtre')
+def _calculer_kpis_filtre(ctx):
+    projets_filtres = ctx['plan'].filtrer_par_date(ctx['projets'], 'projet', 2024, '06')
+    return lambda: ctx['plan'].calculer_kpis(projets_filtres)
+
+
+@cas('construire_table_projets')
+def _construire_table(ctx):
+    return lambda: TableProjets.depuis_projets(ctx['projets'])
+
+
+@cas('filter_by_date')
+def _filter_by_date(ctx):
+    return lambda: ctx['plan'].filtrer_par_date(ctx['projets'], 'projet', 2024, '06')
+
+
+@cas('construire_index_dates')
+def _construire_index_dates(ctx):
+    return lambda: IndexDates.depuis_items(ctx['projets'], 'projet')
+
+
+@cas('allouer_revenu_aux_projets')
+def _allouer_revenu(ctx):
+    revenu = ctx['revenus'][0]
+    pas = max(len(ctx['projets']) // 20, 1)
+    cibles = [projet['id'] for projet in ctx['projets'][::pas][:20]]
+    # Montant différent à chaque tour : une allocation inchangée n'écrit rien au grand livre
+    montants = itertools.count(1000, 1000)
+
+    def allouer():
+        montant = next(montants)
+        allocations = [{'projet_id': projet_id, 'montant': montant, 'mois': '2025-01'} for projet_id in cibles]
+        succes, message = ctx['plan'].allouer_revenu(revenu['id'], allocations)
+        assert succes, message
+    return allouer
+
+
+@cas('proposer_allocations')
+def _proposer_allocations(ctx):
+    return lambda: ctx['plan'].proposer_allocations('2025-02')
+
+
+@cas('categorize_project')
+def _categorize_project(ctx):
+    return lambda: [categorize_project(projet) for projet in ctx['projets']]
+
+
+@cas('calculer_probabilite_reussite')
+def _calculer_probabilite(ctx):
+    return lambda: [calculer_probabilite_reussite(projet) for projet in ctx['projets']]
+
+
+@cas('evaluer_sante_projets')
+def _evaluer_sante(ctx):
+    return lambda: evaluer_sante_projets(ctx['plan'].obtenir_table_projets())
+
+
+def mesurer(appel):
+    """Exécute l'appel jusqu'à TEMPS_MIN secondes (entre TOURS_MIN et TOURS_MAX tours)"""
+    durees = []
+    debut_total = time.perf_counter()
+    while len(durees) < TOURS_MAX and (len(durees) < TOURS_MIN or time.perf_counter() - debut_total < TEMPS_MIN):
+        debut = time.perf_counter()
+        appel()
+        durees.append(time.perf_counter() - debut)
+    return {
+        'min': min(durees),
+        'max': max(durees),
+        'mean': statistics.fmean(durees),
+        'stddev': statistics.stdev(durees) if len(durees) > 1 else 0.0,
+        'median': statistics.median(durees),
+        'rounds': len(durees),
+        'ops': 1 / statistics.fmean(durees)
+    }
+
+
+def preparer_contexte(taille, n_mois, seed):
+    """Données générées et moteur du plan (index construits) partagés par les cas d'une taille"""
+    projets, revenus = generer_plan(taille, n_mois=n_mois, allocations_par_projet=2 if n_mois else 0, seed=seed)
+    # Revenu assez élevé pour que les allocations répétées restent valides
+    revenus[0]['montant_mensuel'] = 10 ** 12
+    plan = PlanFinancier(projets, revenus, {})
+    plan.obtenir_table_projets()
+    plan.obtenir_index_dates('projet')
+    plan.obtenir_index_ids('projet')
+    plan.obtenir_index_ids('revenu')
+    plan.obtenir_agregats()
+    return {'projets': projets, 'revenus': revenus, 'plan': plan}
+
+
+def _commit():
+    try:
+        sortie = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(DOSSIER_RESULTATS), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return sortie.stdout.strip() or None
+
+
+def infos_machine():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'systeme': platform.platform(),
+        'processeur': platform.processor() or platform.machine(),
+        'coeurs': os.cpu_count(),
+        'numpy': np.__version__
+    }
+
+
+def comparer(resultats, reference, seuil=SEUIL_REGRESSION):
+    """Affiche le rapport des médianes avec une exécution précédente ; retourne les régressions"""
+    precedents = {(b['name'], b['params']['taille']): b['stats'] for b in reference['benchmarks']}
+    regressions = []
+    print(f"\nComparaison avec {reference.get('commit') or '?'} du {reference['datetime']}")
+    print(f"{'cas':<32} {'taille':>8} {'avant (ms)':>11} {'après (ms)':>11} {'ratio':>7}")
+    for benchmark in resultats['benchmarks']:
+        cle = (benchmark['name'], benchmark['params']['taille'])
+        if cle not in precedents:
+            continue
+        avant = precedents[cle]['median']
+        apres = benchmark['stats']['median']
+        ratio = apres / avant if avant else float('inf')
+        marque = '  ⚠' if ratio > seuil else ''
+        if ratio > seuil:
+            regressions.append((cle, ratio))
+        print(f"{cle[0]:<32} {cle[1]:>8} {avant * 1e3:>11.3f} {apres * 1e3:>11.3f} {ratio:>7.2f}{marque}")
+    return regressions
+
+
+def main(arguments=None):
+    parseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parseur.add_argument('--tailles', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parseur.add_argument('--n-mois', type=int, default=6, help="mois de suivi générés par projet")
+    parseur.add_argument('--cas', nargs='+', choices=sorted(CAS), help="cas à exécuter (tous par défaut)")
+    parseur.add_argument('--seed', type=int, default=0)
+    parseur.add_argument('--sortie', help="fichier JSON de résultats (par défaut dans benchmarks/resultats/)")
+    parseur.add_argument('--comparer', help="fichier JSON d'une exécution précédente")
+    parseur.add_argument('--seuil', type=float, default=SEUIL_REGRESSION, help="ratio de médianes signalé")
+    args = parseur.parse_args(arguments)
+
+    noms = args.cas or list(CAS)
+    resultats = {
+        'datetime': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'machine_info': infos_machine(),
+        'params': {'n_mois': args.n_mois, 'seed': args.seed},
+        'benchmarks': []
+    }
+    print(f"{'cas':<32} {'taille':>8} {'médiane (ms)':>13} {'min (ms)':>10} {'tours':>6}")
+    for taille in args.tailles:
+        contexte = preparer_contexte(taille, args.n_mois, args.seed)
+        for nom in noms:
+            stats = mesurer(CAS[nom](contexte))
+            resultats['benchmarks'].append({'name': nom, 'params': {'taille': taille}, 'stats': stats})
+            print(f"{nom:<32} {taille:>8} {stats['median'] * 1e3:>13.3f} {stats['min'] * 1e3:>10.3f} "
+                  f"{stats['rounds']:>6}")
+        del contexte
+
+    sortie = args.sortie
+    if sortie is None:
+        os.makedirs(DOSSIER_RESULTATS, exist_ok=True)
+        sortie = os.path.join(DOSSIER_RESULTATS, f"suite_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(sortie, 'w', encoding='utf-8') as fichier:
+        json.dump(resultats, fichier, ensure_ascii=False, indent=2)
+    print(f"\nRésultats : {sortie}")
+
+    if args.comparer:
+        with open(args.comparer, encoding='utf-8') as fichier:
+            regressions = comparer(resultats, json.load(fichier), args.seuil)
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de x{args.seuil}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Logique métier du Plan Financier Familial, indépendante de Streamlit"""
@@ -0,0 +1,152 @@
+"""Agrégats mensuels matérialisés du suivi et des allocations, tenus à jour par deltas"""
+
+MESURES = ('prevu', 'reel', 'alloue', 'nb_allocations')
+PREVU, REEL, ALLOUE, NB_ALLOCATIONS = range(len(MESURES))
+DIMENSIONS = ('type', 'responsable', 'source_financement')
+
+
+def _cle_projet(projet):
+    return tuple(projet.get(dimension) for dimension in DIMENSIONS)
+
+
+def _en_dict(valeurs):
+    return dict(zip(MESURES, valeurs))
+
+
+class AgregatsMensuels:
+    """Totaux par (mois, type, responsable, source_financement) et par (mois, revenu).
+
+    Les contributions d'un projet (son suivi et ses allocations du grand livre)
+    sont ajoutées lorsqu'il est indexé, puis mises à jour par deltas :
+    `enregistrer_suivi` pour une saisie ou correction de suivi,
+    `ajouter_allocation` pour une allocation inscrite au grand livre.
+    `mettre_a_jour` ne gère que le changement des dimensions d'un projet (son
+    historique doit être inchangé). Les requêtes d'un mois ne lisent que les
+    quelques lignes de ce mois.
+    """
+
+    def __init__(self, grand_livre=None):
+        self.grand_livre = grand_livre
+        self.lignes = {}
+        # mois -> {revenu_id: montant alloué}
+        self.revenus = {}
+        self.cles_par_mois = {}
+        self.projets = {}
+        self.taille = 0
+
+    @classmethod
+    def depuis_projets(cls, projets, grand_livre=None):
+        """Construit les agrégats en une passe sur les projets puis une sur le grand livre"""
+        agregats = cls()
+        for projet in projets:
+            agregats.ajouter(projet)
+        agregats.grand_livre = grand_livre
+        if grand_livre is not None:
+            for projet_id, revenu_id, montant, mois in grand_livre.allocations():
+                agregats.ajouter_allocation(projet_id, revenu_id, montant, mois)
+        return agregats
+
+    def _ligne(self, mois, cle):
+        cle_ligne = (mois,) + cle
+        ligne = self.lignes.get(cle_ligne)
+        if ligne is None:
+            ligne = self.lignes[cle_ligne] = [0] * len(MESURES)
+            self.cles_par_mois.setdefault(mois, set()).add(cle_ligne)
+        return ligne
+
+    def _contribuer(self, projet, cle, signe):
+        """Ajoute (signe=1) ou retire (signe=-1) tout l'historique d'un projet"""
+        for suivi in projet.get('suivi_mensuel') or ():
+            ligne = self._ligne(suivi['mois'], cle)
+            ligne[PREVU] += signe * suivi['prevu']
+            ligne[REEL] += signe * suivi['reel']
+        if self.grand_livre is not None:
+            for _, revenu_id, montant, mois in self.grand_livre.allocations_projet(projet['id']):
+                self._allouer(revenu_id, signe * montant, mois, cle, signe)
+
+    def _allouer(self, revenu_id, montant, mois, cle, signe=1):
+        ligne = self._ligne(mois, cle)
+        ligne[ALLOUE] += montant
+        ligne[NB_ALLOCATIONS] += signe
+        par_revenu = self.revenus.setdefault(mois, {})
+        par_revenu[revenu_id] = par_revenu.get(revenu_id, 0) + montant
+
+    def ajouter(self, projet):
+        """Ajoute les contributions d'un nouveau projet"""
+        self.taille += 1
+        if projet['id'] in self.projets:
+            return
+        cle = _cle_projet(projet)
+        self.projets[projet['id']] = (projet, cle)
+        self._contribuer(projet, cle, 1)
+
+    def supprimer(self, projet_id):
+        """Retire les contributions d'un projet"""
+        entree = self.projets.pop(projet_id, None)
+        if entree is not None:
+            self.taille -= 1
+            projet, cle = entree
+            self._contribuer(projet, cle, -1)
+
+    def mettre_a_jour(self, projet):
+        """Déplace les contributions d'un projet dont une dimension a changé"""
+        entree = self.projets.get(projet['id'])
+        if entree is None:
+            self.ajouter(projet)
+            return
+        cle = _cle_projet(projet)
+        if cle != entree[1]:
+            self._contribuer(projet, entree[1], -1)
+            self._contribuer(projet, cle, 1)
+            self.projets[projet['id']] = (projet, cle)
+
+    def reassigner_id(self, ancien_id, nouvel_id):
+        """Change l'id d'un projet"""
+        self.projets[nouvel_id] = self.projets.pop(ancien_id)
+
+    def reassigner_revenu(self, ancien_id, nouvel_id):
+        """Change l'id d'un revenu dans les totaux par revenu"""
+        for par_revenu in self.revenus.values():
+            if ancien_id in par_revenu:
+                par_revenu[nouvel_id] = par_revenu.get(nouvel_id, 0) + par_revenu.pop(ancien_id)
+
+    def enregistrer_suivi(self, projet, mois, ancien, prevu, reel):
+        """Applique la saisie d'un suivi ; `ancien` vaut (prevu, reel) en cas de correction, sinon None"""
+        ligne = self._ligne(mois, self.projets[projet['id']][1])
+        ancien_prevu, ancien_reel = ancien or (0, 0)
+        ligne[PREVU] += prevu - ancien_prevu
+        ligne[REEL] += reel - ancien_reel
+
+    def ajouter_allocation(self, projet_id, revenu_id, montant, mois):
+        """Applique une allocation inscrite au grand livre (ignorée si le projet n'est pas indexé)"""
+        entree = self.projets.get(projet_id)
+        if entree is not None:
+            self._allouer(revenu_id, montant, mois, entree[1])
+
+    def mois(self):
+        """Mois présents dans les agrégats, triés"""
+        return sorted(self.cles_par_mois)
+
+    def totaux(self, mois, dimension=None):
+        """Mesures d'un mois, au total ou ventilées selon une dimension (type, responsable...)"""
+        position = DIMENSIONS.index(dimension) + 1 if dimension else None
+        resultats = {}
+        for cle_ligne in self.cles_par_mois.get(mois, ()):
+            groupe = cle_ligne[position] if position else None
+            cumul = resultats.setdefault(groupe, [0] * len(MESURES))
+            for i, valeur in enumerate(self.lignes[cle_ligne]):
+                cumul[i] += valeur
+        if not dimension:
+            return _en_dict(resultats.get(None, [0] * len(MESURES)))
+        return {groupe: _en_dict(valeurs) for groupe, valeurs in resultats.items()}
+
+    def totaux_par_mois(self):
+        """Mesures totales de chaque mois, dans l'ordre chronologique"""
+        return {mois: self.totaux(mois) for mois in self.mois()}
+
+    def allocations_par_revenu(self, mois):
+        """Montants alloués dans un mois, par id de revenu"""
+        return {revenu_id: montant for revenu_id, montant in self.revenus.get(mois, {}).items() if montant}
+
+    def __len__(self):
+        return self.taille
@@ -0,0 +1,127 @@
+"""Allocation dynamique des revenus aux projets"""
+
+from datetime import datetime
+
+import numpy as np
+
+from plan_financier.formatage import format_currency
+from plan_financier.grand_livre import code_mois, texte_mois
+
+# Clé de regroupement (revenu, mois) : rang du revenu dans les bits de poids fort
+_BITS_MOIS = 20
+_MASQUE_MOIS = (1 << _BITS_MOIS) - 1
+
+
+def _valider_lots(index_revenus, lots):
+    """Valide tous les lots en une passe : revenus existants et totaux dans les limites.
+
+    Deux totaux sont contrôlés contre le montant mensuel du revenu : celui de
+    chaque lot, tous mois confondus (comme un appel unitaire), et celui d'un
+    revenu pour un mois, tous lots confondus (deux lots du même revenu et du même
+    mois se cumulent). Retourne (revenus, message_erreur) ; message_erreur vaut
+    None si tout est valide.
+    """
+    revenus = []
+    rangs = {}
+    for revenu_id, _ in lots:
+        revenu = index_revenus.obtenir(revenu_id)
+        if not revenu:
+            return None, "Revenu introuvable" if len(lots) == 1 else f"Revenu introuvable (id {revenu_id})"
+        revenus.append(revenu)
+        rangs.setdefault(revenu_id, len(rangs))
+
+    # Totaux par (revenu, mois) en une seule réduction groupée (montants FCFA entiers, exacts en float64)
+    tailles = [len(allocations_list) for _, allocations_list in lots]
+    n = sum(tailles)
+    montants = np.fromiter(
+        (alloc['montant'] for _, allocations_list in lots for alloc in allocations_list), dtype=np.float64, count=n
+    )
+    mois = np.fromiter(
+        (code_mois(alloc['mois']) for _, allocations_list in lots for alloc in allocations_list), dtype=np.int64, count=n
+    )
+    disponibles_lots = np.fromiter((r['montant_mensuel'] for r in revenus), dtype=np.float64, count=len(lots))
+    totaux_lots = np.bincount(np.repeat(np.arange(len(lots)), tailles), weights=montants, minlength=len(lots))
+    depassements = np.flatnonzero(totaux_lots > disponibles_lots)
+    if len(depassements):
+        i = depassements[0]
+        revenu = revenus[i]
+        message = (f"Total alloué ({format_currency(int(totaux_lots[i]))}) "
+                   f"dépasse le revenu disponible ({format_currency(revenu['montant_mensuel'])})")
+        return None, message if len(lots) == 1 else f"{revenu['nom']} : {message}"
+
+    rangs_lots = np.fromiter((rangs[revenu_id] for revenu_id, _ in lots), dtype=np.int64, count=len(lots))
+    cles, groupes = np.unique((np.repeat(rangs_lots, tailles) << _BITS_MOIS) | mois, return_inverse=True)
+    totaux = np.bincount(groupes, weights=montants, minlength=len(cles))
+    par_rang = {rangs[revenu['id']]: revenu for revenu in revenus}
+    revenus_cles = [par_rang[rang] for rang in (cles >> _BITS_MOIS).tolist()]
+    disponibles = np.fromiter((r['montant_mensuel'] for r in revenus_cles), dtype=np.float64, count=len(cles))
+
+    depassements = np.flatnonzero(totaux > disponibles)
+    if len(depassements):
+        i = depassements[0]
+        revenu = revenus_cles[i]
+        message = (f"Total alloué en {texte_mois(int(cles[i] & _MASQUE_MOIS))} ({format_currency(int(totaux[i]))}) "
+                   f"dépasse le revenu disponible ({format_currency(revenu['montant_mensuel'])})")
+        return None, message if len(lots) == 1 else f"{revenu['nom']} : {message}"
+    return revenus, None
+
+
+def allouer_revenus_en_lot(index_revenus, index_projets, lots, grand_livre, utilisateur=None, agregats=None,
+                           fonds_urgence=None, mettre_a_jour_revenus=True):
+    """Alloue plusieurs revenus en une transaction : tout est appliqué ou rien.
+
+    `lots` est une liste de paires (revenu_id, allocations_list). Toutes les
+    validations et la préparation des écritures ont lieu avant la moindre
+    modification ; un seul horodatage est utilisé pour l'ensemble du lot. Pour
+    chaque (revenu, mois) du lot, les allocations fixent la répartition complète
+    au grand livre, qui n'ajoute que les écarts : relancer une allocation ne la
+    duplique pas, et un projet retiré de la répartition est contrepassé. Les
+    projets dont l'allocation change sont horodatés ; les agrégats mensuels et le
+    fonds d'urgence fournis reçoivent chaque écart inscrit. Chaque revenu reçoit
+    ses lots comme liste `allocations`, sauf si `mettre_a_jour_revenus` est faux
+    (allocations du planificateur, inscrites au seul grand livre).
+    """
+    revenus, erreur = _valider_lots(index_revenus, lots)
+    if erreur:
+        return False, erreur
+
+    # Préparation de toutes les écritures (aucune mutation à ce stade)
+    maintenant = datetime.now()
+    par_revenu = {}
+    montants = {}
+    for revenu, (revenu_id, allocations_list) in zip(revenus, lots):
+        par_revenu.setdefault(revenu_id, (revenu, []))[1].extend(allocations_list)
+        for allocation in allocations_list:
+            projets = montants.setdefault((revenu_id, allocation['mois']), {})
+            if allocation['projet_id'] in index_projets:
+                projets[allocation['projet_id']] = projets.get(allocation['projet_id'], 0) + allocation['montant']
+
+    # Application en une étape
+    for revenu, allocations_list in par_revenu.values() if mettre_a_jour_revenus else ():
+        revenu['allocations'] = allocations_list
+        revenu['date_modification'] = maintenant
+        if utilisateur:
+            revenu['updated_by'] = utilisateur
+    for (revenu_id, mois), projets in montants.items():
+        ecarts = grand_livre.fixer_allocations(revenu_id, mois, projets, maintenant, utilisateur)
+        for projet_id, ecart in ecarts.items():
+            projet = index_projets.obtenir(projet_id)
+            if projet:
+                projet['date_modification'] = maintenant
+                if utilisateur:
+                    projet['updated_by'] = utilisateur
+            if agregats is not None:
+                agregats.ajouter_allocation(projet_id, revenu_id, ecart, mois)
+            if fonds_urgence is not None:
+                fonds_urgence.ajouter_allocation(revenu_id, ecart)
+
+    if len(lots) == 1:
+        return True, "Allocation réalisée avec succès"
+    return True, f"{len(lots)} allocations réalisées avec succès"
+
+
+def allouer_revenu(index_revenus, index_projets, revenu_id, allocations_list, grand_livre, utilisateur=None,
+                   agregats=None, fonds_urgence=None):
+    """Alloue un revenu à plusieurs projets avec validation (recherches par id en O(1))"""
+    return allouer_revenus_en_lot(index_revenus, index_projets, [(revenu_id, allocations_list)], grand_livre,
+                                  utilisateur, agregats, fonds_urgence)
@@ -0,0 +1,192 @@
+"""Graphiques d'analyse construits sur des cadres pré-agrégés, avec séries réduites (LTTB)"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from plan_financier.grand_livre import ALLOCATION, texte_mois
+
+# Au-delà de SEUIL_WEBGL points avant réduction, une trace est rendue en WebGL (Scattergl)
+SEUIL_WEBGL = 1000
+# Nombre de points conservés par série longue après réduction LTTB
+POINTS_MAX = 800
+# Projets affichés individuellement dans le Sankey (les autres sont regroupés)
+PROJETS_SANKEY_MAX = 15
+AUTRES_PROJETS = 'Autres projets'
+
+COULEURS_TYPES = {
+    'Actif générateur': '#00aa00',
+    'Passif': '#ff4444',
+    'Investissement formation': '#007bff'
+}
+
+
+def lttb(x, y, n_points):
+    """Indices des points retenus par l'algorithme Largest-Triangle-Three-Buckets.
+
+    Le premier et le dernier point sont toujours conservés ; dans chaque seau, on
+    garde le point qui forme le plus grand triangle avec le point retenu précédent
+    et la moyenne du seau suivant, ce qui préserve pics et creux de la série.
+    """
+    n = len(x)
+    if n_points >= n or n_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bornes = np.linspace(1, n - 1, n_points - 1).astype(np.intp)
+    indices = np.empty(n_points, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+    precedent = 0
+    for seau in range(n_points - 2):
+        debut, fin = bornes[seau], bornes[seau + 1]
+        fin_suivant = bornes[seau + 2] if seau + 2 < len(bornes) else n
+        moyenne_x = x[fin:fin_suivant].mean()
+        moyenne_y = y[fin:fin_suivant].mean()
+        aires = np.abs(
+            (x[precedent] - moyenne_x) * (y[debut:fin] - y[precedent])
+            - (x[precedent] - x[debut:fin]) * (moyenne_y - y[precedent])
+        )
+        precedent = debut + int(aires.argmax())
+        indices[seau + 1] = precedent
+    return indices
+
+
+def reduire_serie(x, y, n_points=POINTS_MAX):
+    """Réduit une série (x numérique ou datetime64) à au plus n_points points"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    x_numerique = x.astype('datetime64[ns]').astype(np.int64) if x.dtype.kind == 'M' else x
+    indices = lttb(x_numerique, y, n_points)
+    return x[indices], y[indices]
+
+
+def trace_ligne(x, y, n_points=POINTS_MAX, **options):
+    """Trace de ligne réduite par LTTB, en WebGL si la série d'origine est volumineuse"""
+    classe = go.Scattergl if len(x) > SEUIL_WEBGL else go.Scatter
+    x, y = reduire_serie(x, y, n_points)
+    return classe(x=x, y=y, mode='lines', **options)
+
+
+def _cadre_allocations(projets, grand_livre, revenus):
+    """Allocations des projets lues directement dans les colonnes du grand livre"""
+    positions = grand_livre.positions(ALLOCATION, projet_ids=(projet['id'] for projet in projets))
+    projet_ids = pd.Series(grand_livre.projet_ids[positions])
+    revenu_ids = pd.Series(grand_livre.revenu_ids[positions])
+    codes_mois, inverse = np.unique(grand_livre.mois[positions], return_inverse=True)
+    mois = np.array([texte_mois(code) for code in codes_mois.tolist()], dtype=object)[inverse.ravel()]
+    noms_revenus = revenu_ids.map({revenu['id']: revenu['nom'] for revenu in revenus})
+    return pd.DataFrame({
+        'date_allocation': grand_livre.horodatages[positions],
+        'mois': mois,
+        'revenu_nom': noms_revenus.fillna('Revenu ' + revenu_ids.astype(str)),
+        'projet_id': projet_ids,
+        'projet_nom': projet_ids.map({projet['id']: projet['nom'] for projet in projets}),
+        'type': projet_ids.map({projet['id']: projet['type'] for projet in projets}),
+        'montant': grand_livre.montants[positions]
+    })
+
+
+def construire_cadres(projets, grand_livre, revenus=()):
+    """Agrège en une passe le suivi et les montants par type, et les allocations du grand livre.
+
+    Retourne un dict de DataFrames :
+      - suivi : prevu et reel par (mois, type)
+      - allocations : montant par (date_allocation, mois, revenu_nom, projet_id, projet_nom, type)
+      - types : nombre de projets et montants par type
+    """
+    suivis = []
+    types = []
+    for projet in projets:
+        type_projet = projet['type']
+        types.append((type_projet, projet['montant_total'], projet['montant_utilise_reel'],
+                      projet['budget_alloue_mensuel']))
+        for suivi in projet.get('suivi_mensuel') or ():
+            suivis.append((suivi['mois'], type_projet, suivi['prevu'], suivi['reel']))
+
+    # to_numeric : colonnes numériques même sans aucune ligne
+    suivi = pd.DataFrame(suivis, columns=['mois', 'type', 'prevu', 'reel'])
+    suivi[['prevu', 'reel']] = suivi[['prevu', 'reel']].apply(pd.to_numeric)
+    suivi = suivi.groupby(['mois', 'type'], as_index=False).sum()
+    allocations = _cadre_allocations(projets, grand_livre, revenus)
+    allocations = allocations.groupby(['date_allocation', 'mois', 'revenu_nom', 'projet_id', 'projet_nom', 'type'],
+                                      as_index=False, dropna=False)['montant'].sum()
+    types = pd.DataFrame(types, columns=['type', 'montant_total', 'montant_utilise_reel', 'budget_alloue_mensuel'])
+    types = types.groupby('type').agg(
+        nombre=('montant_total', 'size'),
+        montant_total=('montant_total', 'sum'),
+        montant_utilise_reel=('montant_utilise_reel', 'sum'),
+        budget_alloue_mensuel=('budget_alloue_mensuel', 'sum')
+    ).reset_index()
+    return {'suivi': suivi, 'allocations': allocations, 'types': types}
+
+
+def figure_prevu_reel(suivi, n_points=POINTS_MAX):
+    """Prévu vs réel par mois, tous types confondus, avec l'écart en barres"""
+    mensuel = suivi.groupby('mois')[['prevu', 'reel']].sum().sort_index()
+    mois = pd.to_datetime(mensuel.index, format='%Y-%m').to_numpy()
+    fig = go.Figure([
+        trace_ligne(mois, mensuel['prevu'].to_numpy(), n_points, name='Prévu', line=dict(color='#999999', dash='dash')),
+        trace_ligne(mois, mensuel['reel'].to_numpy(), n_points, name='Réel', line=dict(color='#007bff')),
+        go.Bar(x=mensuel.index, y=(mensuel['reel'] - mensuel['prevu']).to_numpy(), name='Écart',
+               marker_color='rgba(255,136,0,0.5)')
+    ])
+    fig.update_layout(title="Prévu vs réel (FCFA)", height=400, margin=dict(t=40, b=20),
+                      xaxis=dict(type='date'))
+    return fig
+
+
+def figure_allocations_cumulees(allocations, n_points=POINTS_MAX):
+    """Allocations cumulées dans le temps, une courbe par type de projet"""
+    fig = go.Figure()
+    datees = allocations.dropna(subset=['date_allocation'])
+    for type_projet, groupe in datees.groupby('type'):
+        serie = groupe.groupby('date_allocation')['montant'].sum().sort_index().cumsum()
+        fig.add_trace(trace_ligne(serie.index.to_numpy(), serie.to_numpy(), n_points, name=type_projet,
+                                  line=dict(color=COULEURS_TYPES.get(type_projet))))
+    fig.update_layout(title="Allocations cumulées (FCFA)", height=400, margin=dict(t=40, b=20))
+    return fig
+
+
+def figure_flux_allocations(allocations, projets_max=PROJETS_SANKEY_MAX):
+    """Sankey revenu → projet (les plus petits projets sont regroupés)"""
+    par_projet = allocations.groupby('projet_id')['montant'].sum()
+    principaux = set(par_projet.nlargest(projets_max).index)
+    cibles = allocations['projet_nom'].where(allocations['projet_id'].isin(principaux), AUTRES_PROJETS)
+    liens = allocations.assign(cible=cibles).groupby(['revenu_nom', 'cible'], as_index=False)['montant'].sum()
+
+    sources = list(liens['revenu_nom'].unique())
+    destinations = list(liens['cible'].unique())
+    noeuds = {nom: i for i, nom in enumerate(sources)}
+    noeuds_cibles = {nom: len(sources) + i for i, nom in enumerate(destinations)}
+    fig = go.Figure(go.Sankey(
+        node=dict(label=sources + destinations, pad=12, thickness=14),
+        link=dict(
+            source=liens['revenu_nom'].map(noeuds).to_numpy(),
+            target=liens['cible'].map(noeuds_cibles).to_numpy(),
+            value=liens['montant'].to_numpy()
+        )
+    ))
+    fig.update_layout(title="Flux des allocations : revenus → projets", height=500, margin=dict(t=40, b=20))
+    return fig
+
+
+def figure_repartition_types(types):
+    """Montant total, utilisé et budget mensuel par type de projet"""
+    fig = go.Figure([
+        go.Bar(x=types['type'], y=types['montant_total'], name='Montant total'),
+        go.Bar(x=types['type'], y=types['montant_utilise_reel'], name='Utilisé'),
+        go.Bar(x=types['type'], y=types['budget_alloue_mensuel'], name='Budget mensuel')
+    ])
+    fig.update_layout(title="Répartition par type (FCFA)", barmode='group', height=400, margin=dict(t=40, b=20))
+    return fig
+
+
+def construire_figures(projets, grand_livre, revenus=(), n_points=POINTS_MAX):
+    """Cadres agrégés puis figures de la page Analytics"""
+    cadres = construire_cadres(projets, grand_livre, revenus)
+    return {
+        'prevu_reel': figure_prevu_reel(cadres['suivi'], n_points),
+        'allocations_cumulees': figure_allocations_cumulees(cadres['allocations'], n_points),
+        'flux_allocations': figure_flux_allocations(cadres['allocations']),
+        'repartition_types': figure_repartition_types(cadres['types'])
+    }
@@ -0,0 +1,50 @@
+"""Cache LRU borné des résultats de calcul, indexé par version des données"""
+
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Cache LRU avec compteurs de hits/misses.
+
+    Les clés incluent la version des données : toute mutation incrémente la version,
+    les anciennes entrées ne sont plus jamais demandées et finissent évincées.
+    """
+
+    def __init__(self, capacite=32):
+        self.capacite = capacite
+        self.entrees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def obtenir(self, cle, calcul):
+        """Retourne la valeur en cache pour `cle`, ou l'évalue via `calcul()` et la mémorise"""
+        try:
+            valeur = self.entrees[cle]
+        except KeyError:
+            self.misses += 1
+            valeur = calcul()
+            self.entrees[cle] = valeur
+            if len(self.entrees) > self.capacite:
+                self.entrees.popitem(last=False)
+            return valeur
+        self.hits += 1
+        self.entrees.move_to_end(cle)
+        return valeur
+
+    def vider(self):
+        """Supprime toutes les entrées (les compteurs sont conservés)"""
+        self.entrees.clear()
+
+    def statistiques(self):
+        """Retourne les compteurs du cache"""
+        total = self.hits + self.misses
+        return {
+            'entrees': len(self.entrees),
+            'capacite': self.capacite,
+            'hits': self.hits,
+            'misses': self.misses,
+            'taux_hit': (self.hits / total * 100) if total > 0 else 0
+        }
+
+    def __len__(self):
+        return len(self.entrees)
@@ -0,0 +1,43 @@
+"""Codec JSON des dates et datetimes du plan"""
+
+import json
+from collections.abc import Mapping
+from datetime import datetime, date
+
+_CLE_DATE = '__date__'
+_CLE_DATETIME = '__datetime__'
+
+
+def encoder_valeur(valeur):
+    """Fonction `default` de json.dumps : encode les date/datetime en objets étiquetés"""
+    if isinstance(valeur, Mapping):  # enregistrements Projet / Revenu
+        return dict(valeur)
+    if isinstance(valeur, datetime):
+        return {_CLE_DATETIME: valeur.isoformat()}
+    if isinstance(valeur, date):
+        return {_CLE_DATE: valeur.isoformat()}
+    raise TypeError(f"Type non sérialisable en JSON : {type(valeur).__name__}")
+
+
+def decoder_objet(objet):
+    """Fonction `object_hook` de json.loads : restaure les date/datetime étiquetés"""
+    if len(objet) == 1:
+        if _CLE_DATE in objet:
+            return date.fromisoformat(objet[_CLE_DATE])
+        if _CLE_DATETIME in objet:
+            return datetime.fromisoformat(objet[_CLE_DATETIME])
+    return objet
+
+
+def dumps(valeur, cles_triees=False):
+    """Sérialise une valeur du plan (dates comprises) en JSON compact.
+
+    Avec `cles_triees`, le texte ne dépend que du contenu (pas de l'ordre des clés).
+    """
+    return json.dumps(valeur, default=encoder_valeur, ensure_ascii=False, separators=(',', ':'),
+                      sort_keys=cles_triees)
+
+
+def loads(texte):
+    """Désérialise un JSON produit par dumps"""
+    return json.loads(texte, object_hook=decoder_objet)
@@ -0,0 +1,109 @@
+"""Export Excel du plan en flux (xlsxwriter en mode constant_memory)"""
+
+import io
+
+import xlsxwriter
+
+from plan_financier.grand_livre import ALLOCATION
+
+COLONNES_PROJETS = (
+    ('ID', 'id'), ('Nom', 'nom'), ('Type', 'type'), ('Montant total', 'montant_total'),
+    ('Budget mensuel', 'budget_alloue_mensuel'), ('Utilisé réel', 'montant_utilise_reel'),
+    ('Cash flow mensuel', 'cash_flow_mensuel'), ('Statut', 'statut'), ('Échéance', 'echeance'),
+    ('ROI attendu (%)', 'roi_attendu'), ('Priorité', 'priorite'), ('Description', 'description'),
+    ('Source de financement', 'source_financement'), ('Responsable', 'responsable'),
+    ('Créé le', 'date_creation'), ('Modifié le', 'date_modification'),
+    ('Créé par', 'created_by'), ('Modifié par', 'updated_by')
+)
+COLONNES_REVENUS = (
+    ('ID', 'id'), ('Nom', 'nom'), ('Montant mensuel', 'montant_mensuel'), ('Type', 'type'),
+    ('Régulier', 'regulier'), ('Responsable', 'responsable'), ('Disponible le', 'date_disponibilite'),
+    ('Créé le', 'date_creation'), ('Modifié le', 'date_modification'),
+    ('Créé par', 'created_by'), ('Modifié par', 'updated_by')
+)
+ENTETES_SUIVI = ('Projet ID', 'Projet', 'Mois', 'Prévu', 'Réel', 'Écart')
+ENTETES_ALLOCATIONS = ('Projet ID', 'Projet', 'Revenu ID', 'Revenu', 'Mois', 'Montant', 'Date allocation')
+
+
+def lignes_items(items, colonnes):
+    """Génère une ligne par projet ou revenu selon les colonnes demandées"""
+    cles = [cle for _, cle in colonnes]
+    for item in items:
+        yield [item.get(cle) for cle in cles]
+
+
+def lignes_suivi(projets):
+    """Génère une ligne par entrée de suivi_mensuel de chaque projet"""
+    for projet in projets:
+        for suivi in projet.get('suivi_mensuel') or ():
+            yield [projet['id'], projet['nom'], suivi['mois'], suivi['prevu'], suivi['reel'],
+                   suivi['reel'] - suivi['prevu']]
+
+
+def lignes_allocations(projets, revenus, grand_livre):
+    """Génère une ligne par (projet, revenu, mois) alloué, projet par projet.
+
+    Le montant est le total net du grand livre : une réallocation ne produit pas
+    de ligne de plus, et les totaux nuls (allocations retirées) sont omis. La
+    date est celle de la dernière modification de l'allocation.
+    """
+    noms_revenus = {revenu['id']: revenu['nom'] for revenu in revenus}
+    par_projet = {projet['id']: {} for projet in projets}
+    for evenement in grand_livre.evenements(grand_livre.positions(ALLOCATION, projet_ids=par_projet)):
+        nettes = par_projet[evenement['projet_id']]
+        cle = (evenement['revenu_id'], evenement['mois'])
+        nette = nettes.get(cle)
+        if nette is None:
+            nettes[cle] = [evenement['montant'], evenement['horodatage']]
+        else:
+            nette[0] += evenement['montant']
+            nette[1] = evenement['horodatage']
+    for projet in projets:
+        for (revenu_id, mois), (montant, horodatage) in par_projet.pop(projet['id'], {}).items():
+            if montant:
+                yield [projet['id'], projet['nom'], revenu_id, noms_revenus.get(revenu_id), mois, montant, horodatage]
+
+
+def _ecrire_feuille(workbook, nom, entetes, lignes, format_entete):
+    """Écrit une feuille ligne par ligne ; retourne le nombre de lignes de données"""
+    worksheet = workbook.add_worksheet(nom)
+    worksheet.write_row(0, 0, entetes, format_entete)
+    worksheet.freeze_panes(1, 0)
+    worksheet.set_column(0, len(entetes) - 1, 16)
+    numero = 0
+    for numero, ligne in enumerate(lignes, start=1):
+        worksheet.write_row(numero, 0, ligne)
+    return numero
+
+
+def exporter_plan_excel(projets, revenus, grand_livre, sortie=None, constant_memory=True):
+    """Exporte projets, revenus, suivi mensuel et allocations dans un classeur multi-feuilles.
+
+    Les lignes sont produites par des générateurs et écrites dans l'ordre : en mode
+    constant_memory, xlsxwriter ne garde qu'une ligne en mémoire par feuille.
+    Retourne (sortie, nombre de lignes par feuille) ; `sortie` est un io.BytesIO
+    positionné au début si aucun flux n'est fourni.
+    """
+    if sortie is None:
+        sortie = io.BytesIO()
+    workbook = xlsxwriter.Workbook(sortie, {
+        'constant_memory': constant_memory,
+        'default_date_format': 'dd/mm/yyyy',
+        'remove_timezone': True
+    })
+    format_entete = workbook.add_format({'bold': True, 'bg_color': '#DDEBF7', 'border': 1})
+
+    feuilles = (
+        ('Projets', [titre for titre, _ in COLONNES_PROJETS], lignes_items(projets, COLONNES_PROJETS)),
+        ('Revenus', [titre for titre, _ in COLONNES_REVENUS], lignes_items(revenus, COLONNES_REVENUS)),
+        ('Suivi mensuel', ENTETES_SUIVI, lignes_suivi(projets)),
+        ('Allocations reçues', ENTETES_ALLOCATIONS, lignes_allocations(projets, revenus, grand_livre))
+    )
+    comptes = {}
+    for nom, entetes, lignes in feuilles:
+        comptes[nom] = _ecrire_feuille(workbook, nom, entetes, lignes, format_entete)
+    workbook.close()
+
+    if isinstance(sortie, io.BytesIO):
+        sortie.seek(0)
+    return sortie, comptes
@@ -0,0 +1,112 @@
+"""Fonds d'urgence tenu à jour et étape Baby Step de Ramsey"""
+
+from plan_financier.grand_livre import code_mois
+
+TYPE_EPARGNE = 'Épargne'
+# Objectif par défaut de kpis_config['objectif_fonds_urgence'], en mois de dépenses
+OBJECTIF_FONDS_URGENCE = 6
+# Fonds de départ de l'étape 1 (1 000 $ chez Ramsey), en mois de dépenses
+MOIS_FONDS_DEPART = 1
+# Part des revenus investie dans les actifs générateurs à l'étape 4
+PART_INVESTIE = 0.15
+
+BABY_STEPS = (
+    "Fonds d'urgence de départ",
+    "Rembourser les passifs",
+    "Fonds d'urgence complet",
+    "Investir 15 % des revenus",
+    "Financer les formations",
+    "Cash flow à l'objectif",
+    "Bâtir et partager"
+)
+
+
+def _code_jour(jour):
+    return (jour.year * 12 + jour.month - 1, jour.day)
+
+
+def mois_verses(revenu, aujourd_hui):
+    """Nombre de versements d'un revenu à une date : un par mois depuis sa disponibilité (un seul s'il est ponctuel).
+
+    Un mois compte dès que le jour de disponibilité est atteint, comme pour le planificateur.
+    """
+    disponibilite = revenu.get('date_disponibilite') or revenu['date_creation']
+    (debut, jour), (courant, jour_courant) = _code_jour(disponibilite), _code_jour(aujourd_hui)
+    mois = courant - debut + (jour_courant >= jour)
+    if not revenu.get('regulier'):
+        return int(mois > 0)
+    return max(mois, 0)
+
+
+def verse_au_mois(revenu, mois):
+    """Le revenu est-il versé au mois 'AAAA-MM' : chaque mois depuis sa disponibilité, ce seul mois s'il est ponctuel"""
+    disponibilite = revenu.get('date_disponibilite') or revenu['date_creation']
+    ecart = code_mois(mois) - _code_jour(disponibilite)[0]
+    return ecart >= 0 if revenu.get('regulier') else ecart == 0
+
+
+class FondsUrgence:
+    """Solde du fonds d'urgence : versements des revenus d'épargne moins leurs allocations aux projets.
+
+    Index dérivé des revenus (ajouter / supprimer / reassigner_id comme les autres
+    index du plan) : seuls les revenus de type 'Épargne' sont suivis, avec leur
+    total alloué lu au grand livre à l'ajout puis tenu à jour par
+    `ajouter_allocation`. Le solde à une date coûte O(nombre de revenus d'épargne),
+    sans relire l'historique des allocations.
+    """
+
+    def __init__(self, grand_livre):
+        self.grand_livre = grand_livre
+        self.revenus = {}
+        self.alloue = {}
+        self.ids = set()
+
+    @classmethod
+    def depuis_revenus(cls, revenus, grand_livre):
+        """Construit le fonds sur la liste des revenus"""
+        fonds = cls(grand_livre)
+        for revenu in revenus:
+            fonds.ajouter(revenu)
+        return fonds
+
+    def ajouter(self, revenu):
+        """Suit un revenu (ignoré s'il n'est pas un revenu d'épargne)"""
+        self.ids.add(revenu['id'])
+        if revenu.get('type') == TYPE_EPARGNE:
+            self.revenus[revenu['id']] = revenu
+            self.alloue[revenu['id']] = self.grand_livre.alloue_revenu(revenu['id'])
+
+    def supprimer(self, revenu_id):
+        """Cesse de suivre un revenu"""
+        self.ids.discard(revenu_id)
+        self.revenus.pop(revenu_id, None)
+        self.alloue.pop(revenu_id, None)
+
+    def reassigner_id(self, ancien_id, nouvel_id):
+        """Change l'id d'un revenu (ses allocations suivent au grand livre)"""
+        self.ids.discard(ancien_id)
+        self.ids.add(nouvel_id)
+        if ancien_id in self.revenus:
+            self.revenus[nouvel_id] = self.revenus.pop(ancien_id)
+            self.alloue[nouvel_id] = self.alloue.pop(ancien_id)
+
+    def ajouter_allocation(self, revenu_id, montant):
+        """Prend en compte un montant alloué (ou contrepassé) depuis un revenu"""
+        if revenu_id in self.alloue:
+            self.alloue[revenu_id] += montant
+
+    def solde(self, aujourd_hui):
+        """Épargne versée jusqu'à `aujourd_hui` moins les allocations, jamais négatif"""
+        verse = sum(revenu['montant_mensuel'] * mois_verses(revenu, aujourd_hui) for revenu in self.revenus.values())
+        return max(0, verse - sum(self.alloue.values()))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def etape_baby_step(conditions):
+    """Étape en cours (1 à 7) : la première dont la condition n'est pas remplie, 7 une fois toutes franchies"""
+    for etape, remplie in enumerate(conditions, start=1):
+        if not remplie:
+            return etape
+    return len(BABY_STEPS)
@@ -0,0 +1,6 @@
+"""Fonctions de formatage pour l'affichage"""
+
+
+def format_currency(amount):
+    """Formate un montant en FCFA"""
+    return f"{amount:,.0f} FCFA".replace(",", " ")
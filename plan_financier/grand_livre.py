@@ -0,0 +1,463 @@
+"""Grand livre des allocations et des dépenses : événements en colonnes NumPy et instantanés des soldes"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+NATURES = ('allocation', 'depense')
+ALLOCATION, DEPENSE = range(len(NATURES))
+# revenu_id d'une dépense (aucun revenu associé)
+SANS_REVENU = -1
+# Événements entre deux instantanés : taille maximale de la queue relue par les requêtes de solde
+PERIODE_INSTANTANE = 4096
+_EPOQUE = datetime(1970, 1, 1)
+_MICROSECONDE = timedelta(microseconds=1)
+_COLONNES = ('natures', 'projet_ids', 'revenu_ids', 'montants', 'mois', 'horodatages', 'auteurs',
+             'slots_projet', 'slots_revenu')
+_CAPACITE_MIN = 1024
+
+
+@lru_cache(maxsize=4096)
+def code_mois(mois):
+    """'AAAA-MM' -> numéro de mois (annee * 12 + mois - 1), comparable et vectorisable"""
+    annee, numero = mois.split('-')
+    return int(annee) * 12 + int(numero) - 1
+
+
+def texte_mois(code):
+    """Numéro de mois -> 'AAAA-MM'"""
+    return f'{code // 12}-{code % 12 + 1:02d}'
+
+
+def _cumuler(base, slots, montants, taille):
+    """Sommes par slot (entiers exacts) ajoutées à `base`, agrandie à `taille` slots"""
+    resultat = np.zeros(taille, dtype=np.int64)
+    resultat[:len(base)] = base
+    np.add.at(resultat, slots, montants)
+    return resultat
+
+
+def _colonnes_projet(projet, colonnes):
+    """Ajoute aux colonnes les événements repris d'un projet à listes imbriquées (la liste est retirée)"""
+    natures, projet_ids, revenu_ids, montants, mois, horodatages, utilisateurs = colonnes
+    for allocation in projet.pop('allocations_recues', None) or ():
+        natures.append(ALLOCATION)
+        projet_ids.append(projet['id'])
+        revenu_ids.append(allocation['revenu_id'])
+        montants.append(allocation['montant'])
+        mois.append(code_mois(allocation['mois']))
+        horodatages.append(allocation.get('date_allocation'))
+        utilisateurs.append(projet.get('updated_by'))
+    utilise = projet.get('montant_utilise_reel') or 0
+    if utilise:
+        creation = projet.get('date_creation') or datetime.now()
+        natures.append(DEPENSE)
+        projet_ids.append(projet['id'])
+        revenu_ids.append(SANS_REVENU)
+        montants.append(utilise)
+        mois.append(creation.year * 12 + creation.month - 1)
+        horodatages.append(creation)
+        utilisateurs.append(projet.get('created_by'))
+
+
+class GrandLivre:
+    """Journal append-only des allocations et dépenses des projets.
+
+    Chaque événement est une ligne de colonnes NumPy (nature, projet, revenu,
+    montant, mois, horodatage, auteur). Tous les PERIODE_INSTANTANE événements,
+    un instantané fige les totaux alloués et dépensés par projet et alloués par
+    revenu : un solde se lit dans l'instantané plus la courte queue d'événements
+    qui le suit. Un mois passé se rejoue d'un masque vectorisé sur les colonnes.
+
+    Une allocation fixe le montant d'un revenu pour un projet et un mois : la
+    relancer n'ajoute que l'écart (rien s'il est nul). `fixer_allocations` fixe
+    d'un coup tous les projets d'un revenu pour un mois et contrepasse ceux qui
+    n'y figurent plus. Les événements à écrire en base sont listés dans
+    `en_attente`.
+    """
+
+    def __init__(self, capacite=_CAPACITE_MIN):
+        capacite = max(capacite, _CAPACITE_MIN)
+        self.taille = 0
+        self.natures = np.zeros(capacite, dtype=np.int8)
+        self.projet_ids = np.zeros(capacite, dtype=np.int64)
+        self.revenu_ids = np.zeros(capacite, dtype=np.int64)
+        self.montants = np.zeros(capacite, dtype=np.int64)
+        self.mois = np.zeros(capacite, dtype=np.int32)
+        self.horodatages = np.zeros(capacite, dtype='datetime64[us]')
+        self.auteurs = np.zeros(capacite, dtype=np.int16)
+        # Positions compactes des projets et revenus dans les tableaux des instantanés
+        self.slots_projet = np.zeros(capacite, dtype=np.int32)
+        self.slots_revenu = np.zeros(capacite, dtype=np.int32)
+        self.slots_projets = {}
+        self.slots_revenus = {}
+        # Auteurs codés (0 : inconnu)
+        self.utilisateurs = [None]
+        self._codes_utilisateurs = {None: 0}
+        # (position, alloué par projet, dépensé par projet, alloué par revenu)
+        self.instantane = (0, np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.int64))
+        self.en_attente = []
+        # (revenu_id, mois) -> {projet_id: montant alloué}, construit à la première allocation
+        self._cumuls = None
+
+    @classmethod
+    def depuis_projets(cls, projets):
+        """Grand livre initial d'un plan au format à listes imbriquées.
+
+        Les `allocations_recues` des projets deviennent des allocations (la clé est
+        retirée) et leur `montant_utilise_reel` une dépense d'ouverture au mois de
+        création. Tous les événements sont à écrire en base.
+        """
+        grand_livre = cls()
+        colonnes = ([], [], [], [], [], [], [])
+        for projet in projets:
+            _colonnes_projet(projet, colonnes)
+        if colonnes[0]:
+            grand_livre.ajouter_colonnes(*colonnes, a_persister=True)
+        return grand_livre
+
+    def migrer_projet(self, projet):
+        """Reprend les allocations reçues et le montant utilisé d'un projet ; retourne le nombre d'événements"""
+        colonnes = ([], [], [], [], [], [], [])
+        _colonnes_projet(projet, colonnes)
+        if colonnes[0]:
+            self.ajouter_colonnes(*colonnes, a_persister=True)
+        return len(colonnes[0])
+
+    # Écriture
+    def _reserver(self, n):
+        capacite = len(self.natures)
+        if self.taille + n <= capacite:
+            return
+        while capacite < self.taille + n:
+            capacite *= 2
+        for nom in _COLONNES:
+            ancienne = getattr(self, nom)
+            nouvelle = np.zeros(capacite, dtype=ancienne.dtype)
+            nouvelle[:self.taille] = ancienne[:self.taille]
+            setattr(self, nom, nouvelle)
+
+    def _code_utilisateur(self, utilisateur):
+        code = self._codes_utilisateurs.get(utilisateur)
+        if code is None:
+            code = self._codes_utilisateurs[utilisateur] = len(self.utilisateurs)
+            self.utilisateurs.append(utilisateur)
+        return code
+
+    @staticmethod
+    def _slot(slots, item_id):
+        slot = slots.get(item_id)
+        if slot is None:
+            slot = slots[item_id] = len(slots)
+        return slot
+
+    def _slots(self, slots, ids):
+        """Slots d'un tableau d'identifiants, en n'attribuant qu'une fois chaque identifiant"""
+        uniques, inverse = np.unique(ids, return_inverse=True)
+        codes = np.array([self._slot(slots, i) for i in uniques.tolist()], dtype=np.int32)
+        return codes[inverse]
+
+    def ajouter_colonnes(self, natures, projet_ids, revenu_ids, montants, mois, horodatages, utilisateurs,
+                         a_persister=False):
+        """Ajoute des événements en bloc (chargement, synchronisation, migration).
+
+        `mois` en numéros de mois, `horodatages` en datetime (None : maintenant) ou
+        en tableau datetime64, `utilisateurs` en noms. Retourne la position du
+        premier événement ajouté.
+        """
+        n = len(natures)
+        debut = self.taille
+        self._reserver(n)
+        fin = debut + n
+        maintenant = datetime.now()
+        self.natures[debut:fin] = natures
+        self.projet_ids[debut:fin] = projet_ids
+        self.revenu_ids[debut:fin] = revenu_ids
+        self.montants[debut:fin] = montants
+        self.mois[debut:fin] = mois
+        if isinstance(horodatages, np.ndarray):
+            self.horodatages[debut:fin] = horodatages
+        else:
+            # Conversion en µs côté Python : numpy convertit les datetime un à un bien plus lentement
+            self.horodatages[debut:fin].view(np.int64)[:] = [
+                ((maintenant if h is None else h) - _EPOQUE) // _MICROSECONDE for h in horodatages]
+        codes = {u: self._code_utilisateur(u) for u in set(utilisateurs)}
+        self.auteurs[debut:fin] = [codes[u] for u in utilisateurs]
+        self.slots_projet[debut:fin] = self._slots(self.slots_projets, self.projet_ids[debut:fin])
+        self.slots_revenu[debut:fin] = self._slots(self.slots_revenus, self.revenu_ids[debut:fin])
+        self.taille = fin
+        if a_persister:
+            self.en_attente.extend(range(debut, fin))
+        if self._cumuls is not None:
+            self._cumuler_allocations(debut, fin)
+        if fin - self.instantane[0] >= PERIODE_INSTANTANE:
+            self._prendre_instantane()
+        return debut
+
+    def ajouter(self, nature, projet_id, revenu_id, montant, mois, horodatage=None, utilisateur=None):
+        """Ajoute un événement (à écrire en base) ; `mois` au format 'AAAA-MM'"""
+        self._reserver(1)
+        position = self.taille
+        self.natures[position] = nature
+        self.projet_ids[position] = projet_id
+        self.revenu_ids[position] = revenu_id
+        self.montants[position] = montant
+        self.mois[position] = code_mois(mois)
+        self.horodatages[position] = horodatage or datetime.now()
+        self.auteurs[position] = self._code_utilisateur(utilisateur)
+        self.slots_projet[position] = self._slot(self.slots_projets, projet_id)
+        self.slots_revenu[position] = self._slot(self.slots_revenus, revenu_id)
+        self.taille += 1
+        self.en_attente.append(position)
+        if nature == ALLOCATION and self._cumuls is not None:
+            projets = self._cumuls.setdefault((revenu_id, self.mois[position].item()), {})
+            projets[projet_id] = projets.get(projet_id, 0) + montant
+        if self.taille - self.instantane[0] >= PERIODE_INSTANTANE:
+            self._prendre_instantane()
+
+    def _cumuler_allocations(self, debut, fin):
+        cumuls = self._cumuls
+        allocations = np.flatnonzero(self.natures[debut:fin] == ALLOCATION) + debut
+        cles = zip(self.revenu_ids[allocations].tolist(), self.mois[allocations].tolist())
+        for cle, projet_id, montant in zip(cles, self.projet_ids[allocations].tolist(),
+                                           self.montants[allocations].tolist()):
+            projets = cumuls.setdefault(cle, {})
+            projets[projet_id] = projets.get(projet_id, 0) + montant
+
+    def _cumuls_allocations(self):
+        """(revenu_id, mois) -> {projet_id: montant alloué}, construit au premier appel"""
+        if self._cumuls is None:
+            self._cumuls = {}
+            self._cumuler_allocations(0, self.taille)
+        return self._cumuls
+
+    def allouer(self, revenu_id, projet_id, montant, mois, horodatage=None, utilisateur=None):
+        """Fixe l'allocation d'un revenu à un projet pour un mois ; retourne l'écart inscrit (0 si inchangée)"""
+        ecart = montant - self._cumuls_allocations().get((revenu_id, code_mois(mois)), {}).get(projet_id, 0)
+        if ecart:
+            self.ajouter(ALLOCATION, projet_id, revenu_id, ecart, mois, horodatage, utilisateur)
+        return ecart
+
+    def fixer_allocations(self, revenu_id, mois, montants, horodatage=None, utilisateur=None):
+        """Fixe toutes les allocations d'un revenu pour un mois à `montants` ({projet_id: montant}).
+
+        Les projets alloués auparavant et absents de `montants` sont ramenés à 0.
+        Retourne les écarts inscrits {projet_id: écart} (non nuls).
+        """
+        cibles = dict.fromkeys(self._cumuls_allocations().get((revenu_id, code_mois(mois)), {}), 0)
+        cibles.update(montants)
+        ecarts = {}
+        for projet_id, montant in cibles.items():
+            ecart = self.allouer(revenu_id, projet_id, montant, mois, horodatage, utilisateur)
+            if ecart:
+                ecarts[projet_id] = ecart
+        return ecarts
+
+    def depenser(self, projet_id, montant, mois, horodatage=None, utilisateur=None):
+        """Inscrit une dépense d'un projet (négative pour une correction)"""
+        self.ajouter(DEPENSE, projet_id, SANS_REVENU, montant, mois, horodatage, utilisateur)
+
+    def reassigner_id(self, item_type, ancien_id, nouvel_id, horodatage=None, utilisateur=None):
+        """Transfère les événements d'un projet ou d'un revenu vers son nouvel id.
+
+        Le journal reste append-only : chaque montant par (revenu, projet, mois) est
+        contrepassé sur l'ancien id et inscrit sur le nouveau.
+        """
+        ids = self.projet_ids if item_type == 'projet' else self.revenu_ids
+        positions = np.flatnonzero(ids[:self.taille] == ancien_id)
+        if not len(positions):
+            return
+        cles = np.stack([self.natures[positions], self.revenu_ids[positions], self.projet_ids[positions],
+                         self.mois[positions]], axis=1)
+        cles, groupes = np.unique(cles, axis=0, return_inverse=True)
+        totaux = np.zeros(len(cles), dtype=np.int64)
+        np.add.at(totaux, groupes.ravel(), self.montants[positions])
+        colonnes = ([], [], [], [], [], [], [])
+        for (nature, revenu_id, projet_id, mois), total in zip(cles.tolist(), totaux.tolist()):
+            if not total:
+                continue
+            nouveau = (revenu_id, nouvel_id) if item_type == 'projet' else (nouvel_id, projet_id)
+            for cible_revenu, cible_projet, montant in ((revenu_id, projet_id, -total), nouveau + (total,)):
+                for colonne, valeur in zip(colonnes, (nature, cible_projet, cible_revenu, montant, mois,
+                                                      horodatage, utilisateur)):
+                    colonne.append(valeur)
+        if colonnes[0]:
+            self.ajouter_colonnes(*colonnes, a_persister=True)
+
+    def _prendre_instantane(self):
+        """Fige les totaux à la position courante à partir de l'instantané précédent"""
+        position, alloue_projets, depense_projets, alloue_revenus = self.instantane
+        queue = slice(position, self.taille)
+        natures = self.natures[queue]
+        montants = self.montants[queue]
+        slots_projet = self.slots_projet[queue]
+        allocation = natures == ALLOCATION
+        self.instantane = (
+            self.taille,
+            _cumuler(alloue_projets, slots_projet[allocation], montants[allocation], len(self.slots_projets)),
+            _cumuler(depense_projets, slots_projet[~allocation], montants[~allocation], len(self.slots_projets)),
+            _cumuler(alloue_revenus, self.slots_revenu[queue][allocation], montants[allocation],
+                     len(self.slots_revenus))
+        )
+
+    # Lecture des soldes
+    def _total(self, slots, item_id, colonne_slots, valeurs_instantane, nature):
+        slot = slots.get(item_id)
+        if slot is None:
+            return 0
+        position = self.instantane[0]
+        total = valeurs_instantane[slot].item() if slot < len(valeurs_instantane) else 0
+        if position == self.taille:
+            return total
+        queue = slice(position, self.taille)
+        masque = (colonne_slots[queue] == slot) & (self.natures[queue] == nature)
+        return total + self.montants[queue][masque].sum().item()
+
+    def alloue_projet(self, projet_id):
+        """Total alloué à un projet"""
+        return self._total(self.slots_projets, projet_id, self.slots_projet, self.instantane[1], ALLOCATION)
+
+    def depense_projet(self, projet_id):
+        """Total dépensé par un projet (son montant_utilise_reel)"""
+        return self._total(self.slots_projets, projet_id, self.slots_projet, self.instantane[2], DEPENSE)
+
+    def alloue_revenu(self, revenu_id):
+        """Total alloué depuis un revenu"""
+        return self._total(self.slots_revenus, revenu_id, self.slots_revenu, self.instantane[3], ALLOCATION)
+
+    def solde_projet(self, projet_id):
+        """Montant alloué et pas encore dépensé d'un projet"""
+        return self.alloue_projet(projet_id) - self.depense_projet(projet_id)
+
+    def _par_id(self, slots, valeurs):
+        ids = np.fromiter(slots, dtype=np.int64, count=len(slots))
+        non_nuls = np.flatnonzero(valeurs)
+        return dict(zip(ids[non_nuls].tolist(), valeurs[non_nuls].tolist()))
+
+    def _totaux(self, masque_evenements, debut=0):
+        """Totaux (alloué par projet, dépensé par projet, alloué par revenu) des événements masqués"""
+        vide = np.zeros(0, np.int64)
+        queue = slice(debut, self.taille)
+        natures = self.natures[queue]
+        montants = self.montants[queue]
+        slots_projet = self.slots_projet[queue]
+        allocation = (natures == ALLOCATION) & masque_evenements
+        depense = (natures == DEPENSE) & masque_evenements
+        n_projets = len(self.slots_projets)
+        return (_cumuler(vide, slots_projet[allocation], montants[allocation], n_projets),
+                _cumuler(vide, slots_projet[depense], montants[depense], n_projets),
+                _cumuler(vide, self.slots_revenu[queue][allocation], montants[allocation], len(self.slots_revenus)))
+
+    def soldes(self):
+        """Totaux courants : ({projet_id: alloué}, {projet_id: dépensé}, {revenu_id: alloué}), montants non nuls"""
+        position, alloue_projets, depense_projets, alloue_revenus = self.instantane
+        queue = self._totaux(True, position)
+        totaux = [ajout + np.pad(base, (0, len(ajout) - len(base)))
+                  for base, ajout in zip((alloue_projets, depense_projets, alloue_revenus), queue)]
+        return (self._par_id(self.slots_projets, totaux[0]), self._par_id(self.slots_projets, totaux[1]),
+                self._par_id(self.slots_revenus, totaux[2]))
+
+    def soldes_au_mois(self, mois):
+        """Rejoue le grand livre jusqu'à un mois inclus ('AAAA-MM') ; mêmes totaux que `soldes`"""
+        alloue_projets, depense_projets, alloue_revenus = self._totaux(self.mois[:self.taille] <= code_mois(mois))
+        return (self._par_id(self.slots_projets, alloue_projets), self._par_id(self.slots_projets, depense_projets),
+                self._par_id(self.slots_revenus, alloue_revenus))
+
+    # Lecture des événements
+    def positions(self, nature=None, projet_ids=None, debut=0):
+        """Positions des événements d'une nature à partir de `debut`, éventuellement limités à des projets"""
+        queue = slice(debut, self.taille)
+        masque = np.ones(self.taille - debut, dtype=bool) if nature is None else self.natures[queue] == nature
+        if projet_ids is not None:
+            masque &= np.isin(self.projet_ids[queue], np.fromiter(projet_ids, dtype=np.int64))
+        return np.flatnonzero(masque) + debut
+
+    def allocations(self, positions=None):
+        """(projet_id, revenu_id, montant, mois 'AAAA-MM') des allocations, dans l'ordre du journal"""
+        if positions is None:
+            positions = self.positions(ALLOCATION)
+        textes = {}
+        for projet_id, revenu_id, montant, mois in zip(
+                self.projet_ids[positions].tolist(), self.revenu_ids[positions].tolist(),
+                self.montants[positions].tolist(), self.mois[positions].tolist()):
+            texte = textes.get(mois)
+            if texte is None:
+                texte = textes[mois] = texte_mois(mois)
+            yield projet_id, revenu_id, montant, texte
+
+    def allocations_du_mois(self, mois):
+        """Montants alloués pour un mois ('AAAA-MM'), en colonnes (revenu_ids, projet_ids, montants) non nulles"""
+        taille = self.taille
+        positions = np.flatnonzero((self.mois[:taille] == code_mois(mois)) & (self.natures[:taille] == ALLOCATION))
+        paires = self.slots_revenu[positions].astype(np.int64) * len(self.slots_projets) + self.slots_projet[positions]
+        paires, inverse = np.unique(paires, return_inverse=True)
+        montants = np.zeros(len(paires), dtype=np.int64)
+        np.add.at(montants, inverse, self.montants[positions])
+        non_nuls = montants != 0
+        paires = paires[non_nuls]
+        revenus = np.fromiter(self.slots_revenus, dtype=np.int64, count=len(self.slots_revenus))
+        projets = np.fromiter(self.slots_projets, dtype=np.int64, count=len(self.slots_projets))
+        return (revenus[paires // len(self.slots_projets)], projets[paires % len(self.slots_projets)],
+                montants[non_nuls])
+
+    def mois_alloues(self, revenu_id):
+        """Mois ('AAAA-MM') où un revenu a au moins une allocation non nulle"""
+        return {texte_mois(m) for (r, m), projets in self._cumuls_allocations().items()
+                if r == revenu_id and any(projets.values())}
+
+    def allocations_projet(self, projet_id):
+        """Allocations d'un projet (voir `allocations`)"""
+        slot = self.slots_projets.get(projet_id)
+        if slot is None:
+            return []
+        masque = (self.slots_projet[:self.taille] == slot) & (self.natures[:self.taille] == ALLOCATION)
+        return list(self.allocations(np.flatnonzero(masque)))
+
+    def evenements(self, positions=None):
+        """Génère les événements en dicts (sauvegarde, export), dans l'ordre du journal"""
+        if positions is None:
+            positions = np.arange(self.taille)
+        for nature, projet_id, revenu_id, montant, mois, horodatage, auteur in zip(
+                self.natures[positions].tolist(), self.projet_ids[positions].tolist(),
+                self.revenu_ids[positions].tolist(), self.montants[positions].tolist(),
+                self.mois[positions].tolist(), self.horodatages[positions].tolist(),
+                self.auteurs[positions].tolist()):
+            yield {
+                'nature': NATURES[nature],
+                'projet_id': projet_id,
+                'revenu_id': None if revenu_id == SANS_REVENU else revenu_id,
+                'montant': montant,
+                'mois': texte_mois(mois),
+                'horodatage': horodatage,
+                'utilisateur': self.utilisateurs[auteur]
+            }
+
+    def lignes(self, positions):
+        """Tuples (nature, projet_id, revenu_id, montant, mois, horodatage en µs, utilisateur) pour la base"""
+        return list(zip(
+            self.natures[positions].tolist(), self.projet_ids[positions].tolist(),
+            self.revenu_ids[positions].tolist(), self.montants[positions].tolist(), self.mois[positions].tolist(),
+            self.horodatages[positions].astype(np.int64).tolist(),
+            [self.utilisateurs[auteur] for auteur in self.auteurs[positions].tolist()]
+        ))
+
+    def marquer_persistes(self):
+        """Les événements en attente ont été écrits en base"""
+        self.en_attente = []
+
+    def ajouter_evenements(self, evenements, a_persister=False):
+        """Ajoute des événements au format de `evenements` (restauration d'une sauvegarde)"""
+        colonnes = ([], [], [], [], [], [], [])
+        for evenement in evenements:
+            revenu_id = evenement.get('revenu_id')
+            for colonne, valeur in zip(colonnes, (
+                    NATURES.index(evenement['nature']), evenement['projet_id'],
+                    SANS_REVENU if revenu_id is None else revenu_id, evenement['montant'],
+                    code_mois(evenement['mois']), evenement.get('horodatage'), evenement.get('utilisateur'))):
+                colonne.append(valeur)
+        if colonnes[0]:
+            self.ajouter_colonnes(*colonnes, a_persister=a_persister)
+
+    def __len__(self):
+        return self.taille
@@ -0,0 +1,163 @@
+"""Index par (année, mois) des périodes d'activité pour le filtrage par date"""
+
+from bisect import bisect_left, insort
+from datetime import datetime, date
+
+TOUS = 'Tous'
+_TOUS_LES_MOIS = tuple(range(1, 13))
+
+
+def _en_date(valeur):
+    """Convertit un datetime en date"""
+    return valeur.date() if isinstance(valeur, datetime) else valeur
+
+
+def bornes_item(item, item_type, aujourd_hui):
+    """Retourne (début, fin, dépend_du_jour) de la période d'activité d'un projet ou revenu"""
+    if item_type == 'projet':
+        start_date = item['date_creation']
+        depend_du_jour = 'echeance' not in item
+        end_date = aujourd_hui if depend_du_jour else item['echeance']
+    else:  # revenu : actif jusqu'à aujourd'hui
+        start_date = item.get('date_disponibilite', item['date_creation'])
+        end_date = aujourd_hui
+        depend_du_jour = True
+    return _en_date(start_date), _en_date(end_date), depend_du_jour
+
+
+def mois_visibles(debut, fin):
+    """Mois du filtre (1-12) pendant lesquels l'item est actif.
+
+    Un item qui s'étend sur plusieurs années est visible tous les mois,
+    comme dans le filtrage historique.
+    """
+    if debut.year != fin.year:
+        return _TOUS_LES_MOIS
+    return tuple(range(debut.month, fin.month + 1))
+
+
+def est_visible(item, item_type, year, month, aujourd_hui):
+    """Version scalaire du filtre, pour les listes non indexées"""
+    debut, fin, _ = bornes_item(item, item_type, aujourd_hui)
+    if year != TOUS and debut.year != int(year):
+        return False
+    if month != TOUS:
+        return int(month) in mois_visibles(debut, fin)
+    return True
+
+
+def _retirer(liste, valeur):
+    position = bisect_left(liste, valeur)
+    if position < len(liste) and liste[position] == valeur:
+        del liste[position]
+
+
+class IndexDates:
+    """Listes triées de numéros d'ordre par année, par mois et par (année, mois).
+
+    Une requête coûte O(k) pour k résultats au lieu d'un parcours de tous les items ;
+    l'ordre d'insertion (celui de la liste source) est conservé.
+    """
+
+    def __init__(self, item_type='projet'):
+        self.item_type = item_type
+        self.aujourd_hui = date.today()
+        self.items = {}
+        self.ordre_par_id = {}
+        self.cles = {}
+        self.dependants_du_jour = set()
+        self.par_annee = {}
+        self.par_mois = {mois: [] for mois in _TOUS_LES_MOIS}
+        self.par_annee_mois = {}
+        self._prochain_ordre = 0
+
+    @classmethod
+    def depuis_items(cls, items, item_type='projet'):
+        """Construit l'index sur une liste de projets ou de revenus"""
+        index = cls(item_type)
+        for item in items:
+            index.ajouter(item)
+        return index
+
+    def _cle(self, item):
+        debut, fin, depend_du_jour = bornes_item(item, self.item_type, self.aujourd_hui)
+        return debut.year, mois_visibles(debut, fin), depend_du_jour
+
+    def _inserer(self, ordre, cle, en_fin):
+        annee, mois_actifs, depend_du_jour = cle
+        placer = list.append if en_fin else insort
+        placer(self.par_annee.setdefault(annee, []), ordre)
+        for mois in mois_actifs:
+            placer(self.par_mois[mois], ordre)
+            placer(self.par_annee_mois.setdefault((annee, mois), []), ordre)
+        if depend_du_jour:
+            self.dependants_du_jour.add(ordre)
+        self.cles[ordre] = cle
+
+    def _desinserer(self, ordre):
+        annee, mois_actifs, _ = self.cles.pop(ordre)
+        _retirer(self.par_annee[annee], ordre)
+        for mois in mois_actifs:
+            _retirer(self.par_mois[mois], ordre)
+            _retirer(self.par_annee_mois[(annee, mois)], ordre)
+        self.dependants_du_jour.discard(ordre)
+
+    def ajouter(self, item):
+        """Indexe un nouvel item placé en fin de liste"""
+        ordre = self._prochain_ordre
+        self._prochain_ordre += 1
+        self.items[ordre] = item
+        self.ordre_par_id[item['id']] = ordre
+        self._inserer(ordre, self._cle(item), en_fin=True)
+
+    def mettre_a_jour(self, item):
+        """Réindexe un item existant après modification de ses dates"""
+        ordre = self.ordre_par_id.get(item['id'])
+        if ordre is None:
+            self.ajouter(item)
+            return
+        self.items[ordre] = item
+        cle = self._cle(item)
+        if cle != self.cles[ordre]:
+            self._desinserer(ordre)
+            self._inserer(ordre, cle, en_fin=False)
+
+    def supprimer(self, item_id):
+        """Retire un item de l'index"""
+        ordre = self.ordre_par_id.pop(item_id, None)
+        if ordre is not None:
+            self._desinserer(ordre)
+            del self.items[ordre]
+
+    def reassigner_id(self, ancien_id, nouvel_id):
+        """Change l'id d'un item sans modifier sa position dans l'index"""
+        self.ordre_par_id[nouvel_id] = self.ordre_par_id.pop(ancien_id)
+
+    def _actualiser_jour(self):
+        """Réindexe les items dont la fin de période est « aujourd'hui » si la date a changé"""
+        aujourd_hui = date.today()
+        if aujourd_hui == self.aujourd_hui:
+            return
+        self.aujourd_hui = aujourd_hui
+        for ordre in list(self.dependants_du_jour):
+            cle = self._cle(self.items[ordre])
+            if cle != self.cles[ordre]:
+                self._desinserer(ordre)
+                self._inserer(ordre, cle, en_fin=False)
+
+    def rechercher(self, year, month):
+        """Retourne les items visibles pour le filtre (year, month), dans l'ordre d'origine"""
+        self._actualiser_jour()
+        if year == TOUS and month == TOUS:
+            ordres = sorted(self.items)
+        elif month == TOUS:
+            ordres = self.par_annee.get(int(year), ())
+        elif year == TOUS:
+            ordres = self.par_mois.get(int(month), ())
+        else:
+            ordres = self.par_annee_mois.get((int(year), int(month)), ())
+        items = self.items
+        return [items[ordre] for ordre in ordres]
+
+    def __len__(self):
+        return len(self.items)
@@ -0,0 +1,48 @@
+"""Index id -> enregistrement pour les projets et les revenus"""
+
+
+class IndexIds:
+    """Dictionnaire des enregistrements par id, tenu synchronisé avec la liste source.
+
+    En cas d'ids dupliqués, le premier enregistrement de la liste est retenu,
+    comme avec une recherche linéaire.
+    """
+
+    def __init__(self):
+        self.par_id = {}
+        self.taille = 0
+
+    @classmethod
+    def depuis_items(cls, items):
+        """Construit l'index sur une liste de projets ou de revenus"""
+        index = cls()
+        for item in items:
+            index.ajouter(item)
+        return index
+
+    def ajouter(self, item):
+        """Indexe un nouvel enregistrement"""
+        self.par_id.setdefault(item['id'], item)
+        self.taille += 1
+
+    def supprimer(self, item_id):
+        """Retire un enregistrement de l'index"""
+        if self.par_id.pop(item_id, None) is not None:
+            self.taille -= 1
+
+    def reassigner_id(self, ancien_id, nouvel_id):
+        """Change l'id d'un enregistrement (l'enregistrement lui-même est mis à jour)"""
+        item = self.par_id.pop(ancien_id)
+        item['id'] = nouvel_id
+        self.par_id[nouvel_id] = item
+        return item
+
+    def obtenir(self, item_id, defaut=None):
+        """Retourne l'enregistrement d'id donné en O(1)"""
+        return self.par_id.get(item_id, defaut)
+
+    def __contains__(self, item_id):
+        return item_id in self.par_id
+
+    def __len__(self):
+        return self.taille
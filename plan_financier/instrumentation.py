@@ -0,0 +1,213 @@
+"""Mesure des reruns : temps, appels et volumes par fonction, profil cProfile à la demande"""
+
+import cProfile
+import functools
+import io
+import marshal
+import pstats
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+
+RERUNS_CONSERVES = 20
+LIGNES_PROFIL = 30
+
+# Enregistreur du rerun en cours dans ce thread (None : instrumentation inactive)
+_ENREGISTREUR = ContextVar('enregistreur', default=None)
+
+
+class _MesureNulle:
+    """Mesure sans effet, retournée quand l'instrumentation est inactive"""
+
+    items = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_MESURE_NULLE = _MesureNulle()
+
+
+class _Mesure:
+    __slots__ = ('enregistreur', 'nom', 'debut', 'items')
+
+    def __init__(self, enregistreur, nom):
+        self.enregistreur = enregistreur
+        self.nom = nom
+        self.items = None
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.enregistreur.ajouter(self.nom, time.perf_counter() - self.debut, self.items)
+        return False
+
+
+def mesurer(nom):
+    """Context manager qui mesure un bloc ; renseigner `.items` pour compter des éléments"""
+    enregistreur = _ENREGISTREUR.get()
+    if enregistreur is None:
+        return _MESURE_NULLE
+    return _Mesure(enregistreur, nom)
+
+
+def instrumenter(nom=None, items=None):
+    """Décorateur qui mesure chaque appel ; `items(resultat)` donne le nombre d'éléments traités.
+
+    Inactive, l'enveloppe se limite à la lecture d'une ContextVar avant l'appel.
+    """
+    def decorateur(fonction):
+        libelle = nom or fonction.__name__
+        enregistreur_courant = _ENREGISTREUR.get
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            enregistreur = enregistreur_courant()
+            if enregistreur is None:
+                return fonction(*args, **kwargs)
+            debut = time.perf_counter()
+            resultat = fonction(*args, **kwargs)
+            enregistreur.ajouter(libelle, time.perf_counter() - debut, items(resultat) if items else None)
+            return resultat
+        return enveloppe
+    return decorateur
+
+
+def noter(cle, valeur):
+    """Associe une information (page affichée...) au rerun en cours"""
+    enregistreur = _ENREGISTREUR.get()
+    if enregistreur is not None:
+        enregistreur.courant['infos'][cle] = valeur
+
+
+class Enregistreur:
+    """Mesures des derniers reruns d'une session, dans un tampon circulaire.
+
+    Chaque rerun enregistré contient sa date, sa durée totale, les infos notées
+    et, par nom mesuré, le temps cumulé, le nombre d'appels et d'éléments. Le
+    rerun d'un fragment seul porte aussi son nom, son interaction et le dernier
+    rerun complet, référence du temps économisé (voir `interactions`).
+    """
+
+    def __init__(self, capacite=RERUNS_CONSERVES):
+        self.actif = False
+        self.reruns = deque(maxlen=capacite)
+        self.courant = None
+        self.profil_demande = False
+        self.dernier_profil = None
+        self.interaction = 0
+        self.dernier_complet = None
+
+    def ajouter(self, nom, duree, items=None):
+        """Cumule une mesure dans le rerun en cours"""
+        mesure = self.courant['mesures'].get(nom)
+        if mesure is None:
+            mesure = self.courant['mesures'][nom] = {'temps': 0.0, 'appels': 0, 'items': 0}
+        mesure['temps'] += duree
+        mesure['appels'] += 1
+        if items is not None:
+            mesure['items'] += items
+
+    def rerun(self, fragment=None):
+        """Context manager englobant un rerun complet ou celui d'un `fragment` seul.
+
+        Sans effet si inactif et sans profil demandé, ou à l'intérieur d'un rerun
+        déjà mesuré (fragment exécuté par le rerun complet).
+        """
+        if _ENREGISTREUR.get() is not None or (not self.actif and not self.profil_demande):
+            return _MESURE_NULLE
+        return _Rerun(self, fragment)
+
+    def nouvelle_interaction(self):
+        """Les reruns de fragments qui suivent répondent à une nouvelle interaction"""
+        self.interaction += 1
+
+    def interactions(self):
+        """Reruns partiels regroupés par interaction, du plus ancien au plus récent.
+
+        Le temps économisé est celui que le dernier rerun complet a passé hors des
+        fragments réexécutés (chaque fragment y est mesuré sous son nom) : le
+        travail évité, indépendamment de ce que les fragments ont dû recalculer.
+        """
+        groupes = {}
+        for rerun in self.reruns:
+            if rerun['fragment'] is None:
+                continue
+            groupe = groupes.get(rerun['interaction'])
+            if groupe is None:
+                groupe = groupes[rerun['interaction']] = {
+                    'date': rerun['date'], 'fragments': [], 'duree': 0.0, 'reference': rerun['reference'],
+                    'economie': None
+                }
+            groupe['fragments'].append(rerun['fragment'])
+            groupe['duree'] += rerun['duree']
+        for groupe in groupes.values():
+            reference = groupe.pop('reference')
+            if reference is not None:
+                groupe['duree_complete'] = reference['duree']
+                groupe['economie'] = reference['duree'] - sum(
+                    reference['mesures'].get(fragment, {}).get('temps', 0.0) for fragment in groupe['fragments']
+                )
+        return list(groupes.values())
+
+    def profiler_prochain_rerun(self):
+        """Demande un profil cProfile du prochain rerun"""
+        self.profil_demande = True
+
+    def vider(self):
+        """Oublie les reruns enregistrés"""
+        self.reruns.clear()
+
+
+class _Rerun:
+    __slots__ = ('enregistreur', 'fragment', 'jeton', 'debut', 'profil')
+
+    def __init__(self, enregistreur, fragment=None):
+        self.enregistreur = enregistreur
+        self.fragment = fragment
+        self.profil = None
+
+    def __enter__(self):
+        enregistreur = self.enregistreur
+        if self.fragment is None:
+            # Un rerun complet clôt l'interaction en cours
+            enregistreur.nouvelle_interaction()
+        enregistreur.courant = {
+            'date': datetime.now(), 'duree': 0.0, 'infos': {}, 'mesures': {}, 'fragment': self.fragment,
+            'interaction': enregistreur.interaction, 'reference': enregistreur.dernier_complet
+        }
+        self.jeton = _ENREGISTREUR.set(enregistreur)
+        if enregistreur.profil_demande:
+            enregistreur.profil_demande = False
+            self.profil = cProfile.Profile()
+            self.profil.enable()
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duree = time.perf_counter() - self.debut
+        enregistreur = self.enregistreur
+        if self.profil is not None:
+            self.profil.disable()
+            enregistreur.dernier_profil = _resume_profil(self.profil)
+        _ENREGISTREUR.reset(self.jeton)
+        enregistreur.courant['duree'] = duree
+        if self.fragment is None:
+            enregistreur.dernier_complet = enregistreur.courant
+        enregistreur.reruns.append(enregistreur.courant)
+        enregistreur.courant = None
+        return False
+
+
+def _resume_profil(profil):
+    """Texte pstats (trié par temps cumulé) et octets au format de Profile.dump_stats"""
+    flux = io.StringIO()
+    pstats.Stats(profil, stream=flux).sort_stats('cumulative').print_stats(LIGNES_PROFIL)
+    profil.create_stats()
+    return {'date': datetime.now(), 'texte': flux.getvalue(), 'pstats': marshal.dumps(profil.stats)}
@@ -0,0 +1,219 @@
+"""Modèle d'enregistrements compacts (__slots__) pour les projets et les revenus"""
+
+import sys
+import threading
+from collections.abc import Mapping, MutableMapping
+
+from plan_financier.suivi import SuiviMensuel
+
+
+class Nomenclature:
+    """Liste de valeurs codées par de petits entiers (codes stables, ajout à la volée).
+
+    Partagée par les sessions et le planificateur : l'ajout d'une valeur se fait
+    sous verrou, la lecture d'un code existant sans verrou.
+    """
+
+    __slots__ = ('valeurs', 'codes', '_verrou')
+
+    def __init__(self, valeurs=()):
+        self.valeurs = []
+        self.codes = {}
+        self._verrou = threading.Lock()
+        for valeur in valeurs:
+            self.code(valeur)
+
+    def code(self, valeur):
+        """Retourne le code d'une valeur, en l'enregistrant si elle est nouvelle"""
+        code = self.codes.get(valeur)
+        if code is None:
+            with self._verrou:
+                code = self.codes.get(valeur)
+                if code is None:
+                    code = len(self.valeurs)
+                    self.valeurs.append(sys.intern(valeur) if isinstance(valeur, str) else valeur)
+                    # Code publié après sa valeur : un code lu sans verrou est toujours décodable
+                    self.codes[valeur] = code
+        return code
+
+    def valeur(self, code):
+        """Retourne la valeur d'un code"""
+        return self.valeurs[code]
+
+
+# Nomenclatures partagées, alimentées par admin_config['listes_config']
+NOMENCLATURES = {
+    'types_projet': Nomenclature(),
+    'statuts_projet': Nomenclature(),
+    'priorites': Nomenclature(),
+    'types_revenu': Nomenclature(),
+    'responsables': Nomenclature()
+}
+
+
+def configurer_nomenclatures(listes_config):
+    """Enregistre les valeurs de listes_config (les codes existants ne changent pas)"""
+    for nom, nomenclature in NOMENCLATURES.items():
+        for valeur in listes_config.get(nom, ()):
+            nomenclature.code(valeur)
+
+
+class Enregistrement(MutableMapping):
+    """Enregistrement à __slots__ accessible comme un dict.
+
+    Les champs codés stockent un code de nomenclature et sont décodés à la lecture ;
+    les montants sont stockés en entiers (FCFA) et certains champs sont convertis
+    vers leur type dédié. Les clés hors schéma sont conservées dans un dict annexe
+    créé à la demande. Un enregistrement chargé paresseusement (`en_attente`)
+    ne connaît que son id : sa page est décodée au premier accès à un autre champ.
+    """
+
+    __slots__ = ('_extra', '_page')
+    _champs = ()
+    _champs_codes = {}
+    _champs_montants = frozenset()
+    _conversions = {}
+
+    def __init__(self, valeurs=()):
+        self._page = None
+        for cle, valeur in (valeurs.items() if isinstance(valeurs, Mapping) else valeurs):
+            self[cle] = valeur
+
+    @classmethod
+    def depuis_dict(cls, valeurs):
+        """Construit un enregistrement depuis un dict (ou le retourne s'il l'est déjà)"""
+        return valeurs if isinstance(valeurs, cls) else cls(valeurs)
+
+    @classmethod
+    def en_attente(cls, item_id, page):
+        """Enregistrement dont seul l'id est connu ; `page.decoder()` écrira ses autres champs"""
+        item = cls.__new__(cls)
+        item._page = page
+        item.id = item_id
+        return item
+
+    @property
+    def charge(self):
+        """False tant que la page d'un enregistrement en attente n'a pas été décodée"""
+        return self._page is None
+
+    def _charger(self):
+        if self._page is not None:
+            self._page.decoder()
+
+    def __getitem__(self, cle):
+        nomenclature = self._champs_codes.get(cle)
+        try:
+            valeur = getattr(self, cle) if cle in self._champs else self._extra[cle]
+        except (AttributeError, KeyError, TypeError):
+            if self._page is not None:
+                self._charger()
+                return self[cle]
+            raise KeyError(cle) from None
+        return NOMENCLATURES[nomenclature].valeur(valeur) if nomenclature else valeur
+
+    def __setitem__(self, cle, valeur):
+        if self._page is not None:
+            self._charger()
+        if cle not in self._champs:
+            if not hasattr(self, '_extra'):
+                self._extra = {}
+            self._extra[cle] = valeur
+            return
+        nomenclature = self._champs_codes.get(cle)
+        if nomenclature:
+            valeur = NOMENCLATURES[nomenclature].code(valeur)
+        elif cle in self._champs_montants and valeur is not None:
+            valeur = int(round(valeur))
+        elif cle in self._conversions and valeur is not None:
+            classe = self._conversions[cle]
+            if not isinstance(valeur, classe):
+                valeur = classe(valeur)
+        setattr(self, cle, valeur)
+
+    def __delitem__(self, cle):
+        self._charger()
+        try:
+            if cle in self._champs:
+                delattr(self, cle)
+            else:
+                del self._extra[cle]
+        except (AttributeError, KeyError):
+            raise KeyError(cle) from None
+
+    def __contains__(self, cle):
+        self._charger()
+        if cle in self._champs:
+            return hasattr(self, cle)
+        return hasattr(self, '_extra') and cle in self._extra
+
+    def __iter__(self):
+        self._charger()
+        for cle in self._champs:
+            if hasattr(self, cle):
+                yield cle
+        if hasattr(self, '_extra'):
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    # Pickle/copie : valeurs décodées, les codes ne dépendent que du processus courant
+    def __getstate__(self):
+        return dict(self)
+
+    def __setstate__(self, etat):
+        self._page = None
+        for cle, valeur in etat.items():
+            self[cle] = valeur
+
+    def vers_dict(self):
+        """Retourne une copie dict de l'enregistrement"""
+        return dict(self)
+
+
+CHAMPS_PROJET = (
+    'id', 'nom', 'type', 'montant_total', 'budget_alloue_mensuel', 'montant_utilise_reel',
+    'cash_flow_mensuel', 'statut', 'echeance', 'roi_attendu', 'priorite', 'description',
+    'source_financement', 'responsable', 'date_creation', 'date_modification',
+    'created_by', 'updated_by', 'suivi_mensuel'
+)
+CHAMPS_REVENU = (
+    'id', 'nom', 'montant_mensuel', 'type', 'regulier', 'responsable', 'date_creation',
+    'date_modification', 'date_disponibilite', 'created_by', 'updated_by', 'allocations',
+    'regles_allocation'
+)
+
+
+class Projet(Enregistrement):
+    """Projet du plan (voir CHAMPS_PROJET)"""
+
+    __slots__ = CHAMPS_PROJET
+    _champs = frozenset(CHAMPS_PROJET)
+    _champs_codes = {
+        'type': 'types_projet', 'statut': 'statuts_projet', 'priorite': 'priorites',
+        'responsable': 'responsables', 'created_by': 'responsables', 'updated_by': 'responsables'
+    }
+    _champs_montants = frozenset(('montant_total', 'budget_alloue_mensuel', 'montant_utilise_reel', 'cash_flow_mensuel'))
+    _conversions = {'suivi_mensuel': SuiviMensuel}
+
+
+class Revenu(Enregistrement):
+    """Revenu variable du plan (voir CHAMPS_REVENU)"""
+
+    __slots__ = CHAMPS_REVENU
+    _champs = frozenset(CHAMPS_REVENU)
+    _champs_codes = {
+        'type': 'types_revenu', 'responsable': 'responsables',
+        'created_by': 'responsables', 'updated_by': 'responsables'
+    }
+    _champs_montants = frozenset(('montant_mensuel',))
+
+
+def en_enregistrements(items, item_type='projet'):
+    """Convertit une liste de dicts en liste d'enregistrements Projet ou Revenu"""
+    classe = Projet if item_type == 'projet' else Revenu
+    return [classe.depuis_dict(item) for item in items]
@@ -0,0 +1,345 @@
+"""Moteur financier du plan : données explicites et index dérivés, sans Streamlit"""
+
+from datetime import date, datetime
+
+from plan_financier.agregats import AgregatsMensuels
+from plan_financier.allocations import allouer_revenus_en_lot
+from plan_financier.cache import CacheLRU
+from plan_financier.fonds_urgence import FondsUrgence
+from plan_financier.grand_livre import ALLOCATION, GrandLivre
+from plan_financier.index_dates import TOUS, IndexDates, est_visible
+from plan_financier.index_ids import IndexIds
+from plan_financier.modeles import configurer_nomenclatures, en_enregistrements
+from plan_financier.optimiseur import proposer_allocations, rangs_priorite
+from plan_financier.suivi import SuiviMensuel
+from plan_financier.table_projets import TableProjets, calculer_kpis_table
+
+
+class PlanFinancier:
+    """Projets, revenus et configuration d'un plan, avec leurs index tenus à jour.
+
+    Les allocations et les dépenses des projets sont inscrites au grand livre ;
+    sans grand livre fourni, il est repris des `allocations_recues` des projets.
+    Les index (table colonnaire, dates, ids, agrégats mensuels) sont construits à
+    la demande et reconstruits s'ils sont désynchronisés des listes ; les mutations
+    passent par les méthodes du plan, qui les maintiennent et incrémentent
+    `version`. Les résultats mémorisés dans `cache` sont indexés par cette version.
+    """
+
+    def __init__(self, projets, revenus_variables, admin_config, version=0, cache=None, grand_livre=None):
+        self.projets = projets
+        self.revenus_variables = revenus_variables
+        self.admin_config = admin_config
+        self.grand_livre = grand_livre if grand_livre is not None else GrandLivre.depuis_projets(projets)
+        self.version = version
+        self.cache = cache if cache is not None else CacheLRU(capacite=32)
+        self.table = None
+        self.agregats = None
+        self.fonds_urgence = None
+        self.index_dates = {}
+        self.index_ids = {}
+
+    def marquer_modifie(self):
+        """Incrémente la version des données (les entrées du cache deviennent obsolètes)"""
+        self.version += 1
+
+    def liste(self, item_type):
+        """Retourne la liste des projets ou des revenus"""
+        return self.projets if item_type == 'projet' else self.revenus_variables
+
+    # Index dérivés, reconstruits s'ils sont désynchronisés
+    def obtenir_table_projets(self):
+        """Retourne la table colonnaire des projets"""
+        if self.table is None or self.table.taille != len(self.projets):
+            self.table = TableProjets.depuis_projets(self.projets)
+        return self.table
+
+    def obtenir_index_dates(self, item_type):
+        """Retourne l'index de dates des projets ou des revenus.
+
+        Reconstruit seulement si la taille de la liste change : les dates se
+        modifient par modifier_item ou appliquer_modifications.
+        """
+        items = self.liste(item_type)
+        index = self.index_dates.get(item_type)
+        if index is None or len(index) != len(items):
+            index = self.index_dates[item_type] = IndexDates.depuis_items(items, item_type)
+        return index
+
+    def obtenir_index_ids(self, item_type):
+        """Retourne l'index id -> enregistrement des projets ou des revenus"""
+        items = self.liste(item_type)
+        index = self.index_ids.get(item_type)
+        if index is None or len(index) != len(items):
+            index = self.index_ids[item_type] = IndexIds.depuis_items(items)
+        return index
+
+    def obtenir_agregats(self):
+        """Retourne les agrégats mensuels des projets"""
+        if self.agregats is None or len(self.agregats) != len(self.projets):
+            self.agregats = AgregatsMensuels.depuis_projets(self.projets, self.grand_livre)
+        return self.agregats
+
+    def obtenir_fonds_urgence(self):
+        """Retourne le fonds d'urgence (revenus d'épargne et leurs allocations)"""
+        if self.fonds_urgence is None or len(self.fonds_urgence) != len(self.revenus_variables):
+            self.fonds_urgence = FondsUrgence.depuis_revenus(self.revenus_variables, self.grand_livre)
+        return self.fonds_urgence
+
+    def _index_existants(self, item_type):
+        """Index déjà construits pour un type d'item (les autres seront construits à la demande)"""
+        index = [self.index_ids.get(item_type), self.index_dates.get(item_type)]
+        if item_type == 'projet':
+            index += [self.table, self.agregats]
+        else:
+            index.append(self.fonds_urgence)
+        return [i for i in index if i is not None]
+
+    def appliquer_modifications(self, modifications, admin_config=None, evenements=None):
+        """Applique des enregistrements modifiés ailleurs (autre session) sans reconstruire les index.
+
+        `modifications` associe à 'projet' et 'revenu' un dict {id: donnees, ou None
+        si supprimé} ; `evenements` sont les colonnes des événements ajoutés au
+        grand livre (voir GrandLivre.ajouter_colonnes). Les enregistrements connus
+        sont mis à jour en place (les listes et l'index des ids restent valides),
+        les index dérivés sont ajustés et la version n'est incrémentée que si
+        quelque chose a changé. Retourne le nombre de changements appliqués.
+        """
+        total = 0
+        if evenements and evenements[0]:
+            debut = self.grand_livre.ajouter_colonnes(*evenements)
+            if self.agregats is not None or self.fonds_urgence is not None:
+                for allocation in self.grand_livre.allocations(self.grand_livre.positions(ALLOCATION, debut=debut)):
+                    if self.agregats is not None:
+                        self.agregats.ajouter_allocation(*allocation)
+                    if self.fonds_urgence is not None:
+                        self.fonds_urgence.ajouter_allocation(allocation[1], allocation[2])
+            total += len(evenements[0])
+        if admin_config is not None:
+            configurer_nomenclatures(admin_config.get('listes_config', {}))
+            self.admin_config.clear()
+            self.admin_config.update(admin_config)
+            total += 1
+        for item_type, changements in modifications.items():
+            if not changements:
+                continue
+            index_ids = self.obtenir_index_ids(item_type)
+            derives = [index for index in self._index_existants(item_type) if index is not index_ids]
+            supprimes = set()
+            for item_id, donnees in changements.items():
+                item = index_ids.obtenir(item_id)
+                if donnees is None:
+                    if item is not None:
+                        supprimes.add(item_id)
+                    continue
+                if item is None:
+                    item = en_enregistrements([donnees], item_type)[0]
+                    self.liste(item_type).append(item)
+                    index_ids.ajouter(item)
+                    for index in derives:
+                        index.ajouter(item)
+                else:
+                    self._remplacer_contenu(item, donnees, derives, remplacer=True)
+            if supprimes:
+                items = self.liste(item_type)
+                items[:] = [item for item in items if item['id'] not in supprimes]
+                for index in derives + [index_ids]:
+                    for item_id in supprimes:
+                        index.supprimer(item_id)
+            total += len(changements)
+        if total:
+            self.marquer_modifie()
+        return total
+
+    def _remplacer_contenu(self, item, donnees, derives, remplacer=False):
+        """Écrit `donnees` dans un enregistrement indexé (toutes ses clés si `remplacer`).
+
+        L'index des dates et la table gardent la position de l'item (ordre de la
+        liste source) ; les autres index retirent l'ancien contenu puis ajoutent le nouveau.
+        """
+        en_place = [index for index in derives if isinstance(index, (IndexDates, TableProjets))]
+        a_refaire = [index for index in derives if index not in en_place]
+        for index in a_refaire:
+            index.supprimer(item['id'])
+        if remplacer:
+            for cle in [cle for cle in item if cle not in donnees]:
+                del item[cle]
+        for cle, valeur in donnees.items():
+            item[cle] = valeur
+        for index in en_place:
+            index.mettre_a_jour(item)
+        for index in a_refaire:
+            index.ajouter(item)
+
+    # Calculs
+    def calculer_kpis(self, projets_filtres=None):
+        """Calcule les KPIs, éventuellement sur un sous-ensemble des projets.
+
+        Les lignes de la table du plan ne servent que si chaque projet filtré est
+        l'enregistrement même du plan ; des copies (éventuellement modifiées) ou
+        des projets hors du plan passent par une table temporaire.
+        """
+        table = self.obtenir_table_projets()
+        lignes = None
+        if projets_filtres is not None and projets_filtres is not self.projets:
+            index_ids = self.obtenir_index_ids('projet')
+            if len(table.positions) == table.taille and all(
+                    index_ids.obtenir(p['id']) is p for p in projets_filtres):
+                lignes = table.lignes_ids(p['id'] for p in projets_filtres)
+            if lignes is None:
+                table = TableProjets.depuis_projets(projets_filtres)
+        return calculer_kpis_table(table, self.revenus_variables, lignes,
+                                   self.obtenir_fonds_urgence().solde(date.today()),
+                                   self.admin_config.get('kpis_config'))
+
+    def filtrer_par_date(self, items, item_type, year, month):
+        """Filtre des projets ou revenus par (année, mois) ; index pour les listes du plan"""
+        if year == TOUS and month == TOUS:
+            return items
+        if items is self.liste(item_type):
+            return self.obtenir_index_dates(item_type).rechercher(year, month)
+        aujourd_hui = datetime.now().date()
+        return [item for item in items if est_visible(item, item_type, year, month, aujourd_hui)]
+
+    def projets_filtres_et_kpis(self, year, month):
+        """Projets filtrés et KPIs, mémorisés par (version, filtres de date, jour).
+
+        Le jour fait partie de la clé : le fonds d'urgence et la visibilité des
+        projets dépendent de la date du jour.
+        """
+        aujourd_hui = date.today()
+
+        def calculer():
+            projets_filtres = self.filtrer_par_date(self.projets, 'projet', year, month)
+            return projets_filtres, self.calculer_kpis(projets_filtres)
+        return self.cache.obtenir(('kpis_filtres', self.version, (year, month), aujourd_hui), calculer)
+
+    # Mutations
+    def ajouter_item(self, item_type, item):
+        """Ajoute un projet ou un revenu ; retourne l'enregistrement ajouté.
+
+        Le montant déjà utilisé d'un nouveau projet est inscrit comme dépense d'ouverture.
+        """
+        item = en_enregistrements([item], item_type)[0]
+        if item_type == 'projet':
+            self.grand_livre.migrer_projet(item)
+        self.liste(item_type).append(item)
+        for index in self._index_existants(item_type):
+            index.ajouter(item)
+        self.marquer_modifie()
+        return item
+
+    def modifier_item(self, item_type, item_id, changements, utilisateur=None):
+        """Modifie des champs d'un projet ou d'un revenu (dates comprises) en maintenant les index.
+
+        Les index ne détectent que les changements de taille des listes : une date
+        écrite directement dans un enregistrement laisserait l'index des dates
+        obsolète, elle doit passer par cette méthode. False si l'item est inconnu.
+        """
+        item = self.obtenir_index_ids(item_type).obtenir(item_id)
+        if item is None:
+            return False
+        changements = dict(changements, date_modification=datetime.now())
+        if utilisateur:
+            changements['updated_by'] = utilisateur
+        derives = [index for index in self._index_existants(item_type) if index is not self.index_ids.get(item_type)]
+        self._remplacer_contenu(item, changements, derives)
+        self.marquer_modifie()
+        return True
+
+    def supprimer_item(self, item_type, item_id):
+        """Supprime un projet ou un revenu"""
+        items = self.liste(item_type)
+        items[:] = [item for item in items if item['id'] != item_id]
+        for index in self._index_existants(item_type):
+            index.supprimer(item_id)
+        self.marquer_modifie()
+
+    def reassigner_id_item(self, item_type, ancien_id, nouvel_id, utilisateur=None):
+        """Change l'id d'un projet ou d'un revenu ; False si l'un des ids est invalide.
+
+        Ses montants au grand livre sont transférés vers le nouvel id.
+        """
+        index_ids = self.obtenir_index_ids(item_type)
+        if ancien_id not in index_ids or nouvel_id in index_ids:
+            return False
+        for index in self._index_existants(item_type):
+            index.reassigner_id(ancien_id, nouvel_id)
+        self.grand_livre.reassigner_id(item_type, ancien_id, nouvel_id, utilisateur=utilisateur)
+        if item_type == 'revenu' and self.agregats is not None:
+            self.agregats.reassigner_revenu(ancien_id, nouvel_id)
+        self.marquer_modifie()
+        return True
+
+    def allouer_revenus_en_lot(self, lots, utilisateur=None, mettre_a_jour_revenus=True):
+        """Alloue plusieurs revenus en une transaction (voir allocations.allouer_revenus_en_lot).
+
+        Les agrégats mensuels ne sont tenus à jour que s'ils sont déjà construits :
+        construits plus tard, ils reliront ces allocations au grand livre.
+        """
+        succes, message = allouer_revenus_en_lot(
+            self.obtenir_index_ids('revenu'), self.obtenir_index_ids('projet'), lots, self.grand_livre,
+            utilisateur, agregats=self.agregats, fonds_urgence=self.obtenir_fonds_urgence(),
+            mettre_a_jour_revenus=mettre_a_jour_revenus
+        )
+        if succes:
+            self.marquer_modifie()
+        return succes, message
+
+    def allouer_revenu(self, revenu_id, allocations_list, utilisateur=None):
+        """Alloue un revenu à plusieurs projets avec validation"""
+        return self.allouer_revenus_en_lot([(revenu_id, allocations_list)], utilisateur)
+
+    def proposer_allocations(self, mois, aujourd_hui=None):
+        """Répartition automatique des revenus du mois, sans l'appliquer (voir optimiseur.proposer_allocations)"""
+        table = self.obtenir_table_projets()
+        priorites = self.admin_config.get('listes_config', {}).get('priorites', ())
+        rangs = rangs_priorite(table, self.obtenir_index_ids('projet'), priorites)
+        return proposer_allocations(table, rangs, self.revenus_variables, self.grand_livre, mois, aujourd_hui)
+
+    def enregistrer_suivi_mensuel(self, projet_id, mois, prevu, reel, utilisateur=None):
+        """Ajoute ou corrige le suivi d'un mois d'un projet (vélocité mise à jour en O(1))"""
+        projet = self.obtenir_index_ids('projet').obtenir(projet_id)
+        if not projet:
+            return False, "Projet introuvable"
+
+        agregats = self.obtenir_agregats()
+        suivis = projet.get('suivi_mensuel')
+        if not isinstance(suivis, SuiviMensuel):
+            suivis = projet['suivi_mensuel'] = SuiviMensuel(suivis or [])
+        ancien = suivis.obtenir(mois)
+        if ancien is not None:
+            ancien = (ancien['prevu'], ancien['reel'])
+        suivis.enregistrer(mois, prevu, reel)
+        agregats.enregistrer_suivi(projet, mois, ancien, prevu, reel)
+        projet['date_modification'] = datetime.now()
+        if utilisateur:
+            projet['updated_by'] = utilisateur
+
+        self.obtenir_table_projets().mettre_a_jour(projet)
+        self.marquer_modifie()
+        return True, "Suivi enregistré avec succès"
+
+    def enregistrer_depense(self, projet_id, montant, mois, utilisateur=None):
+        """Inscrit une dépense d'un projet au grand livre et met à jour son montant utilisé"""
+        projet = self.obtenir_index_ids('projet').obtenir(projet_id)
+        if not projet:
+            return False, "Projet introuvable"
+
+        self.grand_livre.depenser(projet_id, montant, mois, utilisateur=utilisateur)
+        projet['montant_utilise_reel'] = self.montant_utilise_reel(projet_id)
+        projet['date_modification'] = datetime.now()
+        if utilisateur:
+            projet['updated_by'] = utilisateur
+
+        self.obtenir_table_projets().mettre_a_jour(projet)
+        self.marquer_modifie()
+        return True, "Dépense enregistrée avec succès"
+
+    def montant_utilise_reel(self, projet_id):
+        """Montant utilisé d'un projet, lu dans le dernier instantané du grand livre et sa queue"""
+        return self.grand_livre.depense_projet(projet_id)
+
+    def solde_projet(self, projet_id):
+        """Montant alloué à un projet et pas encore dépensé"""
+        return self.grand_livre.solde_projet(projet_id)
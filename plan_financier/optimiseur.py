@@ -0,0 +1,199 @@
+"""Répartition automatique des revenus d'un mois entre les projets : priorité, échéance et probabilité de réussite"""
+
+from datetime import date
+
+import numpy as np
+
+from plan_financier.fonds_urgence import verse_au_mois
+from plan_financier.sante_projets import scores_reussite
+
+# Seuils de progression (%) de calculer_probabilite_reussite : (seuil, atteint dès le seuil)
+# La pénalité disparaît à 10 % (progression < 10) ; les bonus s'obtiennent au-delà de 50 % et de 75 %
+SEUILS_PROGRESSION = ((10, True), (50, False), (75, False))
+
+
+def rangs_priorite(table, index_projets, priorites):
+    """Rang de priorité de chaque ligne de la table (0 : la première de `priorites`, inconnue : après la dernière)"""
+    rangs = {priorite: rang for rang, priorite in enumerate(priorites)}
+    return np.fromiter(
+        (rangs.get(index_projets.obtenir(projet_id, {}).get('priorite'), len(rangs))
+         for projet_id in table.ids[:table.taille].tolist()),
+        dtype=np.int64, count=table.taille
+    )
+
+
+def _probabilites(finance, total, jours_restants, velocite, budget):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        progression = np.where(total > 0, finance / total * 100, 0.0)
+    return scores_reussite(progression, jours_restants, velocite, budget)
+
+
+def paliers_reussite(finance, total, capacites, jours_restants, velocite, budget):
+    """Palier le plus rentable de chaque projet : (montant, points de probabilité gagnés).
+
+    Le palier est le plus petit montant qui fait franchir un seuil de progression
+    en rapportant le plus de points par franc ; il ne dépasse pas la capacité du
+    projet (montant 0 si aucun seuil n'est atteignable).
+    """
+    base = _probabilites(finance, total, jours_restants, velocite, budget)
+    montants = np.zeros(len(finance), dtype=np.int64)
+    gains = np.zeros(len(finance), dtype=np.int64)
+    rendements = np.zeros(len(finance))
+    for seuil, inclus in SEUILS_PROGRESSION:
+        # Plus petit montant entier qui porte la progression au seuil (inclus) ou au-delà (strict)
+        cible = -(-seuil * total // 100) if inclus else seuil * total // 100 + 1
+        montant = np.asarray(cible - finance, dtype=np.int64)
+        possible = (montant > 0) & (montant <= capacites) & (total > 0)
+        gain = np.where(possible, _probabilites(finance + montant, total, jours_restants, velocite, budget) - base, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rendement = np.where(gain > 0, gain / montant, 0.0)
+        meilleur = rendement > rendements
+        montants = np.where(meilleur, montant, montants)
+        gains = np.where(meilleur, gain, gains)
+        rendements = np.where(meilleur, rendement, rendements)
+    return montants, gains
+
+
+def _retenir_dans_l_ordre(montants, budget):
+    """Retient les montants dans l'ordre donné en sautant ceux qui ne tiennent plus : (masque, budget restant)"""
+    retenus = np.zeros(len(montants), dtype=bool)
+    candidats = np.flatnonzero(montants <= budget)
+    while len(candidats):
+        cumul = np.cumsum(montants[candidats])
+        k = np.searchsorted(cumul, budget, side='right')
+        retenus[candidats[:k]] = True
+        budget -= cumul[k - 1].item() if k else 0
+        suite = candidats[k + 1:]
+        candidats = suite[montants[suite] <= budget]
+    return retenus, budget
+
+
+def repartir(total_disponible, capacites, rangs, echeances, evaluer_paliers, tours=len(SEUILS_PROGRESSION)):
+    """Répartit `total_disponible` entre les projets ; retourne le montant de chaque projet.
+
+    Les niveaux de priorité sont servis dans l'ordre (rang croissant), chacun
+    jusqu'à la capacité de tous ses projets. Dans le niveau où l'argent manque, les
+    paliers de probabilité (`evaluer_paliers(attribues)` -> (montants, gains),
+    voir paliers_reussite) sont retenus par rendement décroissant, en `tours`
+    passes pour franchir plusieurs seuils, puis le reste va aux échéances les
+    plus proches.
+    """
+    attribues = np.zeros(len(capacites), dtype=np.int64)
+    niveaux, codes = np.unique(rangs, return_inverse=True)
+    besoins = np.bincount(codes, weights=capacites, minlength=len(niveaux))
+    servis = np.cumsum(besoins) <= total_disponible
+    complets = servis[codes]
+    attribues[complets] = capacites[complets]
+    reste = total_disponible - int(attribues.sum())
+    if servis.all() or reste <= 0:
+        return attribues
+
+    membres = np.flatnonzero(codes == np.argmin(servis))
+    for _ in range(tours):
+        paliers, gains = evaluer_paliers(attribues)
+        paliers, gains = paliers[membres], gains[membres]
+        candidats = np.flatnonzero(gains > 0)
+        if not len(candidats):
+            break
+        candidats = candidats[np.lexsort((echeances[membres][candidats], -gains[candidats] / paliers[candidats]))]
+        retenus, reste = _retenir_dans_l_ordre(paliers[candidats], reste)
+        if not retenus.any():
+            break
+        attribues[membres[candidats[retenus]]] += paliers[candidats[retenus]]
+
+    # Reste des capacités du niveau, par échéance croissante
+    membres = membres[np.argsort(echeances[membres], kind='stable')]
+    libres = capacites[membres] - attribues[membres]
+    avant = np.cumsum(libres) - libres
+    attribues[membres] += np.clip(reste - avant, 0, libres)
+    return attribues
+
+
+def _decouper(attribues, disponibles):
+    """Découpe les montants des projets entre les revenus pris dans l'ordre : (lignes, indices revenus, montants)"""
+    lignes = np.flatnonzero(attribues)
+    fins_projets = np.cumsum(attribues[lignes])
+    fins_revenus = np.cumsum(disponibles)
+    bornes = np.union1d(fins_projets, fins_revenus[fins_revenus < fins_projets[-1]]) if len(lignes) else fins_projets
+    montants = np.diff(bornes, prepend=0)
+    return (lignes[np.searchsorted(fins_projets, bornes)], np.searchsorted(fins_revenus, bornes), montants)
+
+
+def _par_ligne(table, projet_ids, montants):
+    """Montants par projet_id ramenés aux lignes de la table (projets hors table ignorés)"""
+    lignes = np.fromiter((table.positions.get(i, -1) for i in projet_ids), dtype=np.intp)
+    montants = np.fromiter(montants, dtype=np.int64, count=len(lignes))
+    connus = lignes >= 0
+    resultat = np.zeros(table.taille, dtype=np.int64)
+    np.add.at(resultat, lignes[connus], montants[connus])
+    return resultat
+
+
+def proposer_allocations(table, rangs, revenus, grand_livre, mois, aujourd_hui=None):
+    """Propose la répartition des revenus d'un mois entre les projets de la table ; retourne (lots, bilan).
+
+    Seuls les revenus versés ce mois-là sont répartis (réguliers depuis leur
+    disponibilité, ponctuels à leur seul mois), chacun pour ce qu'il lui reste de
+    son montant mensuel. Le montant financé d'un projet se lit au grand livre :
+    son montant utilisé ou, s'il est plus grand, ce qui lui est alloué les autres
+    mois, plus ses allocations du mois. Sa capacité est le plus petit de son
+    reste à financer (montant_total - financé) et de ce qu'il reste de son budget
+    mensuel ce mois. Les probabilités du bilan sont calculées sur ce montant
+    financé. `lots` se passe tel quel à allouer_revenus_en_lot : chaque lot
+    reprend les allocations du mois déjà inscrites pour le revenu, augmentées de
+    la proposition, si bien qu'une seconde proposition n'ajoute rien.
+    """
+    if aujourd_hui is None:
+        aujourd_hui = date.today()
+    n = table.taille
+    revenus = [revenu for revenu in revenus if verse_au_mois(revenu, mois)]
+    deja_revenus, deja_projets, deja_montants = grand_livre.allocations_du_mois(mois)
+    deja_lignes = _par_ligne(table, deja_projets.tolist(), deja_montants.tolist())
+    alloue_projets = grand_livre.soldes()[0]
+    alloue_lignes = _par_ligne(table, alloue_projets.keys(), alloue_projets.values())
+    deja_par_revenu = {}
+    for revenu_id, montant in zip(deja_revenus.tolist(), deja_montants.tolist()):
+        deja_par_revenu[revenu_id] = deja_par_revenu.get(revenu_id, 0) + montant
+    disponibles = np.fromiter(
+        (max(0, revenu['montant_mensuel'] - deja_par_revenu.get(revenu['id'], 0)) for revenu in revenus),
+        dtype=np.int64, count=len(revenus)
+    )
+
+    utilise = table.montant_utilise_reel[:n]
+    total = table.montant_total[:n]
+    budget = table.budget_alloue_mensuel[:n]
+    finance = np.maximum(utilise, alloue_lignes - deja_lignes) + deja_lignes
+    capacites = np.maximum(np.minimum(total - finance, budget - deja_lignes), 0).astype(np.int64)
+    jours_restants = table.echeance_ordinal[:n] - aujourd_hui.toordinal()
+    velocite = table.velocite[:n]
+
+    def evaluer_paliers(attribues):
+        return paliers_reussite(finance + attribues, total, capacites - attribues, jours_restants, velocite, budget)
+
+    attribues = repartir(int(disponibles.sum()), capacites, rangs, table.echeance_ordinal[:n], evaluer_paliers)
+
+    # Lots : allocations déjà inscrites du revenu + découpage de la proposition
+    lignes, indices_revenus, montants = _decouper(attribues, disponibles)
+    ids = table.ids[:n]
+    nouveaux = {}
+    for revenu_id, projet_id, montant in zip([revenus[i]['id'] for i in indices_revenus.tolist()],
+                                             ids[lignes].tolist(), montants.tolist()):
+        par_projet = nouveaux.setdefault(revenu_id, {})
+        par_projet[projet_id] = par_projet.get(projet_id, 0) + montant
+    for revenu_id, projet_id, montant in zip(deja_revenus.tolist(), deja_projets.tolist(), deja_montants.tolist()):
+        if revenu_id in nouveaux:
+            nouveaux[revenu_id][projet_id] = nouveaux[revenu_id].get(projet_id, 0) + montant
+    lots = [(revenu_id, [{'projet_id': projet_id, 'montant': montant, 'mois': mois}
+                         for projet_id, montant in par_projet.items()])
+            for revenu_id, par_projet in nouveaux.items()]
+
+    avant = _probabilites(finance, total, jours_restants, velocite, budget)
+    apres = _probabilites(finance + attribues, total, jours_restants, velocite, budget)
+    bilan = {
+        'montant_reparti': int(attribues.sum()),
+        'montant_disponible': int(disponibles.sum()),
+        'projets_finances': int(np.count_nonzero(attribues)),
+        'gain_probabilite': int((apres - avant).sum()),
+        'probabilite_moyenne': float(apres.mean()) if n else 0.0
+    }
+    return lots, bilan
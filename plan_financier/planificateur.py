@@ -0,0 +1,215 @@
+"""Planificateur asyncio des revenus réguliers : allocations mensuelles postées en arrière-plan
+
+Utilisable comme worker séparé :
+    python -m plan_financier.planificateur --base plan_financier.db
+"""
+
+import argparse
+import asyncio
+import threading
+from calendar import monthrange
+from collections import deque
+from datetime import datetime
+
+from plan_financier.modeles import en_enregistrements
+from plan_financier.moteur import PlanFinancier
+from plan_financier.stockage import ConflitModification, StockagePlan
+
+# Secondes entre deux passages
+INTERVALLE = 3600
+# Auteur des allocations postées (updated_by)
+UTILISATEUR = 'Planificateur'
+
+
+def _mois_suivant(annee, mois):
+    return (annee + 1, 1) if mois == 12 else (annee, mois + 1)
+
+
+def mois_dus(revenu, aujourd_hui):
+    """Mois ('AAAA-MM') échus et pas encore postés pour un revenu, dans l'ordre chronologique.
+
+    Seuls les revenus réguliers ayant des règles d'allocation (`regles_allocation`)
+    sont postés. Un mois est dû quand le jour de disponibilité du revenu est
+    atteint ; le rattrapage reprend après le dernier mois posté, ou dès le mois
+    de disponibilité.
+    """
+    if not revenu.get('regulier') or not revenu.get('regles_allocation'):
+        return []
+    disponibilite = revenu.get('date_disponibilite') or revenu['date_creation']
+    annee, mois = disponibilite.year, disponibilite.month
+    deja = revenu.get('dernier_mois_poste')
+    if deja and deja >= f'{annee}-{mois:02d}':
+        annee, mois = _mois_suivant(*map(int, deja.split('-')))
+
+    dus = []
+    while True:
+        jour = min(disponibilite.day, monthrange(annee, mois)[1])
+        if (annee, mois, jour) > (aujourd_hui.year, aujourd_hui.month, aujourd_hui.day):
+            return dus
+        dus.append(f'{annee}-{mois:02d}')
+        annee, mois = _mois_suivant(annee, mois)
+
+
+def preparer_lots(revenus, aujourd_hui, grand_livre=None):
+    """Lots (revenu_id, allocations) des mois dus de tous les revenus, et dernier mois par revenu.
+
+    Les mois où le revenu a déjà des allocations au grand livre fourni (postées
+    à la main comprises) sont sautés, sans arrêter le rattrapage des autres. Les
+    revenus dont les règles dépassent le montant mensuel sont écartés (et listés).
+    """
+    lots = []
+    derniers = {}
+    ecartes = []
+    for revenu in revenus:
+        dus = mois_dus(revenu, aujourd_hui)
+        if not dus:
+            continue
+        regles = revenu['regles_allocation']
+        if sum(regle['montant'] for regle in regles) > revenu['montant_mensuel']:
+            ecartes.append(revenu['id'])
+            continue
+        alloues = grand_livre.mois_alloues(revenu['id']) if grand_livre is not None else ()
+        for mois in dus:
+            if mois in alloues:
+                continue
+            lots.append((revenu['id'], [
+                {'projet_id': regle['projet_id'], 'montant': regle['montant'], 'mois': mois} for regle in regles
+            ]))
+        derniers[revenu['id']] = dus[-1]
+    return lots, derniers, ecartes
+
+
+class PlanificateurRevenus:
+    """Poste les allocations mensuelles des revenus réguliers depuis leurs règles permanentes.
+
+    Les règles d'un revenu sont ses `regles_allocation` ({projet_id, montant}),
+    distinctes des allocations postées à la main (revenu['allocations']) : les
+    lots du planificateur ne sont inscrits qu'au grand livre. Chaque passage
+    synchronise le plan avec la base, calcule les mois dus de tous les revenus
+    et les poste en une seule écriture, avec `dernier_mois_poste` de chaque
+    revenu dans la même transaction : un passage répété ou interrompu ne poste
+    rien deux fois et les mois manqués sont rattrapés. `horloge` et `attendre`
+    (coroutine de pause) peuvent être remplacées par une horloge simulée.
+    """
+
+    def __init__(self, chemin, intervalle=INTERVALLE, horloge=datetime.now, attendre=None, utilisateur=UTILISATEUR):
+        self.chemin = chemin
+        self.intervalle = intervalle
+        self.horloge = horloge
+        self.attendre = attendre or self._attendre_arret
+        self.utilisateur = utilisateur
+        self.stockage = None
+        self.plan = None
+        self.passages = deque(maxlen=50)
+        self._arret = None
+        self._boucle = None
+        self._thread = None
+
+    def _synchroniser(self):
+        """Plan à jour des écritures des sessions ; False si la base est vide"""
+        if self.stockage is None:
+            self.stockage = StockagePlan(self.chemin)
+        if self.plan is not None and self.stockage.modifie_par_autre_session():
+            modifications = self.stockage.modifications_distantes()
+            if modifications is None:
+                self.plan = None
+            else:
+                changements, admin_config = modifications
+                self.plan.appliquer_modifications(
+                    {'projet': changements['projets'], 'revenu': changements['revenus_variables']}, admin_config,
+                    changements['grand_livre']
+                )
+        if self.plan is None:
+            if not self.stockage.est_initialise():
+                return False
+            projets, revenus, admin_config, grand_livre = self.stockage.charger_plan()
+            self.plan = PlanFinancier(en_enregistrements(projets, 'projet'), en_enregistrements(revenus, 'revenu'),
+                                      admin_config, grand_livre=grand_livre)
+        return True
+
+    def passer(self):
+        """Un passage : poste en une écriture toutes les allocations dues ; retourne son bilan"""
+        maintenant = self.horloge()
+        bilan = {'date': maintenant, 'lots': 0, 'allocations': 0, 'ecartes': [], 'erreur': None}
+        if self._synchroniser():
+            lots, derniers, bilan['ecartes'] = preparer_lots(self.plan.revenus_variables, maintenant.date(),
+                                                             self.plan.grand_livre)
+            if lots:
+                self._poster(lots, derniers, bilan)
+        self.passages.append(bilan)
+        return bilan
+
+    def _poster(self, lots, derniers, bilan):
+        succes, message = self.plan.allouer_revenus_en_lot(lots, self.utilisateur, mettre_a_jour_revenus=False)
+        if not succes:
+            bilan['erreur'] = message
+            return
+        index_revenus = self.plan.obtenir_index_ids('revenu')
+        for revenu_id, mois in derniers.items():
+            index_revenus.obtenir(revenu_id)['dernier_mois_poste'] = mois
+        try:
+            self.stockage.sauvegarder_plan(
+                self.plan.projets, self.plan.revenus_variables, self.plan.admin_config, self.utilisateur,
+                self.plan.grand_livre
+            )
+        except ConflitModification as conflit:
+            # Rien n'a été écrit : rechargement et nouvel essai au prochain passage
+            self.plan = None
+            bilan['erreur'] = str(conflit)
+            return
+        bilan['lots'] = len(lots)
+        bilan['allocations'] = sum(len(allocations) for _, allocations in lots)
+
+    async def _attendre_arret(self, delai):
+        try:
+            await asyncio.wait_for(self._arret.wait(), delai)
+        except asyncio.TimeoutError:
+            pass
+
+    async def executer(self):
+        """Boucle du planificateur jusqu'à `arreter()` ; les passages tournent hors de la boucle d'événements"""
+        self._arret = asyncio.Event()
+        self._boucle = asyncio.get_running_loop()
+        while not self._arret.is_set():
+            await asyncio.to_thread(self.passer)
+            await self.attendre(self.intervalle)
+
+    def demarrer(self):
+        """Lance la boucle dans un thread d'arrière-plan"""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.executer(),), name='planificateur', daemon=True)
+        self._thread.start()
+
+    def arreter(self, delai=None):
+        """Demande l'arrêt de la boucle et attend la fin du passage en cours"""
+        if self._boucle is not None and self._arret is not None:
+            try:
+                dans_la_boucle = asyncio.get_running_loop() is self._boucle
+            except RuntimeError:
+                dans_la_boucle = False
+            if dans_la_boucle:
+                self._arret.set()
+            else:
+                self._boucle.call_soon_threadsafe(self._arret.set)
+        if self._thread is not None:
+            self._thread.join(delai)
+
+
+def main(arguments=None):
+    parseur = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parseur.add_argument('--base', required=True, help="base SQLite du plan")
+    parseur.add_argument('--intervalle', type=float, default=INTERVALLE, help="secondes entre deux passages")
+    parseur.add_argument('--une-fois', action='store_true', help="un seul passage puis arrêt")
+    args = parseur.parse_args(arguments)
+
+    planificateur = PlanificateurRevenus(args.base, intervalle=args.intervalle)
+    if args.une_fois:
+        print(planificateur.passer())
+        return
+    try:
+        asyncio.run(planificateur.executer())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Santé des projets : catégorisation et probabilité de réussite, unitaires et vectorisées"""
+
+from datetime import date
+
+import numpy as np
+
+from plan_financier.suivi import SuiviMensuel
+
+# Catégories de categorize_project, dans l'ordre des codes de l'API vectorisée
+CATEGORIES = (
+    ('en-retard', 'En Retard', '#ff4444'),
+    ('a-risque', 'À Risque', '#ff8800'),
+    ('en-avance', 'En Avance', '#00aa00'),
+    ('bloque', 'Budget Épuisé', '#666666'),
+    ('en-cours', 'En Cours', '#007bff')
+)
+EN_RETARD, A_RISQUE, EN_AVANCE, BLOQUE, EN_COURS = range(len(CATEGORIES))
+STATUTS = np.array([statut for statut, _, _ in CATEGORIES])
+LIBELLES = np.array([libelle for _, libelle, _ in CATEGORIES])
+COULEURS = np.array([couleur for _, _, couleur in CATEGORIES])
+
+
+def categorize_project(projet):
+    """Catégorise un projet selon son état"""
+    aujourd_hui = date.today()
+    echeance = projet['echeance']
+
+    # Calcul progression
+    progression = (projet['montant_utilise_reel'] / projet['montant_total']) * 100 if projet['montant_total'] > 0 else 0
+
+    # Jours jusqu'à échéance
+    jours_restants = (echeance - aujourd_hui).days
+
+    # Logique de catégorisation
+    if echeance < aujourd_hui:
+        return 'en-retard', 'En Retard', '#ff4444'
+    elif jours_restants <= 30 and progression < 70:
+        return 'a-risque', 'À Risque', '#ff8800'
+    elif progression > 90:
+        return 'en-avance', 'En Avance', '#00aa00'
+    elif projet['montant_utilise_reel'] >= projet['montant_total']:
+        return 'bloque', 'Budget Épuisé', '#666666'
+    else:
+        return 'en-cours', 'En Cours', '#007bff'
+
+
+def calculer_velocite_projet(projet):
+    """Calcule la vélocité mensuelle d'un projet"""
+    if not projet.get('suivi_mensuel'):
+        return 0
+
+    suivis = projet['suivi_mensuel']
+    if isinstance(suivis, SuiviMensuel):
+        # Liste triée avec fenêtre glissante tenue à jour : O(1)
+        return suivis.velocite()
+    if len(suivis) < 2:
+        return 0
+
+    # Prendre les 3 derniers mois pour la vélocité
+    recent_suivis = sorted(suivis, key=lambda x: x['mois'])[-3:]
+    velocites = []
+
+    for suivi in recent_suivis:
+        velocites.append(suivi['reel'])
+
+    return sum(velocites) / len(velocites) if velocites else 0
+
+
+def calculer_probabilite_reussite(projet):
+    """Calcule la probabilité de réussite d'un projet"""
+    # Facteurs de calcul
+    progression = (projet['montant_utilise_reel'] / projet['montant_total']) * 100 if projet['montant_total'] > 0 else 0
+    jours_restants = (projet['echeance'] - date.today()).days
+    velocite = calculer_velocite_projet(projet)
+
+    # Score basé sur différents critères
+    score = 50  # Score de base
+
+    # Bonus progression
+    if progression > 75:
+        score += 20
+    elif progression > 50:
+        score += 10
+    elif progression < 10:
+        score -= 20
+
+    # Bonus temps
+    if jours_restants > 90:
+        score += 15
+    elif jours_restants < 30:
+        score -= 25
+
+    # Bonus vélocité
+    if velocite > projet['budget_alloue_mensuel'] * 0.8:
+        score += 15
+    elif velocite < projet['budget_alloue_mensuel'] * 0.3:
+        score -= 15
+
+    return max(0, min(100, score))
+
+
+def _progression(table, lignes):
+    """Progression (%) par projet, calculée comme dans les fonctions unitaires"""
+    n = table.taille
+    utilise = table.montant_utilise_reel[:n]
+    total = table.montant_total[:n]
+    if lignes is not None:
+        utilise, total = utilise[lignes], total[lignes]
+    utilise = utilise.astype(np.float64)
+    total = total.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        progression = np.where(total > 0, utilise / total * 100, 0.0)
+    return utilise, total, progression
+
+
+def _colonne(table, nom, lignes):
+    colonne = getattr(table, nom)[:table.taille]
+    return colonne if lignes is None else colonne[lignes]
+
+
+def evaluer_sante_projets(table, aujourd_hui=None, lignes=None):
+    """Évalue catégorie et probabilité de réussite de tous les projets de la table.
+
+    Équivalent vectorisé de categorize_project et calculer_probabilite_reussite :
+    `aujourd_hui` est évalué une seule fois et la vélocité est lue dans la colonne
+    précalculée de la table. Retourne un dict de tableaux NumPy alignés sur les
+    lignes (ou sur `lignes` si fourni) : codes, statuts, libelles, couleurs,
+    probabilites.
+    """
+    if aujourd_hui is None:
+        aujourd_hui = date.today()
+    utilise, total, progression = _progression(table, lignes)
+    jours_restants = _colonne(table, 'echeance_ordinal', lignes) - aujourd_hui.toordinal()
+    budget = _colonne(table, 'budget_alloue_mensuel', lignes).astype(np.float64)
+    velocite = _colonne(table, 'velocite', lignes)
+
+    # Catégorie : première condition vraie, dans l'ordre de categorize_project
+    codes = np.select(
+        [jours_restants < 0,
+         (jours_restants <= 30) & (progression < 70),
+         progression > 90,
+         utilise >= total],
+        [EN_RETARD, A_RISQUE, EN_AVANCE, BLOQUE],
+        default=EN_COURS
+    ).astype(np.int8)
+
+    return {
+        'codes': codes,
+        'statuts': STATUTS[codes],
+        'libelles': LIBELLES[codes],
+        'couleurs': COULEURS[codes],
+        'probabilites': scores_reussite(progression, jours_restants, velocite, budget)
+    }
+
+
+def scores_reussite(progression, jours_restants, velocite, budget):
+    """Probabilités de réussite vectorisées : mêmes paliers que calculer_probabilite_reussite"""
+    score = np.full(len(progression), 50, dtype=np.int64)
+    score += np.select([progression > 75, progression > 50, progression < 10], [20, 10, -20], default=0)
+    score += np.select([jours_restants > 90, jours_restants < 30], [15, -25], default=0)
+    score += np.select([velocite > budget * 0.8, velocite < budget * 0.3], [15, -15], default=0)
+    return np.clip(score, 0, 100)
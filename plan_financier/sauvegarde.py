@@ -0,0 +1,248 @@
+"""Sauvegarde et restauration du plan en JSON ou JSON Lines versionnés, lecture en flux"""
+
+import json
+from datetime import datetime
+
+from plan_financier import codec_json
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.modeles import Projet, Revenu, configurer_nomenclatures
+
+FORMAT = 'plan_financier'
+VERSION_FORMAT = 2
+
+# Collections sauvegardées, dans l'ordre d'écriture, et type d'enregistrement associé
+COLLECTIONS = (('projets', 'projet'), ('revenus_variables', 'revenu'), ('evenements', 'evenement'))
+TYPES = ('admin_config',) + tuple(type_item for _, type_item in COLLECTIONS)
+TAILLE_BLOC = 1 << 16
+# Taille maximale d'une valeur JSON lue en flux (un projet et son historique)
+TAILLE_MAX_VALEUR = 1 << 24
+# Événements restaurés par bloc dans le grand livre
+TAILLE_LOT_EVENEMENTS = 1 << 16
+
+_DECODEUR = json.JSONDecoder(object_hook=codec_json.decoder_objet)
+_ESPACES = ' \t\r\n'
+
+
+def _entete():
+    return {'format': FORMAT, 'version': VERSION_FORMAT, 'cree_le': datetime.now()}
+
+
+def _verifier_entete(entete):
+    """Valide l'en-tête et retourne la version du fichier"""
+    if not isinstance(entete, dict) or entete.get('format') != FORMAT:
+        raise ValueError("Ce fichier n'est pas une sauvegarde de plan financier")
+    version = entete.get('version')
+    if not isinstance(version, int) or version > VERSION_FORMAT:
+        raise ValueError(f"Version de sauvegarde non prise en charge : {version}")
+    return version
+
+
+def _migrer_v1(type_item, donnees):
+    """v1 -> v2 : allocations_recues et montant utilisé d'un projet deviennent des événements du grand livre"""
+    if type_item != 'projet':
+        return [(type_item, donnees)]
+    grand_livre = GrandLivre()
+    grand_livre.migrer_projet(donnees)
+    return [(type_item, donnees)] + [('evenement', evenement) for evenement in grand_livre.evenements()]
+
+
+# Migrations des enregistrements : version -> fonction(type, donnees) vers la liste
+# des enregistrements (type, donnees) de la version suivante
+MIGRATIONS = {1: _migrer_v1}
+
+
+def _migrer(version, type_item, donnees):
+    """Met un enregistrement au format courant ; retourne les paires (type, donnees) obtenues"""
+    enregistrements = [(type_item, donnees)]
+    while version < VERSION_FORMAT:
+        enregistrements = [migre for type_item, donnees in enregistrements
+                           for migre in MIGRATIONS[version](type_item, donnees)]
+        version += 1
+    return enregistrements
+
+
+def ecrire_jsonl(sortie, projets, revenus, admin_config, grand_livre):
+    """Écrit le plan en JSON Lines dans un flux texte : en-tête puis un enregistrement par ligne.
+
+    Retourne le nombre d'enregistrements écrits par type.
+    """
+    sortie.write(codec_json.dumps(_entete()) + '\n')
+    sortie.write(codec_json.dumps({'type': 'admin_config', 'donnees': admin_config}) + '\n')
+    comptes = {'admin_config': 1}
+    for (_, type_item), items in zip(COLLECTIONS, (projets, revenus, grand_livre.evenements())):
+        comptes[type_item] = 0
+        for item in items:
+            sortie.write(codec_json.dumps({'type': type_item, 'donnees': item}) + '\n')
+            comptes[type_item] += 1
+    return comptes
+
+
+def ecrire_json(sortie, projets, revenus, admin_config, grand_livre):
+    """Écrit le plan en un document JSON, élément par élément (sans chaîne géante en mémoire)"""
+    entete = codec_json.dumps(_entete())
+    sortie.write(entete[:-1] + ',"admin_config":' + codec_json.dumps(admin_config))
+    comptes = {'admin_config': 1}
+    for (collection, type_item), items in zip(COLLECTIONS, (projets, revenus, grand_livre.evenements())):
+        sortie.write(f',"{collection}":[')
+        comptes[type_item] = 0
+        for item in items:
+            if comptes[type_item]:
+                sortie.write(',\n')
+            sortie.write(codec_json.dumps(item))
+            comptes[type_item] += 1
+        sortie.write(']')
+    sortie.write('}\n')
+    return comptes
+
+
+def lire_jsonl(entree):
+    """Génère les paires (type, donnees) d'une sauvegarde JSON Lines, ligne par ligne"""
+    version = None
+    for numero, ligne in enumerate(entree, start=1):
+        if not ligne.strip():
+            continue
+        try:
+            objet = codec_json.loads(ligne)
+        except json.JSONDecodeError as erreur:
+            raise ValueError(f"Ligne {numero} illisible : {erreur.msg}") from None
+        if version is None:
+            version = _verifier_entete(objet)
+            continue
+        type_item = objet.get('type') if isinstance(objet, dict) else None
+        if type_item not in TYPES or not isinstance(objet.get('donnees'), dict):
+            raise ValueError(f"Ligne {numero} : enregistrement invalide ({type_item})")
+        yield from _migrer(version, type_item, objet['donnees'])
+    if version is None:
+        raise ValueError("Sauvegarde vide")
+
+
+class _LecteurFlux:
+    """Lecture incrémentale de valeurs JSON dans un flux texte, bloc par bloc"""
+
+    def __init__(self, entree):
+        self.entree = entree
+        self.tampon = ''
+        self.position = 0
+        self.fin = False
+
+    def _remplir(self):
+        bloc = self.entree.read(TAILLE_BLOC)
+        if not bloc:
+            self.fin = True
+            return False
+        self.tampon = self.tampon[self.position:] + bloc
+        self.position = 0
+        return True
+
+    def caractere(self):
+        """Prochain caractère non blanc (sans le consommer), ou '' en fin de flux"""
+        while True:
+            while self.position < len(self.tampon) and self.tampon[self.position] in _ESPACES:
+                self.position += 1
+            if self.position < len(self.tampon):
+                return self.tampon[self.position]
+            if not self._remplir():
+                return ''
+
+    def attendre(self, attendu):
+        """Consomme le caractère attendu"""
+        caractere = self.caractere()
+        if caractere != attendu:
+            raise ValueError(f"JSON invalide : '{attendu}' attendu, '{caractere or 'fin de fichier'}' trouvé")
+        self.position += 1
+
+    def valeur(self):
+        """Décode la prochaine valeur JSON, en lisant d'autres blocs si elle est incomplète"""
+        self.caractere()
+        while True:
+            try:
+                valeur, fin = _DECODEUR.raw_decode(self.tampon, self.position)
+            except json.JSONDecodeError as erreur:
+                # Valeur peut-être coupée par la fin du tampon : on lit la suite
+                if len(self.tampon) - self.position > TAILLE_MAX_VALEUR or not self._remplir():
+                    raise ValueError(f"JSON invalide : {erreur.msg}") from None
+                continue
+            # Un nombre en fin de tampon peut continuer dans le bloc suivant
+            if fin == len(self.tampon) and not self.fin and self._remplir():
+                continue
+            self.position = fin
+            return valeur
+
+
+def lire_json(entree):
+    """Génère les paires (type, donnees) d'un document JSON, élément par élément.
+
+    Seuls l'en-tête et l'élément en cours de décodage sont en mémoire : les listes
+    de projets et de revenus ne sont jamais chargées d'un bloc.
+    """
+    lecteur = _LecteurFlux(entree)
+    types_collections = dict(COLLECTIONS)
+    entete = {}
+    version = None
+    lecteur.attendre('{')
+    while lecteur.caractere() != '}':
+        if entete or version is not None:
+            lecteur.attendre(',')
+        cle = lecteur.valeur()
+        lecteur.attendre(':')
+        if cle in types_collections or cle == 'admin_config':
+            if version is None:
+                version = _verifier_entete(entete)
+            if cle == 'admin_config':
+                yield from _migrer(version, 'admin_config', lecteur.valeur())
+                continue
+            lecteur.attendre('[')
+            premier = True
+            while lecteur.caractere() != ']':
+                if not premier:
+                    lecteur.attendre(',')
+                premier = False
+                yield from _migrer(version, types_collections[cle], lecteur.valeur())
+            lecteur.attendre(']')
+        else:
+            entete[cle] = lecteur.valeur()
+    lecteur.attendre('}')
+    if version is None:
+        _verifier_entete(entete)
+
+
+def lire_sauvegarde(entree, format_fichier='jsonl'):
+    """Génère les paires (type, donnees) d'une sauvegarde 'json' ou 'jsonl'"""
+    if format_fichier == 'jsonl':
+        return lire_jsonl(entree)
+    if format_fichier == 'json':
+        return lire_json(entree)
+    raise ValueError(f"Format de sauvegarde inconnu : {format_fichier}")
+
+
+def _restaurer_evenements(grand_livre, evenements):
+    try:
+        grand_livre.ajouter_evenements(evenements)
+    except (KeyError, TypeError, ValueError, AttributeError) as erreur:
+        raise ValueError(f"Événement du grand livre invalide : {erreur!r}") from None
+    evenements.clear()
+
+
+def charger_sauvegarde(entree, format_fichier='jsonl'):
+    """Restaure (projets, revenus, admin_config, grand_livre) en convertissant chaque enregistrement à la lecture"""
+    projets = []
+    revenus = []
+    admin_config = None
+    grand_livre = GrandLivre()
+    evenements = []
+    for type_item, donnees in lire_sauvegarde(entree, format_fichier):
+        if type_item == 'admin_config':
+            admin_config = donnees
+            configurer_nomenclatures(admin_config.get('listes_config', {}))
+        elif type_item == 'projet':
+            projets.append(Projet(donnees))
+        elif type_item == 'revenu':
+            revenus.append(Revenu(donnees))
+        else:
+            evenements.append(donnees)
+            if len(evenements) >= TAILLE_LOT_EVENEMENTS:
+                _restaurer_evenements(grand_livre, evenements)
+    _restaurer_evenements(grand_livre, evenements)
+    if admin_config is None:
+        raise ValueError("Sauvegarde incomplète : admin_config absente")
+    return projets, revenus, admin_config, grand_livre
@@ -0,0 +1,193 @@
+"""Évaluation de scénarios « what-if » en lots, répartis sur un pool de processus"""
+
+import copy
+import itertools
+import math
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+
+from plan_financier.sante_projets import A_RISQUE, EN_RETARD, evaluer_sante_projets
+from plan_financier.table_projets import ECHEANCE_ABSENTE, TableProjets, calculer_kpis_table, code_type
+
+JOURS_PAR_MOIS = 365.25 / 12
+# Objectifs de kpis_config comparés au KPI correspondant
+OBJECTIFS = (
+    ('objectif_cash_flow', 'cash_flow_mensuel'),
+    ('objectif_ratio_actifs', 'ratio_actifs_passifs'),
+    ('objectif_revenus_passifs', 'revenus_passifs_pct')
+)
+# En deçà (scénarios x projets), le démarrage des processus coûte plus qu'il ne rapporte
+SEUIL_PARALLELE = 2_000_000
+_LOTS_PAR_PROCESSUS = 4
+
+# État de chaque processus du pool, initialisé une seule fois
+_ETAT_PROCESSUS = {}
+
+
+def grille_scenarios(facteurs_budget=(1,), reports_mois=(0,), montants_revenus=({},), types=None):
+    """Produit cartésien des variations : budgets, reports d'échéance et montants de revenus.
+
+    `montants_revenus` est une suite de dicts {revenu_id: nouveau montant_mensuel} ;
+    `types` limite les variations de budget et d'échéance à certains types de projet.
+    """
+    scenarios = []
+    for facteur, report, montants in itertools.product(facteurs_budget, reports_mois, montants_revenus):
+        morceaux = []
+        if facteur != 1:
+            morceaux.append(f"Budget x{facteur:g}")
+        if report:
+            morceaux.append(f"Échéances {report:+d} mois")
+        if montants:
+            morceaux.append(f"{len(montants)} revenu(s) modifié(s)")
+        scenarios.append({
+            'nom': ' · '.join(morceaux) or 'Plan actuel',
+            'types': types,
+            'facteur_budget': facteur,
+            'report_echeance_mois': report,
+            'montants_revenus': montants
+        })
+    return scenarios
+
+
+def appliquer_scenario(table, revenus, scenario):
+    """Retourne (table, revenus) modifiés par le scénario, sans toucher aux originaux.
+
+    Les projets qui dépensent au rythme de leur budget (cash flow = -budget) voient
+    leur cash flow suivre le nouveau budget.
+    """
+    variante = copy.copy(table)
+    n = table.taille
+    selection = True
+    if scenario.get('types'):
+        codes = [code_type(type_projet) for type_projet in scenario['types']]
+        selection = np.isin(table.codes_type[:n], codes)
+
+    facteur = scenario.get('facteur_budget', 1)
+    if facteur != 1:
+        budget = table.budget_alloue_mensuel[:n]
+        cash_flow = table.cash_flow_mensuel[:n]
+        nouveau = np.where(selection, np.rint(budget * facteur), budget).astype(budget.dtype)
+        depense_budget = (cash_flow == -budget) & (budget > 0)
+        variante.budget_alloue_mensuel = nouveau
+        variante.cash_flow_mensuel = np.where(depense_budget, -nouveau, cash_flow).astype(cash_flow.dtype)
+
+    report = scenario.get('report_echeance_mois', 0)
+    if report:
+        echeances = table.echeance_ordinal[:n]
+        decalage = int(round(report * JOURS_PAR_MOIS))
+        variante.echeance_ordinal = np.where(selection & (echeances != ECHEANCE_ABSENTE), echeances + decalage, echeances)
+
+    montants = scenario.get('montants_revenus')
+    if montants:
+        revenus = [
+            {'id': revenu['id'], 'montant_mensuel': montants.get(revenu['id'], revenu['montant_mensuel'])}
+            for revenu in revenus
+        ]
+    return variante, revenus
+
+
+def evaluer_scenario(table, revenus, kpis_config, scenario, aujourd_hui):
+    """Calcule KPIs, santé du portefeuille et atteinte des objectifs d'un scénario"""
+    variante, revenus = appliquer_scenario(table, revenus, scenario)
+    kpis = calculer_kpis_table(variante, revenus)
+    sante = evaluer_sante_projets(variante, aujourd_hui)
+
+    atteintes = []
+    for cle_objectif, cle_kpi in OBJECTIFS:
+        objectif = kpis_config[cle_objectif]
+        valeur = kpis[cle_kpi]
+        atteintes.append(min(max(valeur / objectif, 0), 1) if objectif > 0 else float(valeur >= objectif))
+
+    n = len(sante['codes'])
+    return {
+        'scenario': scenario.get('nom', ''),
+        'score': round(sum(atteintes) / len(atteintes) * 100, 2),
+        'objectifs_atteints': sum(1 for atteinte in atteintes if atteinte >= 1),
+        'cash_flow_mensuel': kpis['cash_flow_mensuel'],
+        'ratio_actifs_passifs': kpis['ratio_actifs_passifs'],
+        'revenus_passifs_pct': kpis['revenus_passifs_pct'],
+        'phase_actuelle': kpis['phase_actuelle'],
+        'probabilite_moyenne': float(sante['probabilites'].mean()) if n else 0.0,
+        'projets_a_risque': int(np.isin(sante['codes'], (EN_RETARD, A_RISQUE)).sum())
+    }
+
+
+def _classer(lignes):
+    """Trie les résultats (objectifs atteints, score, probabilité) et numérote les rangs"""
+    lignes.sort(key=lambda ligne: (-ligne['objectifs_atteints'], -ligne['score'], -ligne['probabilite_moyenne']))
+    for rang, ligne in enumerate(lignes, start=1):
+        ligne['rang'] = rang
+    return lignes
+
+
+def ecrire_colonnes(table, dossier):
+    """Écrit les colonnes de la table, une par fichier .npy, pour un partage par memmap"""
+    for nom, colonne in table.colonnes().items():
+        np.save(os.path.join(dossier, f"{nom}.npy"), colonne)
+
+
+def charger_colonnes(dossier):
+    """Ouvre en lecture seule (memmap) les colonnes écrites par ecrire_colonnes"""
+    return {
+        fichier[:-4]: np.load(os.path.join(dossier, fichier), mmap_mode='r')
+        for fichier in os.listdir(dossier) if fichier.endswith('.npy')
+    }
+
+
+def _initialiser_processus(dossier, revenus, kpis_config, aujourd_hui):
+    """Initialiseur du pool : projette les colonnes partagées dans le processus"""
+    _ETAT_PROCESSUS.update(
+        table=TableProjets.depuis_colonnes(charger_colonnes(dossier)),
+        revenus=revenus,
+        kpis_config=kpis_config,
+        aujourd_hui=aujourd_hui
+    )
+
+
+def _evaluer_lot(scenarios):
+    """Tâche du pool : évalue un lot de scénarios avec l'état du processus"""
+    etat = _ETAT_PROCESSUS
+    return [
+        evaluer_scenario(etat['table'], etat['revenus'], etat['kpis_config'], scenario, etat['aujourd_hui'])
+        for scenario in scenarios
+    ]
+
+
+def executer_scenarios(table, revenus, kpis_config, scenarios, n_processus=None, aujourd_hui=None):
+    """Évalue tous les scénarios et retourne leurs résultats classés (liste de dicts).
+
+    Les colonnes des projets sont écrites une fois dans des fichiers memmap que
+    chaque processus ouvre à son démarrage : seules les descriptions de scénarios
+    transitent par les tâches. `n_processus` vaut par défaut le nombre de cœurs ;
+    1, ou un volume inférieur à SEUIL_PARALLELE, évalue dans le processus courant.
+    """
+    if aujourd_hui is None:
+        aujourd_hui = date.today()
+    revenus = [{'id': revenu['id'], 'montant_mensuel': revenu['montant_mensuel']} for revenu in revenus]
+    if n_processus is None:
+        n_processus = os.cpu_count() or 1
+        if len(scenarios) * len(table) < SEUIL_PARALLELE:
+            n_processus = 1
+    n_processus = min(n_processus, len(scenarios))
+
+    if n_processus <= 1:
+        return _classer([evaluer_scenario(table, revenus, kpis_config, scenario, aujourd_hui) for scenario in scenarios])
+
+    taille_lot = math.ceil(len(scenarios) / (n_processus * _LOTS_PAR_PROCESSUS))
+    lots = [scenarios[debut:debut + taille_lot] for debut in range(0, len(scenarios), taille_lot)]
+    with tempfile.TemporaryDirectory(prefix='scenarios_') as dossier:
+        ecrire_colonnes(table, dossier)
+        # spawn : pas de fork d'un serveur Streamlit multi-thread
+        with ProcessPoolExecutor(
+            max_workers=n_processus,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_initialiser_processus,
+            initargs=(dossier, revenus, kpis_config, aujourd_hui)
+        ) as pool:
+            lignes = [ligne for resultats in pool.map(_evaluer_lot, lots) for ligne in resultats]
+    return _classer(lignes)
@@ -0,0 +1,154 @@
+"""Simulation Monte Carlo des flux mensuels vers l'objectif d'indépendance 2030"""
+
+from datetime import date
+
+import numpy as np
+
+PHASES = ('Stabilisation', 'Transition', 'Expansion')
+PERCENTILES = (10, 50, 90)
+
+
+def _decalage_mois(debut, jour):
+    """Nombre de mois entre le mois de `debut` et celui de `jour` (négatif si passé)"""
+    return (jour.year - debut.year) * 12 + jour.month - debut.month
+
+
+def _echeancier_projets(projets, horizon):
+    """Flux déterministes des projets, mois par mois.
+
+    Un projet dépense au rythme de son budget mensuel jusqu'à épuisement du montant
+    restant ; ses cash flows négatifs s'arrêtent alors et son roi_attendu (annuel)
+    commence à produire un revenu mensuel. Retourne (negatifs, passifs_base,
+    rendements_actifs, rendements_formation, totaux par type).
+    """
+    n = len(projets)
+    types = [p['type'] for p in projets]
+    montant_total = np.fromiter((p['montant_total'] for p in projets), dtype=np.float64, count=n)
+    utilise = np.fromiter((p['montant_utilise_reel'] for p in projets), dtype=np.float64, count=n)
+    budget = np.fromiter((p['budget_alloue_mensuel'] for p in projets), dtype=np.float64, count=n)
+    cash_flow = np.fromiter((p['cash_flow_mensuel'] for p in projets), dtype=np.float64, count=n)
+    roi = np.fromiter((p.get('roi_attendu') or 0 for p in projets), dtype=np.float64, count=n)
+    actif = np.fromiter((t == 'Actif générateur' for t in types), dtype=bool, count=n)
+    formation = np.fromiter((t == 'Investissement formation' for t in types), dtype=bool, count=n)
+    passif = np.fromiter((t == 'Passif' for t in types), dtype=bool, count=n)
+
+    # Mois de fin des dépenses (horizon si le budget ne permet pas de finir)
+    restant = np.maximum(montant_total - utilise, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mois_restants = np.where(budget > 0, np.ceil(restant / budget), np.where(restant > 0, horizon, 0))
+    fin = np.minimum(mois_restants, horizon).astype(np.int64)
+
+    # Cash flows négatifs des projets dont la fin est postérieure au mois m
+    negatifs_par_fin = np.bincount(fin, weights=np.minimum(cash_flow, 0), minlength=horizon + 1)
+    negatifs = np.cumsum(negatifs_par_fin[::-1])[::-1][1:]
+
+    # Rendements mensuels des projets terminés, à partir de leur mois de fin
+    rendement = montant_total * roi / 100 / 12
+    rendements_actifs = np.cumsum(np.bincount(fin, weights=np.where(actif, rendement, 0), minlength=horizon + 1))[:horizon]
+    rendements_formation = np.cumsum(np.bincount(fin, weights=np.where(formation, rendement, 0), minlength=horizon + 1))[:horizon]
+
+    passifs_base = np.where(actif & (cash_flow > 0), cash_flow, 0).sum()
+    totaux = {
+        'actifs': montant_total[actif].sum(),
+        'passifs': montant_total[passif].sum(),
+        'formation': montant_total[formation].sum()
+    }
+    return negatifs, passifs_base, rendements_actifs, rendements_formation, totaux
+
+
+def _revenus_simules(revenus, debut, horizon, rng, n_chemins, volatilite):
+    """Revenus mensuels par chemin : sources régulières fixes, irrégulières log-normales"""
+    mois = np.arange(horizon)
+    reguliers = np.zeros(horizon)
+    simules = np.zeros((n_chemins, horizon))
+    for revenu in revenus:
+        disponibilite = revenu.get('date_disponibilite') or revenu['date_creation']
+        actif = mois >= _decalage_mois(debut, disponibilite)
+        montant = revenu['montant_mensuel'] * actif
+        if revenu.get('regulier', True):
+            reguliers += montant
+        else:
+            # Facteur log-normal de moyenne 1 pour chaque (chemin, mois)
+            facteur = np.exp(volatilite * rng.standard_normal((n_chemins, horizon)) - volatilite ** 2 / 2)
+            simules += montant * facteur
+    return simules + reguliers
+
+
+def simuler_trajectoires(projets, revenus, kpis_config, horizon=60, n_chemins=10_000, seed=None,
+                         date_debut=None, volatilite_revenus=0.35, volatilite_actifs=0.04):
+    """Projette cash flow, revenus passifs et phases sur `horizon` mois pour `n_chemins` chemins.
+
+    Aléas : revenus non réguliers (facteur log-normal par mois) et valeur des actifs
+    générateurs (marche aléatoire log-normale mensuelle) qui module leurs revenus
+    passifs. Retourne les probabilités d'atteinte de chaque phase et des objectifs
+    de kpis_config, ainsi que les percentiles mensuels des principaux indicateurs.
+    """
+    rng = np.random.default_rng(seed)
+    debut = date_debut or date.today()
+    negatifs, passifs_base, rendements_actifs, rendements_formation, totaux = _echeancier_projets(projets, horizon)
+
+    revenus_mensuels = _revenus_simules(revenus, debut, horizon, rng, n_chemins, volatilite_revenus)
+    revenus_mensuels += rendements_formation
+
+    # Valeur relative des actifs générateurs (moyenne 1), appliquée à leurs revenus
+    chocs = volatilite_actifs * rng.standard_normal((n_chemins, horizon)) - volatilite_actifs ** 2 / 2
+    valeur_actifs = np.exp(np.cumsum(chocs, axis=1))
+    revenus_passifs = (passifs_base + rendements_actifs) * valeur_actifs
+
+    cash_flow = negatifs + revenus_passifs
+    with np.errstate(divide='ignore', invalid='ignore'):
+        revenus_passifs_pct = np.where(revenus_mensuels > 0, revenus_passifs / revenus_mensuels * 100, 0)
+        valeur = totaux['actifs'] * valeur_actifs
+        total_global = valeur + totaux['passifs'] + totaux['formation']
+        ratio_actifs = np.where(total_global > 0, valeur / total_global * 100, 0)
+
+    # Épargne cumulée et couverture des dépenses des projets en cours
+    epargne = np.cumsum(revenus_mensuels + cash_flow, axis=1)
+    depenses = -negatifs
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fonds_urgence_mois = np.where(depenses > 0, epargne / depenses, np.inf)
+
+    # Phase par (chemin, mois), avec les mêmes règles que calculer_kpis
+    phase = np.where(
+        (cash_flow < 0) | (revenus_passifs_pct < 10), 0,
+        np.where(revenus_passifs_pct < 30, 1, 2)
+    )
+
+    libelles_mois = []
+    annee, numero = debut.year, debut.month
+    for _ in range(horizon):
+        libelles_mois.append(f"{annee}-{numero:02d}")
+        annee, numero = (annee + 1, 1) if numero == 12 else (annee, numero + 1)
+
+    # Premier mois d'atteinte de chaque phase (horizon si jamais atteinte)
+    phases = {}
+    for code, nom in enumerate(PHASES):
+        atteinte = phase >= code
+        atteinte_un_jour = atteinte.any(axis=1)
+        premier = np.where(atteinte_un_jour, atteinte.argmax(axis=1), horizon)
+        median = int(np.quantile(premier, 0.5, method='lower'))
+        phases[nom] = {
+            'proba_atteinte': float(atteinte_un_jour.mean()),
+            'proba_finale': float((phase[:, -1] == code).mean()),
+            'mois_median': libelles_mois[median] if median < horizon else None
+        }
+
+    dernier = np.s_[:, -1]
+    objectifs = {
+        'objectif_cash_flow': float((cash_flow[dernier] >= kpis_config['objectif_cash_flow']).mean()),
+        'objectif_ratio_actifs': float((ratio_actifs[dernier] >= kpis_config['objectif_ratio_actifs']).mean()),
+        'objectif_revenus_passifs': float((revenus_passifs_pct[dernier] >= kpis_config['objectif_revenus_passifs']).mean()),
+        'objectif_fonds_urgence': float((fonds_urgence_mois[dernier] >= kpis_config['objectif_fonds_urgence']).mean())
+    }
+
+    return {
+        'mois': libelles_mois,
+        'n_chemins': n_chemins,
+        'phases': phases,
+        'objectifs': objectifs,
+        'percentiles': {
+            nom: np.percentile(valeurs, PERCENTILES, axis=0)
+            for nom, valeurs in (('cash_flow', cash_flow), ('revenus_passifs_pct', revenus_passifs_pct),
+                                 ('epargne', epargne))
+        }
+    }
@@ -0,0 +1,580 @@
+"""Stockage persistant du plan dans SQLite (mode WAL), partagé entre sessions"""
+
+import gc
+import sqlite3
+
+import numpy as np
+
+from plan_financier import codec_json
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.modeles import Projet, Revenu
+
+# Collections stockées ligne par ligne (une ligne JSON par enregistrement)
+COLLECTIONS = ('projets', 'revenus_variables')
+LIBELLES = {'projets': 'projet', 'revenus_variables': 'revenu'}
+CLASSES = {'projets': Projet, 'revenus_variables': Revenu}
+_CLE_ADMIN_CONFIG = 'admin_config'
+# Présente une fois les allocations_recues des projets reprises dans le grand livre
+_CLE_GRAND_LIVRE = 'grand_livre'
+
+# Entrées conservées dans le journal ; une session plus en retard recharge tout le plan
+TAILLE_JOURNAL = 10_000
+# Entrées du journal hors collections : configuration, remplacement complet du plan
+_JOURNAL_CONFIG = 'config'
+_JOURNAL_PLAN = 'plan'
+_TAILLE_REQUETE = 500
+# Enregistrements décodés ensemble au premier accès à l'un d'eux
+TAILLE_PAGE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projets (
+    id INTEGER PRIMARY KEY,
+    date_modification TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
+    donnees TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revenus_variables (
+    id INTEGER PRIMARY KEY,
+    date_modification TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
+    donnees TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS config (
+    cle TEXT PRIMARY KEY,
+    donnees TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    collection TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    utilisateur TEXT
+);
+CREATE TABLE IF NOT EXISTS grand_livre (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    nature INTEGER NOT NULL,
+    projet_id INTEGER NOT NULL,
+    revenu_id INTEGER NOT NULL,
+    montant INTEGER NOT NULL,
+    mois INTEGER NOT NULL,
+    horodatage INTEGER NOT NULL,
+    utilisateur TEXT
+);
+"""
+
+
+def _date_modification(item):
+    """Colonne date_modification d'un enregistrement (informative)"""
+    valeur = item.get('date_modification')
+    return valeur.isoformat() if valeur is not None else None
+
+
+def _serialiser(item):
+    """Texte JSON d'un enregistrement en base : clés triées, identique pour un même contenu"""
+    return codec_json.dumps(item, cles_triees=True)
+
+
+def _empreinte(donnees):
+    """Empreinte du texte JSON d'un enregistrement, comparée pour savoir s'il doit être réécrit"""
+    return hash(donnees)
+
+
+class PageEnregistrements:
+    """Textes JSON d'une page d'enregistrements en attente, décodés en un seul appel au premier accès"""
+
+    __slots__ = ('textes', 'items')
+
+    def __init__(self, textes, items=()):
+        self.textes = textes
+        self.items = items
+
+    def decoder(self):
+        """Écrit leurs champs dans les enregistrements de la page (une seule fois)"""
+        textes, items = self.textes, self.items
+        if textes is None:
+            return
+        self.textes = self.items = None
+        # Le ramasse-miettes n'a rien à libérer pendant le décodage de milliers de dicts
+        gc_actif = gc.isenabled()
+        gc.disable()
+        try:
+            for item, donnees in zip(items, codec_json.loads('[' + ','.join(textes) + ']')):
+                item._page = None
+                for cle, valeur in donnees.items():
+                    item[cle] = valeur
+        finally:
+            if gc_actif:
+                gc.enable()
+
+
+def _blocs(valeurs, taille=_TAILLE_REQUETE):
+    valeurs = list(valeurs)
+    for debut in range(0, len(valeurs), taille):
+        yield valeurs[debut:debut + taille]
+
+
+class ConflitModification(Exception):
+    """Écriture refusée : des enregistrements ont changé en base depuis leur chargement.
+
+    `conflits` liste les (collection, id, updated_by) concernés ; rien n'a été écrit.
+    """
+
+    def __init__(self, conflits):
+        self.conflits = conflits
+        details = ', '.join(
+            f"{LIBELLES[collection]} {item_id}" + (f" (modifié par {auteur})" if auteur else '')
+            for collection, item_id, auteur in conflits[:5]
+        )
+        suite = '…' if len(conflits) > 5 else ''
+        super().__init__(f"{len(conflits)} enregistrement(s) modifié(s) par une autre session : {details}{suite}")
+
+
+class StockagePlan:
+    """Base SQLite d'un plan familial, partagée par les sessions Streamlit.
+
+    Le mode WAL permet à plusieurs sessions de lire pendant qu'une autre écrit.
+    Seuls les enregistrements dont le contenu a changé depuis le dernier
+    chargement ou la dernière sauvegarde (empreinte de leur JSON à clés triées,
+    quel que soit le champ modifié) sont réécrits, et seulement si leur version
+    en base est encore celle connue de la session (concurrence optimiste).
+    Les enregistrements sont chargés paresseusement, par pages de TAILLE_PAGE :
+    un enregistrement jamais lu depuis le chargement n'est ni décodé ni
+    resérialisé à la sauvegarde.
+    Chaque écriture est inscrite au journal : les autres sessions, averties par
+    `PRAGMA data_version`, n'en relisent que les enregistrements modifiés. Les
+    événements du grand livre ne sont jamais réécrits : chaque session relit
+    ceux ajoutés après sa position.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.connexion = sqlite3.connect(chemin, timeout=30, check_same_thread=False)
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("PRAGMA synchronous=NORMAL")
+        self.connexion.executescript(_SCHEMA)
+        self._migrer_schema()
+        self.connexion.commit()
+        self._migrer_grand_livre()
+        # Empreintes du contenu et versions connus en base, par collection et par id
+        self.marqueurs = {collection: {} for collection in COLLECTIONS}
+        self.versions = {collection: {} for collection in COLLECTIONS}
+        # Enregistrements chargés par la session : id -> enregistrement (inchangé tant qu'il est en attente)
+        self.suivis = {collection: {} for collection in COLLECTIONS}
+        self._admin_config_json = None
+        # Dernière entrée du journal prise en compte (None avant charger_plan)
+        self.sequence = None
+        # Dernier événement du grand livre relu, et plages (début, fin) écrites par la session au-delà
+        self.position_grand_livre = None
+        self._ecritures_propres = []
+        self._version_base = self._data_version()
+
+    def _migrer_schema(self):
+        """Ajoute la colonne version aux bases créées avant la concurrence optimiste"""
+        for collection in COLLECTIONS:
+            colonnes = {ligne[1] for ligne in self.connexion.execute(f"PRAGMA table_info({collection})")}
+            if 'version' not in colonnes:
+                try:
+                    self.connexion.execute(f"ALTER TABLE {collection} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+                except sqlite3.OperationalError:
+                    pass  # ajoutée entre-temps par une autre connexion
+
+    def _migrer_grand_livre(self):
+        """Reprend une fois pour toutes les allocations_recues et montants utilisés des projets déjà en base"""
+        requete = "SELECT 1 FROM config WHERE cle = ?"
+        if self.connexion.execute(requete, (_CLE_GRAND_LIVRE,)).fetchone():
+            return
+        with self.connexion:
+            # Verrou d'écriture pris avant de relire le marqueur : une seule connexion migre
+            self.connexion.execute("INSERT OR IGNORE INTO config (cle, donnees) VALUES (?, '1')", (_CLE_GRAND_LIVRE,))
+            if self.connexion.execute("SELECT changes()").fetchone()[0] == 0:
+                return
+            grand_livre = GrandLivre()
+            reecrits = []
+            for item_id, donnees in self.connexion.execute("SELECT id, donnees FROM projets").fetchall():
+                projet = codec_json.loads(donnees)
+                imbrique = 'allocations_recues' in projet
+                grand_livre.migrer_projet(projet)
+                if imbrique:
+                    reecrits.append((_serialiser(projet), item_id))
+            self.connexion.executemany("UPDATE projets SET donnees = ? WHERE id = ?", reecrits)
+            self._inserer_evenements(grand_livre, grand_livre.en_attente)
+
+    def _inserer_evenements(self, grand_livre, positions):
+        """Ajoute des événements au grand livre en base ; retourne la plage (premier seq, dernier seq)"""
+        avant = self._derniere_position()
+        self.connexion.executemany(
+            "INSERT INTO grand_livre (nature, projet_id, revenu_id, montant, mois, horodatage, utilisateur) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", grand_livre.lignes(positions)
+        )
+        return avant + 1, self._derniere_position()
+
+    def _derniere_position(self):
+        return self.connexion.execute("SELECT COALESCE(MAX(seq), 0) FROM grand_livre").fetchone()[0]
+
+    def _data_version(self):
+        return self.connexion.execute("PRAGMA data_version").fetchone()[0]
+
+    def _derniere_sequence(self):
+        return self.connexion.execute("SELECT COALESCE(MAX(seq), 0) FROM journal").fetchone()[0]
+
+    def est_initialise(self):
+        """Indique si la base contient déjà un plan"""
+        requete = "SELECT 1 FROM config WHERE cle = ?"
+        return self.connexion.execute(requete, (_CLE_ADMIN_CONFIG,)).fetchone() is not None
+
+    def modifie_par_autre_session(self):
+        """Indique si une autre connexion a écrit depuis le dernier appel (coût O(1))"""
+        version = self._data_version()
+        modifie = version != self._version_base
+        self._version_base = version
+        return modifie
+
+    # Lecture
+    def charger_items(self, collection):
+        """Charge une collection en enregistrements Projet ou Revenu en attente.
+
+        Seuls les ids sont lus à ce stade : chaque page de TAILLE_PAGE
+        enregistrements est décodée en un seul appel JSON au premier accès à l'un
+        d'eux (voir Enregistrement.en_attente).
+        """
+        lignes = self.connexion.execute(
+            f"SELECT id, version, donnees FROM {collection} ORDER BY id"
+        ).fetchall()
+        self.marqueurs[collection] = {item_id: _empreinte(donnees) for item_id, _, donnees in lignes}
+        self.versions[collection] = {item_id: version for item_id, version, _ in lignes}
+        en_attente = CLASSES[collection].en_attente
+        items = []
+        for bloc in _blocs(lignes, TAILLE_PAGE):
+            page = PageEnregistrements([donnees for _, _, donnees in bloc])
+            page.items = [en_attente(item_id, page) for item_id, _, _ in bloc]
+            items += page.items
+        self.suivis[collection] = {item.id: item for item in items}
+        return items
+
+    def charger_admin_config(self):
+        """Charge la configuration d'administration, ou None si absente"""
+        requete = "SELECT donnees FROM config WHERE cle = ?"
+        ligne = self.connexion.execute(requete, (_CLE_ADMIN_CONFIG,)).fetchone()
+        if ligne is None:
+            return None
+        self._admin_config_json = ligne[0]
+        return codec_json.loads(ligne[0])
+
+    def _lire_evenements(self, apres, jusqu_a=None):
+        """Colonnes des événements du grand livre après une position (voir GrandLivre.ajouter_colonnes)"""
+        requete = ("SELECT seq, nature, projet_id, revenu_id, montant, mois, horodatage, utilisateur "
+                   "FROM grand_livre WHERE seq > ?")
+        parametres = (apres,)
+        if jusqu_a is not None:
+            requete += " AND seq <= ?"
+            parametres += (jusqu_a,)
+        lignes = self.connexion.execute(requete + " ORDER BY seq", parametres).fetchall()
+        propres = self._ecritures_propres
+        if propres:
+            lignes = [ligne for ligne in lignes if not any(debut <= ligne[0] <= fin for debut, fin in propres)]
+        if not lignes:
+            return None
+        _, natures, projet_ids, revenu_ids, montants, mois, horodatages, utilisateurs = zip(*lignes)
+        horodatages = np.array(horodatages, dtype=np.int64).astype('datetime64[us]')
+        return natures, projet_ids, revenu_ids, montants, mois, horodatages, utilisateurs
+
+    def charger_grand_livre(self, jusqu_a=None):
+        """Charge le grand livre (jusqu'à un seq inclus) et s'y place en fin"""
+        if jusqu_a is None:
+            jusqu_a = self._derniere_position()
+        grand_livre = GrandLivre()
+        colonnes = self._lire_evenements(0, jusqu_a)
+        if colonnes:
+            grand_livre.ajouter_colonnes(*colonnes)
+        self.position_grand_livre = jusqu_a
+        self._ecritures_propres = []
+        return grand_livre
+
+    def charger_plan(self):
+        """Charge (projets, revenus, admin_config, grand_livre) et se place en fin de journal.
+
+        Les positions dans le journal et le grand livre sont lues avant les
+        données : une écriture concurrente au chargement sera simplement relue à
+        la synchronisation.
+        """
+        self._version_base = self._data_version()
+        sequence = self._derniere_sequence()
+        position = self._derniere_position()
+        admin_config = self.charger_admin_config()
+        projets = self.charger_items('projets')
+        revenus = self.charger_items('revenus_variables')
+        grand_livre = self.charger_grand_livre(position)
+        self.sequence = sequence
+        return projets, revenus, admin_config, grand_livre
+
+    def evenements_distants(self):
+        """Colonnes des événements ajoutés au grand livre par d'autres sessions, ou None"""
+        if self.position_grand_livre is None:
+            return None
+        position = self._derniere_position()
+        colonnes = self._lire_evenements(self.position_grand_livre, position)
+        self.position_grand_livre = position
+        self._ecritures_propres = [(debut, fin) for debut, fin in self._ecritures_propres if fin > position]
+        return colonnes
+
+    def modifications_distantes(self):
+        """Enregistrements modifiés par d'autres sessions depuis le chargement ou la dernière synchronisation.
+
+        Retourne ({collection: {id: donnees, ou None si supprimé}, 'grand_livre':
+        colonnes des nouveaux événements ou None}, admin_config ou None si
+        inchangée), ou None si le journal ne couvre plus l'écart et qu'il faut
+        recharger tout le plan.
+        """
+        if self.sequence is None or self.position_grand_livre is None:
+            return None
+        premiere = self.connexion.execute("SELECT MIN(seq) FROM journal").fetchone()[0]
+        if premiere is not None and premiere > self.sequence + 1:
+            return None
+        entrees = self.connexion.execute(
+            "SELECT collection, id, MAX(seq) FROM journal WHERE seq > ? GROUP BY collection, id", (self.sequence,)
+        ).fetchall()
+        if any(collection == _JOURNAL_PLAN for collection, _, _ in entrees):
+            return None
+        changements = {collection: {} for collection in COLLECTIONS}
+        changements['grand_livre'] = self.evenements_distants()
+        if not entrees:
+            return changements, None
+
+        for collection in COLLECTIONS:
+            ids = [item_id for nom, item_id, _ in entrees if nom == collection]
+            marqueurs = self.marqueurs[collection]
+            versions = self.versions[collection]
+            suivis = self.suivis[collection]
+            for bloc in _blocs(ids):
+                lignes = self.connexion.execute(
+                    f"SELECT id, version, donnees FROM {collection} "
+                    f"WHERE id IN ({','.join('?' * len(bloc))})", bloc
+                ).fetchall()
+                trouves = set()
+                for item_id, version, donnees in lignes:
+                    trouves.add(item_id)
+                    # Écriture de cette session, ou déjà relue
+                    if versions.get(item_id) == version:
+                        continue
+                    changements[collection][item_id] = codec_json.loads(donnees)
+                    marqueurs[item_id] = _empreinte(donnees)
+                    versions[item_id] = version
+                for item_id in bloc:
+                    if item_id not in trouves and item_id in versions:
+                        changements[collection][item_id] = None
+                        del marqueurs[item_id]
+                        del versions[item_id]
+                        suivis.pop(item_id, None)
+
+        admin_config = None
+        if any(collection == _JOURNAL_CONFIG for collection, _, _ in entrees):
+            texte = self._admin_config_json
+            admin_config = self.charger_admin_config()
+            if self._admin_config_json == texte:
+                admin_config = None
+        self.sequence = max(seq for _, _, seq in entrees)
+        return changements, admin_config
+
+    # Écriture
+    def _ecrire_collection(self, collection, items):
+        """Écritures conditionnelles d'une collection dans la transaction en cours.
+
+        Retourne (écrits, supprimés, conflits) : un enregistrement n'est réécrit ou
+        supprimé que si sa version en base est toujours celle connue de la session,
+        et un nouvel id ne doit pas avoir été pris par une autre session. Un
+        enregistrement chargé par la session et encore en attente est inchangé ;
+        les autres sont resérialisés et comparés à l'empreinte connue, ce qui
+        couvre aussi les listes et dicts imbriqués modifiés en place.
+        """
+        marqueurs = self.marqueurs[collection]
+        versions = self.versions[collection]
+        suivis = self.suivis[collection]
+        curseur = self.connexion.cursor()
+        ecrits = []
+        conflits = []
+        presents = set()
+        for item in items:
+            item_id = item['id']
+            presents.add(item_id)
+            if suivis.get(item_id) is item and not item.charge:
+                continue
+            donnees = _serialiser(item)
+            marqueur = _empreinte(donnees)
+            if item_id in marqueurs and marqueurs[item_id] == marqueur:
+                continue
+            version = versions.get(item_id)
+            if version is None:
+                curseur.execute(
+                    f"INSERT INTO {collection} (id, date_modification, version, donnees) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT(id) DO NOTHING",
+                    (item_id, _date_modification(item), donnees)
+                )
+            else:
+                curseur.execute(
+                    f"UPDATE {collection} SET date_modification = ?, version = ?, donnees = ? "
+                    "WHERE id = ? AND version = ?",
+                    (_date_modification(item), version + 1, donnees, item_id, version)
+                )
+            if curseur.rowcount == 1:
+                ecrits.append((item_id, marqueur, (version or 0) + 1))
+            else:
+                conflits.append(item_id)
+
+        supprimes = []
+        for item_id in [item_id for item_id in marqueurs if item_id not in presents]:
+            curseur.execute(f"DELETE FROM {collection} WHERE id = ? AND version = ?", (item_id, versions[item_id]))
+            if curseur.rowcount == 1:
+                supprimes.append((item_id, versions[item_id] + 1))
+            elif self.connexion.execute(f"SELECT 1 FROM {collection} WHERE id = ?", (item_id,)).fetchone():
+                conflits.append(item_id)
+            else:
+                supprimes.append((item_id, None))  # déjà supprimé par une autre session
+        return ecrits, supprimes, conflits
+
+    def _details_conflits(self, collection, ids):
+        """(collection, id, updated_by en base) des enregistrements en conflit"""
+        auteurs = {}
+        for bloc in _blocs(ids):
+            auteurs.update(self.connexion.execute(
+                f"SELECT id, json_extract(donnees, '$.updated_by') FROM {collection} "
+                f"WHERE id IN ({','.join('?' * len(bloc))})", bloc
+            ).fetchall())
+        return [(collection, item_id, auteurs.get(item_id)) for item_id in ids]
+
+    def _journaliser(self, entrees):
+        """Inscrit les écritures au journal et en retire les entrées les plus anciennes.
+
+        Un lot plus grand que le journal y est remplacé par une entrée de
+        rechargement complet. Si la session était à jour, elle passe en fin de
+        journal (le verrou d'écriture est tenu : aucune autre écriture intercalée).
+        """
+        a_jour = self.sequence is not None and self._derniere_sequence() == self.sequence
+        if len(entrees) > TAILLE_JOURNAL:
+            entrees = [(_JOURNAL_PLAN, 0, 0, entrees[0][3])]
+        self.connexion.executemany(
+            "INSERT INTO journal (collection, id, version, utilisateur) VALUES (?, ?, ?, ?)", entrees
+        )
+        self.connexion.execute(
+            "DELETE FROM journal WHERE seq <= (SELECT MAX(seq) FROM journal) - ?", (TAILLE_JOURNAL,)
+        )
+        return self._derniere_sequence() if a_jour else self.sequence
+
+    def _sauvegarder(self, collections, admin_config, utilisateur, grand_livre=None):
+        """Écrit les collections, la configuration et les événements en attente en une transaction.
+
+        Lève ConflitModification (rien n'est écrit).
+        """
+        donnees_config = None
+        if admin_config is not None:
+            donnees_config = codec_json.dumps(admin_config)
+            if donnees_config == self._admin_config_json:
+                donnees_config = None
+
+        resultats = {}
+        journal = []
+        with self.connexion:
+            conflits = []
+            for collection, items in collections:
+                ecrits, supprimes, ids_conflits = resultats[collection] = self._ecrire_collection(collection, items)
+                if ids_conflits:
+                    conflits += self._details_conflits(collection, ids_conflits)
+                journal += [(collection, item_id, version, utilisateur) for item_id, _, version in ecrits]
+                journal += [(collection, item_id, version, utilisateur) for item_id, version in supprimes if version]
+            if conflits:
+                # Annule toute la transaction : rien n'est écrit
+                raise ConflitModification(conflits)
+            if donnees_config is not None:
+                self.connexion.execute(
+                    "INSERT INTO config (cle, donnees) VALUES (?, ?) "
+                    "ON CONFLICT(cle) DO UPDATE SET donnees = excluded.donnees",
+                    (_CLE_ADMIN_CONFIG, donnees_config)
+                )
+                journal.append((_JOURNAL_CONFIG, 0, 0, utilisateur))
+            sequence = self._journaliser(journal) if journal else self.sequence
+            evenements = grand_livre.en_attente if grand_livre is not None else []
+            if evenements:
+                plage = self._inserer_evenements(grand_livre, evenements)
+
+        # Transaction validée : la session connaît les nouvelles versions
+        self.sequence = sequence
+        for collection, (ecrits, supprimes, _) in resultats.items():
+            for item_id, marqueur, version in ecrits:
+                self.marqueurs[collection][item_id] = marqueur
+                self.versions[collection][item_id] = version
+            for item_id, _ in supprimes:
+                del self.marqueurs[collection][item_id]
+                del self.versions[collection][item_id]
+                self.suivis[collection].pop(item_id, None)
+        if donnees_config is not None:
+            self._admin_config_json = donnees_config
+        if evenements:
+            # Session à jour : elle passe après ses événements, sinon elle les ignorera à la relecture
+            if self.position_grand_livre == plage[0] - 1:
+                self.position_grand_livre = plage[1]
+            elif self.position_grand_livre is not None:
+                self._ecritures_propres.append(plage)
+            grand_livre.marquer_persistes()
+        lignes = sum(len(ecrits) + len(supprimes) for ecrits, supprimes, _ in resultats.values())
+        return lignes + (donnees_config is not None) + len(evenements)
+
+    def sauvegarder_items(self, collection, items, utilisateur=None):
+        """Écrit les enregistrements nouveaux ou modifiés et supprime ceux qui ont disparu.
+
+        Retourne le nombre de lignes écrites ou supprimées ; lève ConflitModification
+        (sans rien écrire) si une autre session a modifié l'un d'eux entre-temps.
+        """
+        return self._sauvegarder([(collection, items)], None, utilisateur)
+
+    def sauvegarder_plan(self, projets, revenus, admin_config, utilisateur=None, grand_livre=None):
+        """Écrit projets, revenus, configuration modifiés et nouveaux événements du grand livre
+        en une seule transaction (voir sauvegarder_items)"""
+        return self._sauvegarder(zip(COLLECTIONS, (projets, revenus)), admin_config, utilisateur, grand_livre)
+
+    def sauvegarder_admin_config(self, admin_config, utilisateur=None):
+        """Écrit la configuration d'administration si elle a changé"""
+        return self._sauvegarder([], admin_config, utilisateur) > 0
+
+    def remplacer_plan(self, projets, revenus, admin_config, utilisateur=None, grand_livre=None):
+        """Remplace tout le contenu de la base en une transaction (restauration d'une sauvegarde).
+
+        Les versions repartent au-dessus des précédentes, le grand livre est
+        remplacé par `grand_livre` (vidé s'il est absent) et les autres sessions
+        rechargeront le plan complet.
+        """
+        donnees_config = codec_json.dumps(admin_config)
+        with self.connexion:
+            for collection, items in zip(COLLECTIONS, (projets, revenus)):
+                version = self.connexion.execute(f"SELECT COALESCE(MAX(version), 0) + 1 FROM {collection}").fetchone()[0]
+                self.connexion.execute(f"DELETE FROM {collection}")
+                lignes = [(item['id'], _date_modification(item), version, _serialiser(item)) for item in items]
+                self.connexion.executemany(
+                    f"INSERT INTO {collection} (id, date_modification, version, donnees) VALUES (?, ?, ?, ?)", lignes
+                )
+                self.marqueurs[collection] = {item_id: _empreinte(donnees) for item_id, _, _, donnees in lignes}
+                self.versions[collection] = {item_id: version for item_id, _, version, _ in lignes}
+                self.suivis[collection] = {}
+            self.connexion.execute(
+                "INSERT INTO config (cle, donnees) VALUES (?, ?) "
+                "ON CONFLICT(cle) DO UPDATE SET donnees = excluded.donnees",
+                (_CLE_ADMIN_CONFIG, donnees_config)
+            )
+            self.connexion.execute("DELETE FROM grand_livre")
+            position = self._derniere_position()
+            if grand_livre is not None and len(grand_livre):
+                _, position = self._inserer_evenements(grand_livre, np.arange(len(grand_livre)))
+            self.connexion.execute("DELETE FROM journal")
+            self.connexion.execute(
+                "INSERT INTO journal (collection, id, version, utilisateur) VALUES (?, 0, 0, ?)",
+                (_JOURNAL_PLAN, utilisateur)
+            )
+            sequence = self._derniere_sequence()
+        self._admin_config_json = donnees_config
+        self.sequence = sequence
+        self.position_grand_livre = position
+        self._ecritures_propres = []
+        if grand_livre is not None:
+            grand_livre.marquer_persistes()
+
+    def fermer(self):
+        """Ferme la connexion"""
+        self.connexion.close()
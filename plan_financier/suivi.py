@@ -0,0 +1,108 @@
+"""Suivi mensuel des projets, trié par mois avec fenêtre glissante de vélocité"""
+
+from bisect import bisect_left, bisect_right
+
+TAILLE_FENETRE = 3
+
+
+def _cle_mois(suivi):
+    return suivi['mois']
+
+
+class SuiviMensuel(list):
+    """Liste de suivis {'mois', 'prevu', 'reel'} toujours triée par mois.
+
+    La somme des `reel` des TAILLE_FENETRE derniers mois est tenue à jour à chaque
+    ajout ou correction (au plus TAILLE_FENETRE entrées relues), ce qui rend la
+    vélocité O(1) au lieu d'un tri complet de l'historique. Les corrections de
+    valeurs passent par `enregistrer` ; les mois égaux gardent leur ordre
+    d'insertion, comme avec un tri stable.
+    """
+
+    __slots__ = ('somme_fenetre',)
+
+    def __init__(self, suivis=()):
+        super().__init__(sorted(suivis, key=_cle_mois))
+        self._recalculer_fenetre()
+
+    def _recalculer_fenetre(self):
+        self.somme_fenetre = sum(suivi['reel'] for suivi in self[-TAILLE_FENETRE:])
+
+    def _dans_fenetre(self, position):
+        return position >= len(self) - TAILLE_FENETRE
+
+    def append(self, suivi):
+        """Insère un suivi à sa place chronologique"""
+        position = bisect_right(self, suivi['mois'], key=_cle_mois)
+        super().insert(position, suivi)
+        if self._dans_fenetre(position):
+            self._recalculer_fenetre()
+
+    def insert(self, index, suivi):
+        """Insère un suivi à sa place chronologique (l'index demandé est ignoré)"""
+        self.append(suivi)
+
+    def extend(self, suivis):
+        for suivi in suivis:
+            self.append(suivi)
+
+    def __iadd__(self, suivis):
+        self.extend(suivis)
+        return self
+
+    def obtenir(self, mois):
+        """Retourne le suivi d'un mois, ou None s'il n'a pas été saisi"""
+        position = bisect_left(self, mois, key=_cle_mois)
+        if position < len(self) and self[position]['mois'] == mois:
+            return self[position]
+        return None
+
+    def enregistrer(self, mois, prevu, reel):
+        """Ajoute le suivi d'un mois, ou corrige celui déjà saisi ; retourne l'entrée"""
+        position = bisect_left(self, mois, key=_cle_mois)
+        if position < len(self) and self[position]['mois'] == mois:
+            suivi = self[position]
+            suivi['prevu'] = prevu
+            suivi['reel'] = reel
+        else:
+            suivi = {'mois': mois, 'prevu': prevu, 'reel': reel}
+            super().insert(position, suivi)
+        if self._dans_fenetre(position):
+            self._recalculer_fenetre()
+        return suivi
+
+    def velocite(self):
+        """Moyenne des `reel` des derniers mois (0 avec moins de deux mois de suivi)"""
+        if len(self) < 2:
+            return 0
+        return self.somme_fenetre / min(len(self), TAILLE_FENETRE)
+
+    # Opérations qui modifient la structure : on rétablit l'ordre et la fenêtre
+    def __setitem__(self, index, valeur):
+        super().__setitem__(index, valeur)
+        self.sort()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._recalculer_fenetre()
+
+    def pop(self, index=-1):
+        suivi = super().pop(index)
+        self._recalculer_fenetre()
+        return suivi
+
+    def remove(self, suivi):
+        super().remove(suivi)
+        self._recalculer_fenetre()
+
+    def clear(self):
+        super().clear()
+        self.somme_fenetre = 0
+
+    def sort(self, *, key=None, reverse=False):
+        """Le suivi reste trié par mois, quels que soient les arguments"""
+        super().sort(key=_cle_mois)
+        self._recalculer_fenetre()
+
+    def reverse(self):
+        """Sans effet : l'ordre chronologique est un invariant"""
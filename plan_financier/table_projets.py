@@ -0,0 +1,226 @@
+"""Table colonnaire des projets et calcul vectorisé des KPIs"""
+
+import numpy as np
+
+from plan_financier.fonds_urgence import (
+    MOIS_FONDS_DEPART, OBJECTIF_FONDS_URGENCE, PART_INVESTIE, etape_baby_step
+)
+from plan_financier.sante_projets import calculer_velocite_projet
+
+# Types de projet suivis par les KPIs (le code len(TYPES_PROJET) regroupe les autres)
+TYPES_PROJET = ('Actif générateur', 'Passif', 'Investissement formation')
+CODE_ACTIF, CODE_PASSIF, CODE_FORMATION = range(len(TYPES_PROJET))
+CODE_AUTRE = len(TYPES_PROJET)
+_CODES_TYPE = {nom: code for code, nom in enumerate(TYPES_PROJET)}
+
+_COLONNES_MONTANT = ('montant_total', 'cash_flow_mensuel', 'budget_alloue_mensuel', 'montant_utilise_reel')
+_COLONNES = ('ids', 'codes_type', 'echeance_ordinal', 'velocite') + _COLONNES_MONTANT
+# Échéance absente : aucune date limite pour le scoring vectorisé
+ECHEANCE_ABSENTE = np.iinfo(np.int64).max // 2
+_CAPACITE_MIN = 64
+
+
+def code_type(type_projet):
+    """Retourne le code numérique d'un type de projet"""
+    return _CODES_TYPE.get(type_projet, CODE_AUTRE)
+
+
+class TableProjets:
+    """Colonnes NumPy des champs utilisés par les KPIs et le scoring, tenues à côté de la liste de projets.
+
+    Les montants restent en int64 tant que toutes les valeurs sont entières (FCFA),
+    ce qui garantit des KPIs identiques à ceux calculés sur les dicts.
+    """
+
+    def __init__(self, capacite=_CAPACITE_MIN):
+        capacite = max(capacite, _CAPACITE_MIN)
+        self.taille = 0
+        self.ids = np.zeros(capacite, dtype=np.int64)
+        self.codes_type = np.zeros(capacite, dtype=np.int8)
+        self.montant_total = np.zeros(capacite, dtype=np.int64)
+        self.cash_flow_mensuel = np.zeros(capacite, dtype=np.int64)
+        self.budget_alloue_mensuel = np.zeros(capacite, dtype=np.int64)
+        self.montant_utilise_reel = np.zeros(capacite, dtype=np.int64)
+        self.echeance_ordinal = np.zeros(capacite, dtype=np.int64)
+        self.velocite = np.zeros(capacite, dtype=np.float64)
+        self.positions = {}
+
+    @classmethod
+    def depuis_projets(cls, projets):
+        """Construit la table en une passe sur la liste de dicts"""
+        table = cls(len(projets))
+        for projet in projets:
+            table.ajouter(projet)
+        return table
+
+    @classmethod
+    def depuis_colonnes(cls, colonnes):
+        """Construit une table sur des colonnes existantes (sans copie, ex. tableaux memmap)"""
+        table = cls.__new__(cls)
+        for nom in _COLONNES:
+            setattr(table, nom, colonnes[nom])
+        table.taille = len(table.ids)
+        table.positions = {projet_id: ligne for ligne, projet_id in enumerate(table.ids.tolist())}
+        return table
+
+    def colonnes(self):
+        """Retourne les colonnes utiles (vues limitées à la taille), par nom"""
+        return {nom: getattr(self, nom)[:self.taille] for nom in _COLONNES}
+
+    def _agrandir(self):
+        capacite = len(self.ids) * 2
+        for nom in _COLONNES:
+            ancienne = getattr(self, nom)
+            nouvelle = np.zeros(capacite, dtype=ancienne.dtype)
+            nouvelle[:self.taille] = ancienne[:self.taille]
+            setattr(self, nom, nouvelle)
+
+    def _ecrire(self, ligne, projet):
+        self.ids[ligne] = projet['id']
+        self.codes_type[ligne] = code_type(projet['type'])
+        echeance = projet.get('echeance')
+        self.echeance_ordinal[ligne] = echeance.toordinal() if echeance is not None else ECHEANCE_ABSENTE
+        self.velocite[ligne] = calculer_velocite_projet(projet)
+        for nom in _COLONNES_MONTANT:
+            valeur = projet[nom]
+            colonne = getattr(self, nom)
+            if colonne.dtype.kind == 'i' and not isinstance(valeur, (int, np.integer)):
+                colonne = colonne.astype(np.float64)
+                setattr(self, nom, colonne)
+            colonne[ligne] = valeur
+
+    def ajouter(self, projet):
+        """Ajoute un projet en fin de table (O(1) amorti)"""
+        if self.taille == len(self.ids):
+            self._agrandir()
+        ligne = self.taille
+        self._ecrire(ligne, projet)
+        self.positions[projet['id']] = ligne
+        self.taille += 1
+
+    def mettre_a_jour(self, projet):
+        """Réécrit la ligne d'un projet existant, ou l'ajoute s'il est inconnu"""
+        ligne = self.positions.get(projet['id'])
+        if ligne is None:
+            self.ajouter(projet)
+        else:
+            self._ecrire(ligne, projet)
+
+    def supprimer(self, projet_id):
+        """Retire un projet en déplaçant la dernière ligne à sa place"""
+        ligne = self.positions.pop(projet_id, None)
+        if ligne is None:
+            return
+        derniere = self.taille - 1
+        if ligne != derniere:
+            for nom in _COLONNES:
+                colonne = getattr(self, nom)
+                colonne[ligne] = colonne[derniere]
+            self.positions[int(self.ids[ligne])] = ligne
+        self.taille = derniere
+
+    def reassigner_id(self, ancien_id, nouvel_id):
+        """Change l'id d'un projet sans déplacer sa ligne"""
+        ligne = self.positions.pop(ancien_id)
+        self.ids[ligne] = nouvel_id
+        self.positions[nouvel_id] = ligne
+
+    def lignes_ids(self, ids):
+        """Retourne les indices de lignes des ids donnés, ou None si un id est inconnu"""
+        positions = self.positions
+        try:
+            return np.fromiter((positions[i] for i in ids), dtype=np.intp)
+        except KeyError:
+            return None
+
+    def __len__(self):
+        return self.taille
+
+
+def _scalaire(valeur):
+    """Convertit un scalaire NumPy en int/float Python"""
+    return valeur.item() if hasattr(valeur, 'item') else valeur
+
+
+def calculer_kpis_table(table, revenus, lignes=None, solde_fonds_urgence=0, kpis_config=None):
+    """Calcule tous les KPIs en une passe de réductions groupées sur la table.
+
+    `lignes` restreint le calcul à un sous-ensemble (indices de lignes), par exemple
+    les projets visibles après filtrage par date. `solde_fonds_urgence` (voir
+    FondsUrgence) donne la couverture en mois de dépenses et, avec les objectifs
+    de `kpis_config`, l'étape Baby Step en cours.
+    """
+    n = table.taille
+    codes = table.codes_type[:n]
+    montants = table.montant_total[:n]
+    cash_flows = table.cash_flow_mensuel[:n]
+    utilises = table.montant_utilise_reel[:n]
+    budgets = table.budget_alloue_mensuel[:n]
+    if lignes is not None:
+        codes = codes[lignes]
+        montants = montants[lignes]
+        cash_flows = cash_flows[lignes]
+        utilises = utilises[lignes]
+        budgets = budgets[lignes]
+    kpis_config = kpis_config or {}
+
+    # Revenus totaux (quelques sources seulement, la boucle Python suffit)
+    revenus_mensuels = sum(r['montant_mensuel'] for r in revenus)
+
+    # Totaux et effectifs par type en une seule réduction groupée
+    totaux = np.bincount(codes, weights=montants, minlength=CODE_AUTRE + 1)
+    effectifs = np.bincount(codes, minlength=CODE_AUTRE + 1)
+    if montants.dtype.kind == 'i':
+        totaux = totaux.astype(np.int64)
+    total_actifs = _scalaire(totaux[CODE_ACTIF])
+    total_passifs = _scalaire(totaux[CODE_PASSIF])
+    total_formation = _scalaire(totaux[CODE_FORMATION])
+    total_global = total_actifs + total_passifs + total_formation
+
+    cash_flow_mensuel = _scalaire(cash_flows.sum())
+    positifs = cash_flows > 0
+    revenus_passifs = _scalaire(cash_flows[positifs & (codes == CODE_ACTIF)].sum())
+    depenses_mensuelles = abs(_scalaire(cash_flows[cash_flows < 0].sum()))
+
+    ratio_actifs_passifs = (total_actifs / total_global * 100) if total_global > 0 else 0
+    revenus_passifs_pct = (revenus_passifs / revenus_mensuels * 100) if revenus_mensuels > 0 else 0
+
+    # Phase financière
+    if cash_flow_mensuel < 0 or revenus_passifs_pct < 10:
+        phase_actuelle = 'Stabilisation'
+    elif cash_flow_mensuel >= 0 and 10 <= revenus_passifs_pct < 30:
+        phase_actuelle = 'Transition'
+    else:
+        phase_actuelle = 'Expansion'
+
+    # Fonds d'urgence en mois de dépenses et étape Baby Step
+    if depenses_mensuelles > 0:
+        fonds_urgence_mois = solde_fonds_urgence / depenses_mensuelles
+    else:
+        fonds_urgence_mois = float('inf') if solde_fonds_urgence > 0 else 0.0
+    restes = np.bincount(codes, weights=np.maximum(montants - utilises, 0), minlength=CODE_AUTRE + 1)
+    investissement_mensuel = _scalaire(budgets[codes == CODE_ACTIF].sum())
+    baby_step_actuel = etape_baby_step((
+        solde_fonds_urgence > 0 and fonds_urgence_mois >= MOIS_FONDS_DEPART,
+        restes[CODE_PASSIF] == 0,
+        fonds_urgence_mois >= kpis_config.get('objectif_fonds_urgence', OBJECTIF_FONDS_URGENCE),
+        investissement_mensuel >= PART_INVESTIE * revenus_mensuels,
+        restes[CODE_FORMATION] == 0,
+        cash_flow_mensuel >= kpis_config.get('objectif_cash_flow', 0),
+        phase_actuelle == 'Expansion'
+    ))
+
+    return {
+        'revenus_mensuels': revenus_mensuels,
+        'cash_flow_mensuel': cash_flow_mensuel,
+        'ratio_actifs_passifs': ratio_actifs_passifs,
+        'revenus_passifs_pct': revenus_passifs_pct,
+        'nombre_actifs': int(effectifs[CODE_ACTIF]),
+        'phase_actuelle': phase_actuelle,
+        'fonds_urgence_mois': fonds_urgence_mois,
+        'baby_step_actuel': baby_step_actuel,
+        'depenses_mensuelles': depenses_mensuelles,
+        'total_actifs': total_actifs,
+        'total_passifs': total_passifs,
+        'total_formation': total_formation
+    }
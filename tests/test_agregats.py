@@ -0,0 +1,46 @@
+"""Agrégats mensuels matérialisés et mis à jour par deltas"""
+
+from benchmarks.bench_agregats import _mutations, totaux_par_parcours
+from benchmarks.donnees import generer_historique, generer_projets
+from plan_financier.agregats import AgregatsMensuels
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.suivi import SuiviMensuel
+
+
+def historique():
+    projets = generer_historique(generer_projets(300, seed=1), n_mois=24, seed=1)
+    for projet in projets:
+        projet['suivi_mensuel'] = SuiviMensuel(projet['suivi_mensuel'])
+    grand_livre = GrandLivre.depuis_projets(projets)
+    return projets, grand_livre, AgregatsMensuels.depuis_projets(projets, grand_livre)
+
+
+def assert_egaux_a_une_reconstruction(projets, grand_livre, agregats):
+    reconstruits = AgregatsMensuels.depuis_projets(projets, grand_livre)
+    assert agregats.mois() == reconstruits.mois()
+    for mois in reconstruits.mois():
+        assert agregats.totaux(mois, 'type') == reconstruits.totaux(mois, 'type')
+        assert agregats.totaux(mois, 'responsable') == reconstruits.totaux(mois, 'responsable')
+        assert agregats.allocations_par_revenu(mois) == reconstruits.allocations_par_revenu(mois)
+
+
+def test_deltas_egaux_a_une_reconstruction_et_au_parcours():
+    projets, grand_livre, agregats = historique()
+    _mutations(projets, grand_livre, agregats)
+    assert_egaux_a_une_reconstruction(projets, grand_livre, agregats)
+    for mois in ('2024-01', '2024-06', '2024-12'):
+        reference = totaux_par_parcours(projets, grand_livre, mois)
+        assert {t: v for t, v in reference.items() if any(v.values())} == agregats.totaux(mois, 'type')
+
+
+def test_ajout_suppression_et_changement_de_dimension():
+    projets, grand_livre, agregats = historique()
+    supprime = projets.pop(3)
+    agregats.supprimer(supprime['id'])
+    projets[0]['type'] = 'Formation' if projets[0]['type'] != 'Formation' else 'Actif générateur'
+    agregats.mettre_a_jour(projets[0])
+    assert_egaux_a_une_reconstruction(projets, grand_livre, agregats)
+    projets.append(supprime)
+    agregats.ajouter(supprime)
+    assert len(agregats) == len(projets)
+    assert_egaux_a_une_reconstruction(projets, grand_livre, agregats)
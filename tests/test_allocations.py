@@ -0,0 +1,83 @@
+"""Allocation des revenus aux projets : validation des lots et grand livre"""
+
+from benchmarks.donnees import LISTES_CONFIG, generer_projets
+from plan_financier.moteur import PlanFinancier
+
+
+def plan_de_test():
+    projets = generer_projets(20)
+    for projet in projets:
+        projet.pop('allocations_recues', None)
+    revenus = [
+        {'id': 1, 'nom': 'Salaire', 'montant_mensuel': 1000, 'type': 'Salaire', 'regulier': True},
+        {'id': 2, 'nom': 'Prime', 'montant_mensuel': 500, 'type': 'Salaire', 'regulier': False}
+    ]
+    return PlanFinancier(projets, revenus, {'listes_config': LISTES_CONFIG})
+
+
+def alloues(plan, revenu_id, mois):
+    revenus, projets, montants = plan.grand_livre.allocations_du_mois(mois)
+    return {p: m for r, p, m in zip(revenus.tolist(), projets.tolist(), montants.tolist()) if r == revenu_id}
+
+
+def test_deux_lots_du_meme_revenu_et_du_meme_mois_se_cumulent():
+    plan = plan_de_test()
+    a, b = plan.projets[0]['id'], plan.projets[1]['id']
+    succes, message = plan.allouer_revenus_en_lot([
+        (1, [{'projet_id': a, 'montant': 700, 'mois': '2025-01'}]),
+        (1, [{'projet_id': b, 'montant': 700, 'mois': '2025-01'}])
+    ])
+    assert not succes and 'Salaire' in message and '2025-01' in message
+    assert len(plan.grand_livre) == len(plan_de_test().grand_livre)
+
+
+def test_un_lot_sur_plusieurs_mois_limite_au_revenu_mensuel():
+    plan = plan_de_test()
+    a = plan.projets[0]['id']
+    succes, message = plan.allouer_revenu(1, [{'projet_id': a, 'montant': 800, 'mois': '2025-01'},
+                                              {'projet_id': a, 'montant': 900, 'mois': '2025-02'}])
+    assert not succes and message.startswith("Total alloué (")
+    succes, _ = plan.allouer_revenu(1, [{'projet_id': a, 'montant': 400, 'mois': '2025-01'},
+                                        {'projet_id': a, 'montant': 500, 'mois': '2025-02'}])
+    assert succes
+    assert alloues(plan, 1, '2025-01') == {a: 400} and alloues(plan, 1, '2025-02') == {a: 500}
+
+
+def test_lots_de_mois_differents_valides_separement():
+    plan = plan_de_test()
+    a = plan.projets[0]['id']
+    succes, _ = plan.allouer_revenus_en_lot([(1, [{'projet_id': a, 'montant': 800, 'mois': '2025-01'}]),
+                                             (1, [{'projet_id': a, 'montant': 900, 'mois': '2025-02'}])])
+    assert succes
+    assert alloues(plan, 1, '2025-01') == {a: 800} and alloues(plan, 1, '2025-02') == {a: 900}
+
+
+def test_depassement_d_un_seul_revenu():
+    plan = plan_de_test()
+    succes, message = plan.allouer_revenu(2, [{'projet_id': plan.projets[0]['id'], 'montant': 501, 'mois': '2025-01'}])
+    assert not succes and message.startswith("Total alloué (")
+
+
+def test_reallocation_contrepasse_les_projets_retires():
+    plan = plan_de_test()
+    a, b = plan.projets[0]['id'], plan.projets[1]['id']
+    plan.allouer_revenu(1, [{'projet_id': a, 'montant': 300, 'mois': '2025-01'},
+                            {'projet_id': b, 'montant': 400, 'mois': '2025-01'}])
+    succes, _ = plan.allouer_revenu(1, [{'projet_id': a, 'montant': 500, 'mois': '2025-01'}])
+    assert succes
+    assert alloues(plan, 1, '2025-01') == {a: 500}
+    assert plan.grand_livre.alloue_projet(b) == 0
+    assert plan.grand_livre.alloue_revenu(1) == 500
+
+
+def test_projets_alloues_horodates():
+    plan = plan_de_test()
+    a, b = plan.projets[0], plan.projets[1]
+    plan.allouer_revenu(1, [{'projet_id': a['id'], 'montant': 300, 'mois': '2025-01'},
+                            {'projet_id': b['id'], 'montant': 400, 'mois': '2025-01'}], 'Alix')
+    assert a['updated_by'] == b['updated_by'] == 'Alix'
+    avant = a['date_modification']
+    plan.allouer_revenu(1, [{'projet_id': a['id'], 'montant': 300, 'mois': '2025-01'}], 'Bao')
+    # Allocation inchangée : pas d'horodatage ; projet retiré : horodaté
+    assert a['date_modification'] == avant and a['updated_by'] == 'Alix'
+    assert b['updated_by'] == 'Bao'
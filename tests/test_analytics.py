@@ -0,0 +1,27 @@
+"""Analytics : réduction LTTB et choix du rendu WebGL"""
+
+import numpy as np
+import plotly.graph_objects as go
+
+from plan_financier.analytics import POINTS_MAX, SEUIL_WEBGL, lttb, trace_ligne
+
+
+def test_serie_volumineuse_reduite_et_rendue_en_webgl():
+    x = np.arange(SEUIL_WEBGL * 5)
+    trace = trace_ligne(x, np.sin(x / 50))
+    assert isinstance(trace, go.Scattergl)
+    assert len(trace.x) == POINTS_MAX
+
+
+def test_serie_courte_en_svg():
+    x = np.arange(SEUIL_WEBGL)
+    trace = trace_ligne(x, x * 2.0)
+    assert isinstance(trace, go.Scatter) and not isinstance(trace, go.Scattergl)
+
+
+def test_lttb_garde_les_extremites_et_les_pics():
+    x = np.arange(10_000)
+    y = np.zeros(10_000)
+    y[4321] = 100.0
+    indices = lttb(x, y, 50)
+    assert len(indices) == 50 and indices[0] == 0 and indices[-1] == 9999 and 4321 in indices
@@ -0,0 +1,43 @@
+"""Cache LRU des projets filtrés et KPIs, indexé par version des données"""
+
+from benchmarks.donnees import LISTES_CONFIG, generer_plan
+from plan_financier.cache import CacheLRU
+from plan_financier.index_dates import TOUS
+from plan_financier.moteur import PlanFinancier
+
+
+def test_eviction_lru_et_compteurs():
+    cache = CacheLRU(capacite=2)
+    calculs = []
+
+    def calcul(valeur):
+        return lambda: calculs.append(valeur) or valeur
+    assert cache.obtenir('a', calcul(1)) == 1
+    assert cache.obtenir('b', calcul(2)) == 2
+    assert cache.obtenir('a', calcul(10)) == 1
+    # 'b' est la moins récemment utilisée : évincée par 'c'
+    assert cache.obtenir('c', calcul(3)) == 3
+    assert cache.obtenir('b', calcul(20)) == 20
+    assert calculs == [1, 2, 3, 20]
+    assert cache.statistiques() == {'entrees': 2, 'capacite': 2, 'hits': 1, 'misses': 4, 'taux_hit': 20}
+
+
+def test_kpis_filtres_recalcules_seulement_apres_mutation():
+    projets, revenus = generer_plan(200, n_revenus=3, n_mois=2, allocations_par_projet=0)
+    plan = PlanFinancier(projets, revenus, {'listes_config': LISTES_CONFIG})
+
+    premier = plan.projets_filtres_et_kpis(TOUS, TOUS)
+    assert plan.projets_filtres_et_kpis(TOUS, TOUS) is premier
+    assert plan.cache.hits == 1 and plan.cache.misses == 1
+
+    revenu = plan.revenus_variables[0]
+    succes, _ = plan.allouer_revenu(revenu['id'], [{'projet_id': plan.projets[0]['id'], 'montant': 1000,
+                                                     'mois': '2025-01'}])
+    assert succes
+    assert plan.projets_filtres_et_kpis(TOUS, TOUS) is not premier
+    version = plan.version
+    plan.ajouter_item('projet', dict(projets[0], id=10_000))
+    assert plan.version == version + 1
+    _, kpis = plan.projets_filtres_et_kpis(TOUS, TOUS)
+    assert kpis == plan.calculer_kpis(plan.projets)
+    assert plan.cache.misses == 3
@@ -0,0 +1,57 @@
+"""Générateur de plans synthétiques et suite de benchmarks"""
+
+import json
+from datetime import date, datetime
+
+from benchmarks import suite
+from benchmarks.donnees import LISTES_CONFIG, generer_plan, sources_financement
+from plan_financier.modeles import Projet, Revenu
+
+
+def test_plan_genere_a_l_echelle_et_dans_les_domaines():
+    projets, revenus = generer_plan(2_000, n_revenus=7, n_mois=4, allocations_par_projet=3, seed=5)
+    assert len(projets) == 2_000 and len(revenus) == 7
+    assert [projet['id'] for projet in projets] == list(range(1, 2_001))
+    sources = set(sources_financement(LISTES_CONFIG))
+    for projet in projets:
+        assert projet['type'] in LISTES_CONFIG['types_projet'] and projet['statut'] in LISTES_CONFIG['statuts_projet']
+        assert projet['priorite'] in LISTES_CONFIG['priorites'] and projet['responsable'] in LISTES_CONFIG['responsables']
+        assert projet['source_financement'] in sources
+        assert 0 <= projet['montant_utilise_reel'] <= projet['montant_total']
+        assert isinstance(projet['echeance'], date) and projet['echeance'] > projet['date_creation'].date()
+        assert len(projet['suivi_mensuel']) == 4 and len(projet['allocations_recues']) == 3
+        assert all(allocation['revenu_id'] in range(1, 8) for allocation in projet['allocations_recues'])
+    for revenu in revenus:
+        assert revenu['type'] in LISTES_CONFIG['types_revenu'] and 50_000 <= revenu['montant_mensuel'] < 2_000_000
+
+
+def test_plan_reproductible_et_compact():
+    assert generer_plan(200, seed=3) == generer_plan(200, seed=3)
+    assert generer_plan(200, seed=3) != generer_plan(200, seed=4)
+    projets, revenus = generer_plan(200, seed=3, compact=True)
+    assert all(isinstance(projet, Projet) for projet in projets)
+    assert all(isinstance(revenu, Revenu) for revenu in revenus)
+    assert (projets, revenus) == generer_plan(200, seed=3)
+
+
+def test_suite_ecrit_des_resultats_comparables(tmp_path, monkeypatch):
+    monkeypatch.setattr(suite, 'TEMPS_MIN', 0)
+    sortie = tmp_path / 'suite.json'
+    cas = ['calculer_kpis', 'allouer_revenu_aux_projets']
+    assert suite.main(['--tailles', '200', '500', '--n-mois', '2', '--cas', *cas, '--sortie', str(sortie)]) == 0
+
+    resultats = json.loads(sortie.read_text(encoding='utf-8'))
+    datetime.fromisoformat(resultats['datetime'])
+    assert resultats['params'] == {'n_mois': 2, 'seed': 0}
+    assert [(b['name'], b['params']['taille']) for b in resultats['benchmarks']] == [
+        (nom, taille) for taille in (200, 500) for nom in cas
+    ]
+    for benchmark in resultats['benchmarks']:
+        stats = benchmark['stats']
+        assert stats['rounds'] == suite.TOURS_MIN and stats['min'] <= stats['median'] <= stats['max']
+
+    plus_lent = json.loads(json.dumps(resultats))
+    for benchmark in plus_lent['benchmarks']:
+        benchmark['stats']['median'] /= 2
+    assert len(suite.comparer(resultats, plus_lent, seuil=1.5)) == 4
+    assert suite.comparer(resultats, resultats) == []
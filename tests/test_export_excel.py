@@ -0,0 +1,58 @@
+"""Export Excel en flux"""
+
+from datetime import datetime
+
+import pytest
+
+from benchmarks.donnees import generer_historique, generer_projets, generer_revenus
+from plan_financier.export_excel import exporter_plan_excel, lignes_allocations
+from plan_financier.grand_livre import GrandLivre
+
+
+def test_allocations_exportees_nettes_par_projet_revenu_mois():
+    projets = [{'id': 1, 'nom': 'Ferme'}, {'id': 2, 'nom': 'Formation'}]
+    revenus = [{'id': 10, 'nom': 'Salaire'}]
+    grand_livre = GrandLivre()
+    grand_livre.fixer_allocations(10, '2024-01', {1: 500, 2: 300}, datetime(2024, 1, 5))
+    # Réallocation du même mois : 1 passe à 200, 2 est retiré
+    grand_livre.fixer_allocations(10, '2024-01', {1: 200}, datetime(2024, 1, 20))
+    grand_livre.allouer(10, 2, 100, '2024-02', datetime(2024, 2, 5))
+
+    assert list(lignes_allocations(projets, revenus, grand_livre)) == [
+        [1, 'Ferme', 10, 'Salaire', '2024-01', 200, datetime(2024, 1, 20)],
+        [2, 'Formation', 10, 'Salaire', '2024-02', 100, datetime(2024, 2, 5)]
+    ]
+
+
+def classeur_de_test():
+    projets = generer_historique(generer_projets(40), n_mois=3, allocations_par_projet=2)
+    revenus = generer_revenus(5)
+    return projets, revenus, GrandLivre.depuis_projets(projets)
+
+
+def test_feuilles_et_nombre_de_lignes():
+    projets, revenus, grand_livre = classeur_de_test()
+    sortie, comptes = exporter_plan_excel(projets, revenus, grand_livre)
+    assert comptes == {
+        'Projets': len(projets),
+        'Revenus': len(revenus),
+        'Suivi mensuel': sum(len(projet.get('suivi_mensuel') or ()) for projet in projets),
+        'Allocations reçues': len(list(lignes_allocations(projets, revenus, grand_livre)))
+    }
+    openpyxl = pytest.importorskip('openpyxl')
+    classeur = openpyxl.load_workbook(sortie, read_only=True)
+    assert classeur.sheetnames == list(comptes)
+    for nom, n in comptes.items():
+        assert classeur[nom].max_row == n + 1
+
+
+def test_constant_memory_produit_les_memes_cellules():
+    openpyxl = pytest.importorskip('openpyxl')
+    projets, revenus, grand_livre = classeur_de_test()
+
+    def cellules(constant_memory):
+        sortie, _ = exporter_plan_excel(projets, revenus, grand_livre, constant_memory=constant_memory)
+        classeur = openpyxl.load_workbook(sortie, read_only=True)
+        return {nom: list(classeur[nom].iter_rows(values_only=True)) for nom in classeur.sheetnames}
+
+    assert cellules(True) == cellules(False)
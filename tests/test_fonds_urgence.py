@@ -0,0 +1,38 @@
+"""Fonds d'urgence : versements de l'épargne au fil des jours"""
+
+from datetime import date
+
+from benchmarks.donnees import LISTES_CONFIG, generer_projets
+from plan_financier import moteur
+from plan_financier.fonds_urgence import TYPE_EPARGNE, mois_verses
+from plan_financier.moteur import PlanFinancier
+
+
+def test_epargne_dans_les_types_de_revenu_par_defaut():
+    assert TYPE_EPARGNE in LISTES_CONFIG['types_revenu']
+
+
+def test_mois_verses_au_jour_de_disponibilite():
+    revenu = {'regulier': True, 'date_disponibilite': date(2025, 1, 10)}
+    assert mois_verses(revenu, date(2025, 1, 9)) == 0
+    assert mois_verses(revenu, date(2025, 3, 10)) == 3
+    assert mois_verses(dict(revenu, regulier=False), date(2025, 3, 10)) == 1
+
+
+def test_kpis_memorises_recalcules_le_lendemain(monkeypatch):
+    epargne = {'id': 1, 'nom': 'Épargne', 'montant_mensuel': 100_000, 'type': TYPE_EPARGNE, 'regulier': True,
+               'date_disponibilite': date(2025, 1, 10)}
+    plan = PlanFinancier(generer_projets(20), [epargne], {'listes_config': LISTES_CONFIG})
+
+    class Jour(date):
+        courant = date(2025, 3, 9)
+
+        @classmethod
+        def today(cls):
+            return cls.courant
+    monkeypatch.setattr(moteur, 'date', Jour)
+    _, kpis_veille = plan.projets_filtres_et_kpis('Tous', 'Tous')
+    Jour.courant = date(2025, 3, 10)
+    _, kpis_jour = plan.projets_filtres_et_kpis('Tous', 'Tous')
+    # Même version du plan, mais un versement de plus le 10
+    assert kpis_jour['fonds_urgence_mois'] > kpis_veille['fonds_urgence_mois']
@@ -0,0 +1,48 @@
+"""Reruns partiels de l'application : seuls les fragments dépendant d'un filtre sont réexécutés"""
+
+import pytest
+
+from benchmarks.bench_fragments import CHEMIN_APP, SECTIONS_FILTREES, valeurs
+from benchmarks.donnees import generer_plan
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.stockage import StockagePlan
+
+AppTest = pytest.importorskip('streamlit.testing.v1').AppTest
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Application lancée sur une base temporaire de 300 projets, instrumentation active"""
+    chemin = str(tmp_path / 'plan.db')
+    monkeypatch.setenv('PLAN_FINANCIER_DB', chemin)
+    # Le premier lancement crée la configuration de l'application
+    AppTest.from_file(CHEMIN_APP, default_timeout=60).run()
+    stockage = StockagePlan(chemin)
+    admin_config = stockage.charger_admin_config()
+    projets, revenus = generer_plan(300, n_mois=6, allocations_par_projet=2,
+                                    listes_config=admin_config['listes_config'])
+    stockage.remplacer_plan(projets, revenus, admin_config, 'Alix', GrandLivre.depuis_projets(projets))
+    stockage.fermer()
+
+    at = AppTest.from_file(CHEMIN_APP, default_timeout=60).run()
+    assert not at.exception, at.exception
+    at.session_state.instrumentation.actif = True
+    return at
+
+
+@pytest.mark.parametrize('annee, mois', ((2024, '06'), (2025, 'Tous')))
+def test_filtre_relance_seulement_ses_fragments(app, annee, mois):
+    enregistreur = app.session_state.instrumentation
+    app.run()
+    app.sidebar.selectbox(key='filter_year').set_value(annee)
+    app.sidebar.selectbox(key='filter_month').set_value(mois).run()
+    assert not app.exception, app.exception
+    partiel = enregistreur.interactions()[-1]
+    assert set(partiel['fragments']) == SECTIONS_FILTREES
+    affiche = valeurs(app)
+
+    # Mêmes filtres par un rerun complet : mêmes valeurs affichées
+    app.session_state['filter_year'] = annee
+    app.session_state['filter_month'] = mois
+    app.run()
+    assert valeurs(app) == affiche
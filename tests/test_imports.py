@@ -0,0 +1,11 @@
+"""Le moteur s'importe sans les dépendances de l'interface"""
+
+from benchmarks.bench_imports import MODULES_LOURDS, MODULES_MOTEUR, mesurer_import
+
+
+def test_moteur_sans_dependances_de_l_interface(monkeypatch):
+    monkeypatch.setattr('benchmarks.bench_imports.REPETITIONS', 1)
+    _, charges = mesurer_import(*MODULES_MOTEUR, 'plan_financier.planificateur', 'plan_financier.stockage',
+                                'plan_financier.sauvegarde', 'plan_financier.instrumentation')
+    assert 'plan_financier' in charges
+    assert not set(MODULES_LOURDS) & set(charges)
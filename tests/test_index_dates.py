@@ -0,0 +1,41 @@
+"""Index des dates : ordre de la liste source et dates modifiées"""
+
+from datetime import date, datetime
+
+from benchmarks.donnees import LISTES_CONFIG, generer_projets
+from plan_financier.index_dates import est_visible
+from plan_financier.moteur import PlanFinancier
+
+
+def plan_de_test(n=200):
+    projets = generer_projets(n)
+    return PlanFinancier(projets, [], {'listes_config': LISTES_CONFIG})
+
+
+def filtrer_sans_index(plan, year, month):
+    aujourd_hui = date.today()
+    return [p['id'] for p in plan.projets if est_visible(p, 'projet', year, month, aujourd_hui)]
+
+
+def test_mise_a_jour_distante_conserve_l_ordre():
+    plan = plan_de_test()
+    cible = plan.projets[5]
+    annee = cible['date_creation'].year
+    avant = [p['id'] for p in plan.filtrer_par_date(plan.projets, 'projet', annee, 'Tous')]
+    plan.appliquer_modifications({'projet': {cible['id']: dict(cible, nom='Renommé')}})
+    apres = [p['id'] for p in plan.filtrer_par_date(plan.projets, 'projet', annee, 'Tous')]
+    assert apres == avant == filtrer_sans_index(plan, annee, 'Tous')
+
+
+def test_date_modifiee_par_le_plan_reindexee_a_sa_place():
+    plan = plan_de_test()
+    plan.obtenir_index_dates('projet')
+    cible = plan.projets[10]
+    assert plan.modifier_item('projet', cible['id'], {'date_creation': datetime(2031, 3, 1),
+                                                      'echeance': date(2031, 8, 1)}, 'Alix')
+    assert [p['id'] for p in plan.filtrer_par_date(plan.projets, 'projet', 2031, '05')] == [cible['id']]
+    for year, month in [(2023, 'Tous'), ('Tous', '03'), (2024, '06')]:
+        obtenus = [p['id'] for p in plan.filtrer_par_date(plan.projets, 'projet', year, month)]
+        assert obtenus == filtrer_sans_index(plan, year, month)
+    assert cible['updated_by'] == 'Alix'
+    assert not plan.modifier_item('projet', -1, {'nom': 'inconnu'})
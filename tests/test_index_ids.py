@@ -0,0 +1,58 @@
+"""Index id -> enregistrement et allocation par index"""
+
+from benchmarks.donnees import LISTES_CONFIG, generer_projets, generer_revenus
+from plan_financier.allocations import allouer_revenu
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.index_ids import IndexIds
+from plan_financier.moteur import PlanFinancier
+
+
+def test_premier_doublon_retenu_comme_recherche_lineaire():
+    items = [{'id': 1, 'nom': 'a'}, {'id': 2, 'nom': 'b'}, {'id': 1, 'nom': 'c'}]
+    index = IndexIds.depuis_items(items)
+    assert len(index) == 3
+    assert index.obtenir(1) is next(item for item in items if item['id'] == 1)
+    assert index.obtenir(3) is None and index.obtenir(3, 'defaut') == 'defaut'
+
+
+def test_ajout_suppression_et_reassignation():
+    index = IndexIds.depuis_items([{'id': 1}, {'id': 2}])
+    index.ajouter({'id': 3})
+    assert 3 in index and len(index) == 3
+    index.supprimer(2)
+    index.supprimer(99)
+    assert 2 not in index and len(index) == 2
+    item = index.reassigner_id(1, 10)
+    assert item == {'id': 10} and index.obtenir(10) is item and 1 not in index
+
+
+def test_allocation_par_index_equivalente_aux_recherches_lineaires():
+    projets = generer_projets(500)
+    revenus = generer_revenus(5)
+    revenu = revenus[-1]
+    revenu['montant_mensuel'] = 10 ** 12
+    allocations = [{'projet_id': projets[i]['id'], 'montant': 1000 + i, 'mois': '2025-03'} for i in range(0, 500, 7)]
+    grand_livre = GrandLivre()
+
+    succes, _ = allouer_revenu(IndexIds.depuis_items(revenus), IndexIds.depuis_items(projets), revenu['id'],
+                               allocations, grand_livre)
+    assert succes
+    for allocation in allocations:
+        assert grand_livre.alloue_projet(allocation['projet_id']) == allocation['montant']
+    assert grand_livre.alloue_revenu(revenu['id']) == sum(allocation['montant'] for allocation in allocations)
+    assert not allouer_revenu(IndexIds.depuis_items(revenus), IndexIds.depuis_items(projets), -1,
+                              allocations, grand_livre)[0]
+
+
+def test_index_du_plan_suit_les_mutations():
+    plan = PlanFinancier(generer_projets(30), generer_revenus(3), {'listes_config': LISTES_CONFIG})
+    index = plan.obtenir_index_ids('projet')
+    ajoute = plan.ajouter_item('projet', dict(plan.projets[0], id=1000))
+    assert index.obtenir(1000) is ajoute
+    plan.supprimer_item('projet', plan.projets[1]['id'])
+    assert len(index) == len(plan.projets)
+    ancien_id = plan.projets[0]['id']
+    assert plan.reassigner_id_item('projet', ancien_id, 2000)
+    assert plan.projets[0]['id'] == 2000 and index.obtenir(2000) is plan.projets[0]
+    assert not plan.reassigner_id_item('projet', ancien_id, 3000)
+    assert not plan.reassigner_id_item('projet', 2000, 1000)
@@ -0,0 +1,72 @@
+"""Instrumentation des reruns : mesures, fragments et profil"""
+
+from plan_financier.instrumentation import Enregistreur, instrumenter, mesurer, noter
+
+
+@instrumenter('compter', items=len)
+def compter(valeurs):
+    return valeurs
+
+
+def enregistreur_actif(**options):
+    enregistreur = Enregistreur(**options)
+    enregistreur.actif = True
+    return enregistreur
+
+
+def test_appels_et_elements_comptes_pendant_le_rerun():
+    enregistreur = enregistreur_actif()
+    with enregistreur.rerun():
+        for i in range(100):
+            compter([0] * i)
+            with mesurer('bloc') as mesure:
+                mesure.items = 2
+        noter('page', 'Tableau de bord')
+    compter([1])
+    rerun = enregistreur.reruns[-1]
+    assert rerun['mesures']['compter']['appels'] == 100 and rerun['mesures']['compter']['items'] == sum(range(100))
+    assert rerun['mesures']['bloc']['appels'] == 100 and rerun['mesures']['bloc']['items'] == 200
+    assert rerun['infos'] == {'page': 'Tableau de bord'} and rerun['fragment'] is None
+    assert len(enregistreur.reruns) == 1
+
+
+def test_inactif_sans_effet():
+    enregistreur = Enregistreur()
+    with enregistreur.rerun():
+        assert compter([1, 2]) == [1, 2]
+        with mesurer('bloc') as mesure:
+            mesure.items = 1
+    assert not enregistreur.reruns
+
+
+def test_fragments_regroupes_par_interaction():
+    enregistreur = enregistreur_actif(capacite=3)
+    with enregistreur.rerun():
+        with enregistreur.rerun('graphique'), mesurer('graphique'):
+            compter([1])
+    # Le fragment exécuté par le rerun complet est mesuré sous son nom dans le rerun complet
+    assert len(enregistreur.reruns) == 1
+    complet = enregistreur.reruns[0]
+    for fragment in ('graphique', 'tableau'):
+        with enregistreur.rerun(fragment):
+            pass
+    enregistreur.nouvelle_interaction()
+    # Le rerun complet sort du tampon mais reste la référence des fragments
+    with enregistreur.rerun('graphique'):
+        pass
+    assert len(enregistreur.reruns) == 3 and complet not in enregistreur.reruns
+    interactions = enregistreur.interactions()
+    assert [groupe['fragments'] for groupe in interactions] == [['graphique', 'tableau'], ['graphique']]
+    for groupe in interactions:
+        assert groupe['duree_complete'] == complet['duree']
+    assert interactions[0]['economie'] == complet['duree'] - complet['mesures']['graphique']['temps']
+
+
+def test_profil_du_prochain_rerun_seulement():
+    enregistreur = Enregistreur()
+    enregistreur.profiler_prochain_rerun()
+    with enregistreur.rerun():
+        compter(list(range(10)))
+    assert 'compter' in enregistreur.dernier_profil['texte'] and enregistreur.dernier_profil['pstats']
+    assert not enregistreur.profil_demande
+    assert enregistreur.rerun() is not None and len(enregistreur.reruns) == 1
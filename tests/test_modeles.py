@@ -0,0 +1,46 @@
+"""Enregistrements compacts et nomenclatures partagées"""
+
+import sys
+import threading
+
+from benchmarks.donnees import generer_projets
+from plan_financier.modeles import Nomenclature, Projet, en_enregistrements
+
+
+def test_enregistrement_equivalent_au_dict():
+    projets = generer_projets(50)
+    records = en_enregistrements(projets, 'projet')
+    assert records == projets
+    assert all(isinstance(record, Projet) for record in records)
+    record = records[0]
+    record['champ_libre'] = [1, 2]
+    assert record['champ_libre'] == [1, 2] and 'champ_libre' in record
+    del record['champ_libre']
+    assert 'champ_libre' not in record and record.get('champ_libre') is None
+
+
+def test_codes_uniques_sous_concurrence():
+    nomenclature = Nomenclature()
+    valeurs = [f'Valeur {i}' for i in range(2000)]
+    codes = [{} for _ in range(8)]
+    depart = threading.Barrier(len(codes))
+
+    def coder(resultat):
+        depart.wait()
+        for valeur in valeurs:
+            resultat[valeur] = nomenclature.code(valeur)
+
+    intervalle = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=coder, args=(resultat,)) for resultat in codes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(intervalle)
+
+    assert len(nomenclature.valeurs) == len(valeurs)
+    assert all(resultat == codes[0] for resultat in codes)
+    assert all(nomenclature.valeur(code) == valeur for valeur, code in codes[0].items())
@@ -0,0 +1,35 @@
+"""Moteur du plan : KPIs sur les projets du plan ou sur des copies"""
+
+from datetime import date
+
+import pytest
+
+from benchmarks.bench_kpis import calculer_kpis_boucle
+from benchmarks.donnees import generer_plan
+from plan_financier.moteur import PlanFinancier
+
+
+@pytest.fixture
+def plan():
+    projets, revenus = generer_plan(300, n_revenus=5, n_mois=3, allocations_par_projet=1)
+    return PlanFinancier(projets, revenus, {'kpis_config': {'objectif_cash_flow': 500_000}})
+
+
+def kpis_attendus(plan, projets):
+    return calculer_kpis_boucle(projets, plan.revenus_variables, plan.obtenir_fonds_urgence().solde(date.today()),
+                                plan.admin_config['kpis_config'])
+
+
+def test_kpis_des_projets_du_plan(plan):
+    assert plan.calculer_kpis() == pytest.approx(kpis_attendus(plan, plan.projets))
+    sous_ensemble = plan.projets[::3]
+    assert plan.calculer_kpis(sous_ensemble) == pytest.approx(kpis_attendus(plan, sous_ensemble))
+
+
+def test_kpis_de_copies_modifiees(plan):
+    plan.calculer_kpis()
+    copies = [dict(projet, cash_flow_mensuel=projet['cash_flow_mensuel'] + 100_000, type='Actif générateur')
+              for projet in plan.projets[:50]]
+    kpis = plan.calculer_kpis(copies)
+    assert kpis == pytest.approx(kpis_attendus(plan, copies))
+    assert kpis != pytest.approx(kpis_attendus(plan, plan.projets[:50]))
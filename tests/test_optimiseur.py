@@ -0,0 +1,70 @@
+"""Répartition automatique : référence exhaustive sur de petits cas et montants lus au grand livre"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.bench_optimiseur import (MOIS, optimum_exact, petit_cas, probabilite_financee,
+                                         verifier_contraintes)
+from benchmarks.donnees import LISTES_CONFIG, generer_projets
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.moteur import PlanFinancier
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_petits_cas_contre_l_optimum_exact(seed):
+    projets, revenus = petit_cas(seed)
+    plan = PlanFinancier(projets, revenus, {'listes_config': LISTES_CONFIG}, grand_livre=GrandLivre())
+    lots, bilan = plan.proposer_allocations(MOIS)
+    montants = verifier_contraintes(projets, revenus, lots)
+    obtenu = sum(probabilite_financee(p, montants.get(p['id'], 0)) for p in projets)
+    assert obtenu == round(bilan['probabilite_moyenne'] * len(projets))
+    optimum = optimum_exact(projets, sum(r['montant_mensuel'] for r in revenus))
+    # Glouton : jamais au-dessus de l'optimum, et à moins d'un palier (10 points) de lui
+    assert optimum - 10 <= obtenu <= optimum
+
+
+def plan_de_test(revenus):
+    projets = generer_projets(3)
+    for projet in projets:
+        projet.update(priorite='Critique', montant_total=100_000, montant_utilise_reel=0, budget_alloue_mensuel=40_000,
+                      echeance=date.today() + timedelta(days=200), suivi_mensuel=[])
+    return PlanFinancier(projets, revenus, {'listes_config': LISTES_CONFIG}, grand_livre=GrandLivre())
+
+
+def revenu(revenu_id, regulier, disponibilite, montant=1_000_000):
+    return {'id': revenu_id, 'nom': f'Revenu {revenu_id}', 'montant_mensuel': montant, 'regulier': regulier,
+            'date_disponibilite': disponibilite, 'allocations': []}
+
+
+def test_seuls_les_revenus_verses_ce_mois_sont_repartis():
+    plan = plan_de_test([revenu(1, True, date(2026, 1, 5)), revenu(2, False, date(2026, 2, 5)),
+                         revenu(3, True, date(2026, 4, 1)), revenu(4, False, date(2026, 3, 20))])
+    lots, bilan = plan.proposer_allocations('2026-03')
+    assert {revenu_id for revenu_id, _ in lots} <= {1, 4}
+    assert bilan['montant_disponible'] == 2_000_000
+
+
+def test_capacite_deduit_les_allocations_des_autres_mois():
+    plan = plan_de_test([revenu(1, True, date(2026, 1, 1))])
+    projet = plan.projets[0]
+    # 90 000 alloués les mois précédents sans être dépensés : il reste 10 000 à financer
+    for mois in ('2026-01', '2026-02', '2026-03'):
+        plan.grand_livre.allouer(1, projet['id'], 30_000, mois)
+    lots, bilan = plan.proposer_allocations('2026-04')
+    montants = {a['projet_id']: a['montant'] for _, allocations in lots for a in allocations}
+    assert montants[projet['id']] == 10_000
+    assert bilan['montant_reparti'] == 10_000 + 2 * 40_000
+
+
+def test_proposition_appliquee_sans_toucher_aux_regles():
+    plan = plan_de_test([revenu(1, True, date(2026, 1, 1), montant=50_000)])
+    regles = [{'projet_id': plan.projets[0]['id'], 'montant': 5000}]
+    plan.revenus_variables[0]['regles_allocation'] = regles
+    lots, bilan = plan.proposer_allocations('2026-03')
+    assert bilan['gain_probabilite'] > 0
+    assert plan.allouer_revenus_en_lot(lots)[0]
+    assert plan.revenus_variables[0]['regles_allocation'] == regles
+    # Gain déjà inscrit au grand livre : la proposition suivante part du montant financé
+    lots, bilan = plan.proposer_allocations('2026-03')
+    assert not lots and bilan['gain_probabilite'] == 0
@@ -0,0 +1,112 @@
+"""Planificateur des revenus réguliers sur une horloge simulée"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from benchmarks.donnees import LISTES_CONFIG, generer_plan
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.planificateur import PlanificateurRevenus, mois_dus, preparer_lots
+from plan_financier.stockage import StockagePlan
+
+N_REGLES = 5
+MONTANT_REGLE = 10_000
+
+
+@pytest.fixture
+def base(tmp_path):
+    """Base d'un plan à deux revenus réguliers disponibles le 5 de chaque mois depuis février 2024"""
+    chemin = str(tmp_path / 'plan.db')
+    projets, revenus = generer_plan(50, n_revenus=2, n_mois=0, allocations_par_projet=0, compact=True)
+    for i, revenu in enumerate(revenus):
+        cibles = projets[i * N_REGLES:(i + 1) * N_REGLES]
+        revenu.update(regulier=True, montant_mensuel=N_REGLES * MONTANT_REGLE, date_disponibilite=date(2024, 2, 5),
+                      regles_allocation=[{'projet_id': p['id'], 'montant': MONTANT_REGLE} for p in cibles])
+    stockage = StockagePlan(chemin)
+    stockage.sauvegarder_plan(projets, revenus, {'listes_config': LISTES_CONFIG}, 'Alix',
+                              GrandLivre.depuis_projets(projets))
+    stockage.fermer()
+    return chemin
+
+
+def relire(chemin):
+    stockage = StockagePlan(chemin)
+    _, revenus, _, grand_livre = stockage.charger_plan()
+    stockage.fermer()
+    return revenus, grand_livre
+
+
+def test_mois_dus_au_jour_de_disponibilite():
+    revenu = {'regulier': True, 'date_disponibilite': date(2024, 1, 31),
+              'regles_allocation': [{'projet_id': 1, 'montant': 10}]}
+    # Février n'a pas de 31 : le revenu y est disponible le 29
+    assert mois_dus(revenu, date(2024, 2, 28)) == ['2024-01']
+    assert mois_dus(revenu, date(2024, 2, 29)) == ['2024-01', '2024-02']
+    assert mois_dus(dict(revenu, dernier_mois_poste='2024-01'), date(2024, 2, 29)) == ['2024-02']
+    assert mois_dus(dict(revenu, regles_allocation=[]), date(2024, 2, 29)) == []
+
+
+def test_mois_deja_alloues_sautes_sans_arreter_le_rattrapage():
+    revenu = {'id': 7, 'regulier': True, 'montant_mensuel': 10, 'date_disponibilite': date(2024, 1, 5),
+              'regles_allocation': [{'projet_id': 1, 'montant': 10}]}
+    grand_livre = GrandLivre()
+    grand_livre.allouer(7, 2, 10, '2024-02')
+    lots, derniers, ecartes = preparer_lots([revenu], date(2024, 3, 10), grand_livre)
+    assert [allocations[0]['mois'] for _, allocations in lots] == ['2024-01', '2024-03']
+    assert derniers == {7: '2024-03'} and ecartes == []
+
+
+def test_rattrapage_puis_passage_sans_echeance(base):
+    horloge = [datetime(2024, 7, 10)]
+    planificateur = PlanificateurRevenus(base, horloge=lambda: horloge[0])
+    bilan = planificateur.passer()
+    # Février à juillet, pour les deux revenus
+    assert bilan['erreur'] is None and bilan['lots'] == 12 and bilan['allocations'] == 12 * N_REGLES
+    assert planificateur.passer()['allocations'] == 0
+
+    revenus, grand_livre = relire(base)
+    assert {revenu['dernier_mois_poste'] for revenu in revenus} == {'2024-07'}
+    assert len(list(grand_livre.allocations())) == 12 * N_REGLES
+    assert all(len(revenu['regles_allocation']) == N_REGLES for revenu in revenus)
+
+
+def test_allocation_manuelle_ne_devient_pas_une_regle(base):
+    horloge = [datetime(2024, 2, 10)]
+    planificateur = PlanificateurRevenus(base, horloge=lambda: horloge[0])
+    planificateur._synchroniser()
+    plan = planificateur.plan
+    revenu = plan.revenus_variables[0]
+    regles = list(revenu['regles_allocation'])
+    projet_id = plan.projets[-1]['id']
+    # Mars alloué à la main : règles intactes, février et avril rattrapés, mars laissé tel quel
+    manuelles = [{'projet_id': projet_id, 'montant': 1000, 'mois': '2024-03'}]
+    assert plan.allouer_revenu(revenu['id'], manuelles)[0]
+    assert revenu['regles_allocation'] == regles
+    horloge[0] = datetime(2024, 4, 10)
+    planificateur.passer()
+    revenus, grand_livre = relire(base)
+    assert {mois for _, revenu_id, _, mois in grand_livre.allocations() if revenu_id == revenu['id']} == {
+        '2024-02', '2024-03', '2024-04'}
+    assert grand_livre.alloue_projet(projet_id) == 1000
+    relu = next(r for r in revenus if r['id'] == revenu['id'])
+    assert relu['dernier_mois_poste'] == '2024-04'
+    # Les lots du planificateur ne remplacent pas les allocations postées à la main
+    assert relu['allocations'] == manuelles
+
+
+def test_boucle_asyncio_un_mois_par_pause(base):
+    horloge = [datetime(2024, 2, 10)]
+    planificateur = PlanificateurRevenus(base, horloge=lambda: horloge[0])
+
+    async def avancer(delai):
+        horloge[0] += timedelta(days=31)
+        if len(planificateur.passages) >= 4:
+            planificateur.arreter()
+    planificateur.attendre = avancer
+    asyncio.run(planificateur.executer())
+
+    assert [bilan['allocations'] for bilan in planificateur.passages] == [2 * N_REGLES] * 4
+    revenus, grand_livre = relire(base)
+    assert {revenu['dernier_mois_poste'] for revenu in revenus} == {'2024-05'}
+    assert len(list(grand_livre.allocations())) == 4 * 2 * N_REGLES
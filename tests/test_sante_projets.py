@@ -0,0 +1,72 @@
+"""Santé des projets : API vectorisée identique aux fonctions unitaires"""
+
+import copy
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.donnees import generer_historique, generer_projets
+from plan_financier.sante_projets import calculer_probabilite_reussite, calculer_velocite_projet, categorize_project, evaluer_sante_projets
+from plan_financier.suivi import SuiviMensuel
+from plan_financier.table_projets import TableProjets
+
+
+def portefeuille_aleatoire(seed, n=300):
+    """Projets aléatoires concentrés sur les seuils des deux fonctions"""
+    rng = random.Random(seed)
+    aujourd_hui = date.today()
+    projets = generer_projets(n, seed=seed)
+    for projet in projets:
+        total = rng.choice([0, 1000, 100_000, rng.randrange(1, 10_000_000)])
+        projet['montant_total'] = total
+        projet['montant_utilise_reel'] = rng.choice([0, total, total + 1, rng.randrange(0, total + 2)])
+        projet['budget_alloue_mensuel'] = rng.choice([0, 1000, rng.randrange(0, 800_000)])
+        projet['echeance'] = aujourd_hui + timedelta(days=rng.choice([-1, 0, 29, 30, 31, 90, 91, rng.randrange(-400, 400)]))
+        budget = projet['budget_alloue_mensuel']
+        projet['suivi_mensuel'] = [
+            {'mois': f'2025-{mois:02d}', 'prevu': budget,
+             'reel': rng.choice([0, budget * 3 // 10, budget * 8 // 10, rng.randrange(0, budget + 2)])}
+            for mois in rng.sample(range(1, 13), rng.randrange(0, 6))
+        ]
+    return projets
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_sante_vectorisee_identique_aux_fonctions_unitaires(seed):
+    projets = portefeuille_aleatoire(seed)
+    sante = evaluer_sante_projets(TableProjets.depuis_projets(projets))
+    for i, projet in enumerate(projets):
+        assert (sante['statuts'][i], sante['libelles'][i], sante['couleurs'][i]) == categorize_project(projet)
+        assert sante['probabilites'][i] == calculer_probabilite_reussite(projet)
+
+
+def test_sante_sur_un_sous_ensemble_de_lignes():
+    projets = portefeuille_aleatoire(0, n=50)
+    lignes = [3, 7, 11]
+    sante = evaluer_sante_projets(TableProjets.depuis_projets(projets), lignes=lignes)
+    assert list(sante['probabilites']) == [calculer_probabilite_reussite(projets[i]) for i in lignes]
+
+
+@pytest.mark.parametrize('n_mois', [0, 1, 2, 3, 12])
+def test_velocite_fenetre_glissante_identique_au_tri(n_mois):
+    projets = generer_historique(generer_projets(200), n_mois=n_mois, allocations_par_projet=0)
+    # Historique saisi dans le désordre, comme après des corrections
+    for projet in projets:
+        projet['suivi_mensuel'].reverse()
+    suivis = copy.deepcopy(projets)
+    for projet in suivis:
+        projet['suivi_mensuel'] = SuiviMensuel(projet['suivi_mensuel'])
+    assert [calculer_velocite_projet(p) for p in suivis] == [calculer_velocite_projet(p) for p in projets]
+
+
+def test_velocite_suit_les_saisies_et_corrections():
+    projet = {'suivi_mensuel': SuiviMensuel()}
+    liste = {'suivi_mensuel': []}
+    saisies = [('2025-03', 100, 90), ('2025-01', 100, 30), ('2025-05', 100, 120), ('2025-03', 100, 60),
+               ('2025-02', 100, 10), ('2025-06', 100, 0)]
+    for mois, prevu, reel in saisies:
+        projet['suivi_mensuel'].enregistrer(mois, prevu, reel)
+        liste['suivi_mensuel'] = [s for s in liste['suivi_mensuel'] if s['mois'] != mois]
+        liste['suivi_mensuel'].append({'mois': mois, 'prevu': prevu, 'reel': reel})
+        assert calculer_velocite_projet(projet) == calculer_velocite_projet(liste)
@@ -0,0 +1,58 @@
+"""Sauvegarde JSON / JSON Lines : aller-retour, comptes et lecture en flux"""
+
+import io
+
+import pytest
+
+from benchmarks.donnees import LISTES_CONFIG, generer_plan
+from plan_financier import codec_json, sauvegarde
+from plan_financier.grand_livre import GrandLivre
+from plan_financier.sauvegarde import charger_sauvegarde, ecrire_json, ecrire_jsonl, lire_sauvegarde
+
+ECRITURES = {'jsonl': ecrire_jsonl, 'json': ecrire_json}
+
+
+@pytest.fixture
+def plan():
+    projets, revenus = generer_plan(300, n_revenus=5, n_mois=3, compact=True)
+    admin_config = {'listes_config': LISTES_CONFIG, 'kpis_config': {'objectif_patrimoine': 50_000_000}}
+    return projets, revenus, admin_config, GrandLivre.depuis_projets(projets)
+
+
+def ecrire(format_fichier, projets, revenus, admin_config, grand_livre):
+    sortie = io.StringIO()
+    comptes = ECRITURES[format_fichier](sortie, projets, revenus, admin_config, grand_livre)
+    sortie.seek(0)
+    return sortie, comptes
+
+
+@pytest.mark.parametrize('format_fichier', ECRITURES)
+def test_aller_retour_exact(plan, format_fichier, monkeypatch):
+    # Petits blocs et petits lots : valeurs coupées entre deux lectures, restauration par morceaux
+    monkeypatch.setattr(sauvegarde, 'TAILLE_BLOC', 100)
+    monkeypatch.setattr(sauvegarde, 'TAILLE_LOT_EVENEMENTS', 50)
+    projets, revenus, admin_config, grand_livre = plan
+    evenements = list(grand_livre.evenements())
+    sortie, comptes = ecrire(format_fichier, *plan)
+    assert comptes == {'admin_config': 1, 'projet': len(projets), 'revenu': len(revenus),
+                       'evenement': len(evenements)}
+
+    restaure = charger_sauvegarde(sortie, format_fichier)
+    assert codec_json.dumps(list(restaure[:3])) == codec_json.dumps([projets, revenus, admin_config])
+    assert list(restaure[3].evenements()) == evenements
+
+
+@pytest.mark.parametrize('format_fichier', ECRITURES)
+def test_lecture_en_flux(plan, format_fichier):
+    sortie, comptes = ecrire(format_fichier, *plan)
+    types = [type_item for type_item, _ in lire_sauvegarde(sortie, format_fichier)]
+    assert types[0] == 'admin_config' and len(types) == sum(comptes.values())
+    assert {type_item: types.count(type_item) for type_item in comptes} == comptes
+
+
+@pytest.mark.parametrize('format_fichier', ECRITURES)
+def test_fichier_invalide(format_fichier):
+    with pytest.raises(ValueError, match="pas une sauvegarde"):
+        list(lire_sauvegarde(io.StringIO('{"format": "autre", "version": 2}\n'), format_fichier))
+    with pytest.raises(ValueError, match="non prise en charge"):
+        list(lire_sauvegarde(io.StringIO('{"format": "plan_financier", "version": 99}\n'), format_fichier))
@@ -0,0 +1,43 @@
+"""Scénarios what-if : variantes et évaluation sur un pool de processus"""
+
+from datetime import date
+
+import numpy as np
+
+from benchmarks.donnees import generer_projets, generer_revenus
+from plan_financier.scenarios import appliquer_scenario, executer_scenarios, grille_scenarios
+from plan_financier.table_projets import TableProjets
+
+AUJOURD_HUI = date(2026, 1, 1)
+KPIS_CONFIG = {
+    'objectif_cash_flow': 500000,
+    'objectif_ratio_actifs': 40,
+    'objectif_revenus_passifs': 30,
+    'objectif_fonds_urgence': 6
+}
+
+
+def donnees():
+    table = TableProjets.depuis_projets(generer_projets(300, seed=1))
+    revenus = generer_revenus(5, seed=1)
+    scenarios = grille_scenarios(facteurs_budget=(0.8, 1, 1.2), reports_mois=(0, 6),
+                                 montants_revenus=({}, {1: 0}))
+    return table, revenus, scenarios
+
+
+def test_scenario_sans_effet_sur_les_originaux():
+    table, revenus, _ = donnees()
+    budget = table.budget_alloue_mensuel[:table.taille].copy()
+    scenario = grille_scenarios(facteurs_budget=(2,), reports_mois=(3,), montants_revenus=({1: 0},))[0]
+    variante, revenus_variante = appliquer_scenario(table, revenus, scenario)
+    assert np.array_equal(table.budget_alloue_mensuel[:table.taille], budget)
+    assert np.array_equal(variante.budget_alloue_mensuel, np.rint(budget * 2))
+    assert revenus_variante[0]['montant_mensuel'] == 0 and revenus[0]['montant_mensuel'] != 0
+
+
+def test_pool_de_processus_identique_a_la_serie():
+    table, revenus, scenarios = donnees()
+    reference = executer_scenarios(table, revenus, KPIS_CONFIG, scenarios, n_processus=1, aujourd_hui=AUJOURD_HUI)
+    assert [ligne['rang'] for ligne in reference] == list(range(1, len(scenarios) + 1))
+    assert executer_scenarios(table, revenus, KPIS_CONFIG, scenarios, n_processus=2,
+                              aujourd_hui=AUJOURD_HUI) == reference
@@ -0,0 +1,47 @@
+"""Simulation Monte Carlo des trajectoires du plan"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from benchmarks.donnees import generer_projets, generer_revenus
+from plan_financier.simulation import PERCENTILES, PHASES, simuler_trajectoires
+
+GRAINE = 2030
+DATE_DEBUT = date(2026, 1, 1)
+KPIS_CONFIG = {
+    'objectif_cash_flow': 500000,
+    'objectif_ratio_actifs': 40,
+    'objectif_revenus_passifs': 30,
+    'objectif_fonds_urgence': 6
+}
+
+
+def simuler(seed, **options):
+    projets = generer_projets(100, seed=GRAINE)
+    revenus = generer_revenus(20, seed=GRAINE)
+    return simuler_trajectoires(projets, revenus, KPIS_CONFIG, n_chemins=500, seed=seed, date_debut=DATE_DEBUT,
+                                **options)
+
+
+def test_meme_graine_meme_resultat():
+    a, b = simuler(GRAINE), simuler(GRAINE)
+    assert a['phases'] == b['phases'] and a['objectifs'] == b['objectifs']
+    assert all(np.array_equal(a['percentiles'][k], b['percentiles'][k]) for k in a['percentiles'])
+    c = simuler(GRAINE + 1)
+    assert not all(np.array_equal(a['percentiles'][k], c['percentiles'][k]) for k in a['percentiles'])
+
+
+def test_forme_du_resultat():
+    resultat = simuler(GRAINE, horizon=14)
+    assert resultat['mois'][0] == '2026-01' and resultat['mois'][-1] == '2027-02'
+    assert list(resultat['phases']) == list(PHASES)
+    for phase in resultat['phases'].values():
+        assert 0 <= phase['proba_finale'] <= phase['proba_atteinte'] <= 1
+        assert phase['mois_median'] is None or phase['mois_median'] in resultat['mois']
+    assert sum(phase['proba_finale'] for phase in resultat['phases'].values()) == pytest.approx(1)
+    assert set(resultat['objectifs']) == set(KPIS_CONFIG)
+    for percentiles in resultat['percentiles'].values():
+        assert percentiles.shape == (len(PERCENTILES), 14)
+        assert (np.diff(percentiles, axis=0) >= 0).all()
@@ -0,0 +1,144 @@
+"""Stockage SQLite : chargement paresseux, sauvegarde incrémentale détectée sur le contenu des enregistrements
+et synchronisation entre sessions"""
+
+import pytest
+
+from benchmarks.bench_concurrence import allouer, ouvrir_session, synchroniser
+from benchmarks.donnees import LISTES_CONFIG, generer_plan
+from plan_financier.modeles import en_enregistrements
+from plan_financier.moteur import PlanFinancier
+from plan_financier.stockage import TAILLE_PAGE, ConflitModification, StockagePlan
+
+
+@pytest.fixture
+def session(tmp_path):
+    """Session ouverte sur une base fraîchement écrite par une autre connexion"""
+    chemin = str(tmp_path / 'plan.db')
+    projets, revenus = generer_plan(200, n_revenus=5, n_mois=6, allocations_par_projet=0)
+    for revenu in revenus:
+        revenu['regles_allocation'] = []
+    initial = StockagePlan(chemin)
+    initial.sauvegarder_plan(projets, revenus, {'listes_config': LISTES_CONFIG}, 'Alix')
+    initial.fermer()
+    stockage = StockagePlan(chemin)
+    projets, revenus, admin_config, _ = stockage.charger_plan()
+    yield stockage, en_enregistrements(projets, 'projet'), en_enregistrements(revenus, 'revenu'), admin_config
+    stockage.fermer()
+
+
+def test_rechargement_sans_changement_n_ecrit_rien(session):
+    stockage, projets, revenus, admin_config = session
+    assert stockage.sauvegarder_plan(projets, revenus, admin_config, 'Alix') == 0
+
+
+def test_modification_sans_date_modification_sauvegardee(session):
+    stockage, projets, revenus, admin_config = session
+    projets[3]['statut'] = 'Suspendu' if projets[3]['statut'] != 'Suspendu' else 'En cours'
+    revenus[1]['montant_mensuel'] += 1000
+    assert stockage.sauvegarder_plan(projets, revenus, admin_config, 'Alix') == 2
+
+    relu = StockagePlan(stockage.chemin)
+    projets_relus, revenus_relus, _, _ = relu.charger_plan()
+    relu.fermer()
+    assert projets_relus[3]['statut'] == projets[3]['statut']
+    assert revenus_relus[1]['montant_mensuel'] == revenus[1]['montant_mensuel']
+
+
+def relire(stockage):
+    relu = StockagePlan(stockage.chemin)
+    projets, revenus, _, _ = relu.charger_plan()
+    relu.fermer()
+    return projets, revenus
+
+
+def test_modifications_imbriquees_en_place_sauvegardees(session):
+    stockage, projets, revenus, admin_config = session
+    revenus[0]['regles_allocation'].append({'projet_id': projets[0]['id'], 'montant': 1000})
+    revenus[1]['allocations'].append({'projet_id': projets[1]['id'], 'montant': 500, 'mois': '2024-01'})
+    projets[2]['suivi_mensuel'][0]['reel'] += 1000
+    assert stockage.sauvegarder_plan(projets, revenus, admin_config, 'Alix') == 3
+    assert stockage.sauvegarder_plan(projets, revenus, admin_config, 'Alix') == 0
+
+    projets_relus, revenus_relus = relire(stockage)
+    assert revenus_relus[0]['regles_allocation'] == revenus[0]['regles_allocation'] != []
+    assert revenus_relus[1]['allocations'] == revenus[1]['allocations'] != []
+    assert projets_relus[2]['suivi_mensuel'] == projets[2]['suivi_mensuel']
+
+
+def test_chargement_paresseux_par_page(tmp_path):
+    chemin = str(tmp_path / 'plan.db')
+    projets, revenus = generer_plan(2 * TAILLE_PAGE + 10, n_revenus=3, n_mois=2, allocations_par_projet=0)
+    initial = StockagePlan(chemin)
+    initial.sauvegarder_plan(projets, revenus, {'listes_config': LISTES_CONFIG}, 'Alix')
+    initial.fermer()
+
+    stockage = StockagePlan(chemin)
+    projets_charges, revenus_charges, admin_config, _ = stockage.charger_plan()
+    assert [projet['id'] for projet in projets_charges] == sorted(projet['id'] for projet in projets)
+    assert not any(projet.charge for projet in projets_charges)
+    # Un accès décode la page de l'enregistrement, pas les autres
+    assert projets_charges[TAILLE_PAGE + 1]['nom'] == next(
+        projet['nom'] for projet in projets if projet['id'] == projets_charges[TAILLE_PAGE + 1]['id'])
+    assert [projet.charge for projet in projets_charges[TAILLE_PAGE - 1:2 * TAILLE_PAGE + 1]] == (
+        [False] + [True] * TAILLE_PAGE + [False])
+    assert stockage.sauvegarder_plan(projets_charges, revenus_charges, admin_config, 'Alix') == 0
+    assert sum(projet.charge for projet in projets_charges) == TAILLE_PAGE
+    projets_charges[-1]['description'] = 'modifiée'
+    assert stockage.sauvegarder_plan(projets_charges, revenus_charges, admin_config, 'Alix') == 1
+    assert projets_charges == sorted(relire(stockage)[0], key=lambda projet: projet['id'])
+    stockage.fermer()
+
+
+def test_modification_relue_d_une_autre_session_pas_reecrite(session):
+    stockage, projets, revenus, admin_config = session
+    autre = StockagePlan(stockage.chemin)
+    projets_b, revenus_b, admin_config_b, _ = autre.charger_plan()
+    projets[5]['description'] = 'modifiée en A'
+    assert stockage.sauvegarder_plan(projets, revenus, admin_config, 'Alix') == 1
+
+    changements, _ = autre.modifications_distantes()
+    relu = changements['projets'][projets[5]['id']]
+    position = next(i for i, projet in enumerate(projets_b) if projet['id'] == relu['id'])
+    projets_b[position] = en_enregistrements([relu], 'projet')[0]
+    assert autre.sauvegarder_plan(projets_b, revenus_b, admin_config_b, 'William') == 0
+    autre.fermer()
+
+
+@pytest.fixture
+def deux_sessions(tmp_path):
+    """Deux sessions ouvertes sur le même plan, grand livre compris"""
+    chemin = str(tmp_path / 'plan.db')
+    projets, revenus = generer_plan(300, n_revenus=5, n_mois=6, allocations_par_projet=2, compact=True)
+    for revenu in revenus:
+        revenu['montant_mensuel'] = 10 ** 12
+    plan = PlanFinancier(projets, revenus, {'listes_config': LISTES_CONFIG})
+    initial = StockagePlan(chemin)
+    initial.sauvegarder_plan(projets, revenus, plan.admin_config, 'Alix', plan.grand_livre)
+    initial.fermer()
+    sessions = [ouvrir_session(chemin), ouvrir_session(chemin)]
+    yield chemin, sessions
+    for stockage, _ in sessions:
+        stockage.fermer()
+
+
+def test_synchronisation_par_journal_egale_au_rechargement(deux_sessions):
+    chemin, ((stockage_a, plan_a), (stockage_b, plan_b)) = deux_sessions
+    cibles = [projet['id'] for projet in plan_a.projets[::15]]
+    assert allouer(stockage_a, plan_a, 1, cibles, 'Alix') > 0
+    kpis = synchroniser(stockage_b, plan_b)
+
+    stockage, reference = ouvrir_session(chemin)
+    stockage.fermer()
+    assert kpis == reference.calculer_kpis() == plan_a.calculer_kpis()
+    assert plan_b.grand_livre.soldes() == reference.grand_livre.soldes() == plan_a.grand_livre.soldes()
+    assert not stockage_b.modifie_par_autre_session()
+
+
+def test_conflit_detecte_avec_son_auteur(deux_sessions):
+    _, ((stockage_a, plan_a), (stockage_b, plan_b)) = deux_sessions
+    cibles = [projet['id'] for projet in plan_a.projets[:2]]
+    allouer(stockage_a, plan_a, 2, cibles[:1], 'Alix')
+    # B n'a pas relu l'allocation du revenu 2 écrite par A
+    with pytest.raises(ConflitModification) as conflit:
+        allouer(stockage_b, plan_b, 2, cibles[1:], 'William')
+    assert conflit.value.conflits[0][2] == 'Alix'